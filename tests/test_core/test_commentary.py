@@ -0,0 +1,287 @@
+# tests/test_core/test_commentary.py
+
+"""
+Tests für die Segmentierung und den Volltextindex des Kommentars ``yijing.txt``.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from yijing.core import commentary, text_index
+from yijing.core.commentary import (
+    CommentaryText,
+    default_commentary_path,
+    ensure_commentary_map,
+    load_hexagram_names,
+    open_commentary_text,
+    segment_commentary,
+    split_segment
+)
+from yijing.core.manager import HexagramManager
+from yijing.core.text_index import (
+    CommentaryIndex,
+    build_commentary_index,
+    ensure_commentary_index,
+    open_commentary_index,
+    tokenize
+)
+
+PACKAGE_RESOURCES = Path(__file__).parent.parent.parent / 'yijing' / 'resources'
+
+
+@pytest.fixture(scope="module")
+def names():
+    return load_hexagram_names(PACKAGE_RESOURCES / "hexagram_json")
+
+
+@pytest.fixture(scope="module")
+def commentary_index(tmp_path_factory, names):
+    """Index des mitgelieferten Kommentars in einem temporären Verzeichnis."""
+    source = default_commentary_path(PACKAGE_RESOURCES)
+    path = build_commentary_index(source, names, tmp_path_factory.mktemp("index") / "yijing.bm25")
+    index = CommentaryIndex(path, source)
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def resources_copy(tmp_path):
+    """Kopie von Kommentar und Hexagrammdateien in einem temporären Verzeichnis."""
+    shutil.copytree(PACKAGE_RESOURCES / "hexagram_json", tmp_path / "hexagram_json")
+    shutil.copy(default_commentary_path(PACKAGE_RESOURCES), default_commentary_path(tmp_path))
+    return tmp_path
+
+
+class TestSegmentation:
+    """
+    Tests für ``segment_commentary``.
+    """
+
+    def test_every_hexagram_has_its_sections(self, names):
+        """Jedes Hexagramm erhält Zeichen, Urteil und sechs Linien in Dateireihenfolge."""
+        data = default_commentary_path(PACKAGE_RESOURCES).read_bytes()
+        segments = segment_commentary(data, names)
+        sections = {}
+        for segment in segments:
+            sections.setdefault(segment.number, []).append(segment.section)
+
+        assert sorted(sections) == list(range(1, 65))
+        for found in sections.values():
+            assert found[:2] == ["hexagram", "judgment"]
+            assert found[-6:] == [f"lines.{i}" for i in range(6)]
+
+        texts = {(s.number, s.section): data[s.start:s.end].decode("utf-8") for s in segments}
+        assert texts[(4, "hexagram")].startswith("42 I. / DIE MEHRUNG")
+        assert texts[(62, "hexagram")].startswith("WE DSI / VOR DER VOLLENDUNG")
+        assert texts[(38, "lines.0")].startswith("Anfangs eine Neun bedeutet")
+        assert texts[(60, "lines.5")].startswith("Oben die Sechs bedeutet")
+        assert all("<< zurück" not in text for text in texts.values())
+
+    def test_split_segment_at_sentence_ends(self, names):
+        """Lange Abschnitte werden an Satzenden in lückenlose Teile zerlegt."""
+        data = default_commentary_path(PACKAGE_RESOURCES).read_bytes()
+        segment = max(segment_commentary(data, names), key=lambda s: s.end - s.start)
+
+        parts = split_segment(data, segment, 500)
+
+        assert len(parts) > 1
+        assert parts[0].start == segment.start and parts[-1].end == segment.end
+        for part in parts[:-1]:
+            assert data[part.start:part.end].decode("utf-8")[-1] in '.!?«"'
+
+
+class TestCommentaryIndex:
+    """
+    Tests für ``CommentaryIndex``.
+    """
+
+    def test_search_finds_matching_passages(self, commentary_index):
+        """Die besten Treffer enthalten die gesuchten Begriffe."""
+        passages = commentary_index.search("Was bedeutet der verborgene Drache?", k=3)
+
+        assert len(passages) == 3
+        assert passages[0].number == 38
+        assert all("Drache" in p.text for p in passages)
+        assert passages[0].score >= passages[1].score >= passages[2].score
+
+    def test_search_within_hexagrams(self, commentary_index):
+        """Mit ``numbers`` werden nur die Stellen dieser Hexagramme durchsucht."""
+        passages = commentary_index.search("Frieden in der Ehe", numbers=[5, 54], k=5)
+
+        assert passages
+        assert {p.number for p in passages} <= {5, 54}
+        assert commentary_index.search("xyzzy", k=3) == []
+
+    def test_tokenize_normalizes_inflection(self):
+        """Flexionsendungen und Stoppwörter fallen weg."""
+        assert tokenize("Die Drachen und der Drache") == ["drach", "drach"]
+
+    def test_ensure_rebuilds_stale_index(self, resources_copy):
+        """Ein Index wird nur neu gebaut, wenn sich der Kommentar geändert hat."""
+        source = default_commentary_path(resources_copy)
+        path = ensure_commentary_index(resources_copy)
+        built = path.stat().st_mtime_ns
+        assert ensure_commentary_index(resources_copy) == path
+        assert path.stat().st_mtime_ns == built
+
+        with open(source, "ab") as f:
+            f.write(b"\n")
+        ensure_commentary_index(resources_copy)
+        with CommentaryIndex(path, source) as index:
+            assert index.is_current(load_hexagram_names(resources_copy / "hexagram_json"))
+
+    def test_shared_index_follows_corpus_changes(self, resources_copy, tmp_path, monkeypatch):
+        """Der geteilte Index liegt im Cache-Verzeichnis und folgt Änderungen am Kommentar."""
+        monkeypatch.setattr(text_index, "CHECK_INTERVAL", 0)
+        cache_dir = tmp_path / "cache"
+        first = CommentaryIndex.for_resources(resources_copy, cache_dir)
+        assert first.path.parent == cache_dir
+        assert CommentaryIndex.for_resources(resources_copy, cache_dir) is first
+
+        source = default_commentary_path(resources_copy)
+        source.write_bytes(b"\n\n" + source.read_bytes())
+        second = CommentaryIndex.for_resources(resources_copy, cache_dir)
+
+        assert second is not first
+        passages = second.search("Hochmütiger Drache", numbers=[38], k=1)
+        assert passages[0].text.startswith("Oben eine Neun bedeutet:  Hochmütiger Drache")
+
+    def test_unwritable_cache_dir_keeps_index_in_memory(self, resources_copy, tmp_path):
+        """Kann der Index nicht geschrieben werden, wird er im Speicher gebaut."""
+        blocked = tmp_path / "blocked"
+        blocked.write_text("kein Verzeichnis", encoding="utf-8")
+
+        index = open_commentary_index(resources_copy, blocked / "cache")
+
+        assert index.path is None
+        assert index.search("verborgene Drache", k=1)[0].number == 38
+
+
+class TestCommentaryText:
+    """
+    Tests für die Abschnitts-Offsets und ``CommentaryText``.
+    """
+
+    def test_sections_match_segmentation(self, resources_copy, names):
+        """Die gespeicherten Offsets liefern genau die Abschnitte der Segmentierung."""
+        source = default_commentary_path(resources_copy)
+        data = source.read_bytes()
+
+        with CommentaryText(source, ensure_commentary_map(resources_copy)) as text:
+            assert text.segments() == segment_commentary(data, names)
+            assert text.section(38, "lines.0").startswith("Anfangs eine Neun bedeutet")
+            assert text.section(43, "image") is None
+            assert list(text.hexagram(1)) == [
+                "hexagram", "judgment", "image"
+            ] + [f"lines.{i}" for i in range(6)]
+            with pytest.raises(ValueError):
+                text.section(65, "judgment")
+            with pytest.raises(ValueError):
+                text.section(1, "commentary")
+
+    def test_map_is_validated_against_file_hash(self, resources_copy):
+        """Geänderter Inhalt erzwingt neue Offsets, ein bloßes ``touch`` nicht."""
+        source = default_commentary_path(resources_copy)
+        map_path = ensure_commentary_map(resources_copy)
+
+        os.utime(source, ns=(0, 0))
+        with CommentaryText(source, map_path) as text:
+            assert text.is_current()
+
+        source.write_bytes(b"\n" + source.read_bytes())
+        with CommentaryText(source, map_path) as text:
+            assert not text.is_current()
+        ensure_commentary_map(resources_copy)
+        with CommentaryText(source, map_path) as text:
+            assert text.is_current()
+            assert text.section(1, "hexagram").startswith("GUAI / DER DURCHBRUCH")
+
+    def test_touched_corpus_is_hashed_once(self, resources_copy, monkeypatch):
+        """Nach einem ``touch`` wird der Hash nur einmal berechnet."""
+        source = default_commentary_path(resources_copy)
+        with CommentaryText(source, ensure_commentary_map(resources_copy)) as text:
+            os.utime(source, ns=(0, 0))
+            assert text.is_current()
+
+            def fail(*args):
+                raise AssertionError("Hash erneut berechnet")
+            monkeypatch.setattr(commentary, "source_digest", fail)
+            assert text.is_current()
+
+    def test_changed_names_rebuild_map(self, resources_copy):
+        """Geänderte Hexagrammnamen erzwingen neue Offsets."""
+        map_path = ensure_commentary_map(resources_copy)
+        path = resources_copy / "hexagram_json" / "hexagram_01.json"
+        data = json.loads(path.read_text(encoding="utf-8"))
+        data["hexagram"]["name"] = "GUAI / DER ANDERE NAME"
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        names = load_hexagram_names(resources_copy / "hexagram_json")
+
+        with CommentaryText(default_commentary_path(resources_copy), map_path) as text:
+            assert not text.is_current(names)
+        ensure_commentary_map(resources_copy)
+        with CommentaryText(default_commentary_path(resources_copy), map_path) as text:
+            assert text.is_current(names)
+            assert text.names[1] == "GUAI / DER ANDERE NAME"
+
+    def test_shared_text_follows_corpus_changes(self, resources_copy, tmp_path, monkeypatch):
+        """Der geteilte Kommentar wird nach einer Änderung neu geöffnet."""
+        monkeypatch.setattr(commentary, "CHECK_INTERVAL", 0)
+        cache_dir = tmp_path / "cache"
+        first = CommentaryText.for_resources(resources_copy, cache_dir)
+        assert first.map_path.parent == cache_dir
+
+        source = default_commentary_path(resources_copy)
+        source.write_bytes(b"\n\n" + source.read_bytes())
+        second = CommentaryText.for_resources(resources_copy, cache_dir)
+
+        assert second is not first
+        assert second.section(38, "lines.0").startswith("Anfangs eine Neun bedeutet")
+
+    def test_unwritable_cache_dir_keeps_offsets_in_memory(self, resources_copy, tmp_path):
+        """Können die Offsets nicht geschrieben werden, bleiben sie im Speicher."""
+        blocked = tmp_path / "blocked"
+        blocked.write_text("kein Verzeichnis", encoding="utf-8")
+
+        with open_commentary_text(resources_copy, blocked / "cache") as text:
+            assert text.map_path is None
+            assert text.section(38, "lines.0").startswith("Anfangs eine Neun bedeutet")
+
+    def test_manager_slices_commentary(self, resources_copy):
+        """Der Manager liest einzelne Abschnitte aus dem Kommentar."""
+        manager = HexagramManager(resources_copy)
+
+        assert manager.get_hexagram_commentary(1, "judgment").startswith("Das Urteil")
+        assert manager.get_hexagram_commentary(1)["image"].startswith("DAS BILD")
+
+
+class TestConsultationPrompt:
+    """
+    Tests für Kommentarstellen im Konsultations-Prompt.
+    """
+
+    def test_prompt_includes_commentary(self, commentary_index):
+        """Der Prompt enthält die passenden Stellen beider Hexagramme."""
+        manager = HexagramManager(
+            PACKAGE_RESOURCES,
+            commentary_passages=2,
+            commentary_index=commentary_index
+        )
+        context = manager.create_reading_context(38, [1], 39)
+
+        prompt = manager.get_consultation_prompt(context, "Was bedeutet der verborgene Drache?")
+
+        assert "Kommentar:" in prompt
+        assert "KIEN / DAS SCHÖPFERISCHE, Linie 1: Anfangs eine Neun bedeutet" in prompt
+        assert prompt.endswith("Bitte interpretiere diese Konstellation im Kontext der Frage.")
+
+    def test_prompt_without_commentary(self, commentary_index):
+        """Ohne ``commentary_passages`` bleibt der Prompt unverändert."""
+        manager = HexagramManager(PACKAGE_RESOURCES, commentary_index=commentary_index)
+        context = manager.create_reading_context(38, [1], 39)
+
+        assert "Kommentar:" not in manager.get_consultation_prompt(context, "Drache")
@@ -0,0 +1,215 @@
+# tests/test_core/test_embeddings.py
+
+"""
+Tests für den Vektorspeicher der Korpus-Passagen.
+"""
+
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from yijing.config import ModelType
+from yijing.core.commentary import default_commentary_path, default_map_path
+from yijing.core.embeddings import (
+    StubEmbedder,
+    VectorStore,
+    build_vector_store,
+    corpus_passages
+)
+from yijing.core.oracle import YijingOracle
+from yijing.core.resilience import Deadline, reset_circuit_breakers
+from yijing.exceptions import ModelResponseError, ResourceNotFoundError, ResourceValidationError
+
+PACKAGE_RESOURCES = Path(__file__).parent.parent.parent / 'yijing' / 'resources'
+
+
+@pytest.fixture(scope="module")
+def resources(tmp_path_factory):
+    """Kopie der Ressourcen, damit Offsets und Speicher nicht im Paket landen."""
+    directory = tmp_path_factory.mktemp("resources")
+    for name in ("hexagram_json", "prompts"):
+        shutil.copytree(PACKAGE_RESOURCES / name, directory / name)
+    shutil.copy(default_commentary_path(PACKAGE_RESOURCES), default_commentary_path(directory))
+    return directory
+
+
+@pytest.fixture(scope="module")
+def passages(resources):
+    return corpus_passages(resources)
+
+
+@pytest.fixture(scope="module")
+def store_path(resources, passages):
+    return build_vector_store(passages, StubEmbedder(), resources / "yijing.vectors.npz")
+
+
+class TestBuild:
+    """
+    Tests für ``build_vector_store``.
+    """
+
+    def test_passages_cover_both_sources(self, passages):
+        """Passagen stammen aus den JSON-Dateien und aus dem Kommentar."""
+        keys = {p.key for p in passages}
+
+        assert "json/38/lines.0" in keys
+        assert "txt/38/lines.0/0" in keys
+        assert len(keys) == len(passages)
+
+    def test_offsets_go_to_cache_dir(self, resources, tmp_path, passages):
+        """Die Offsets des Kommentars landen im angegebenen Cache-Verzeichnis."""
+        source = default_commentary_path(resources)
+
+        assert corpus_passages(resources, tmp_path) == passages
+        assert default_map_path(source, tmp_path).exists()
+
+    def test_incremental_rebuild(self, tmp_path, passages):
+        """Nur neue oder geänderte Passagen werden neu eingebettet."""
+        embedder = StubEmbedder()
+        path = tmp_path / "vectors.npz"
+        build_vector_store(passages, embedder, path)
+        assert embedder.embedded == len(passages)
+
+        build_vector_store(passages, embedder, path)
+        assert embedder.embedded == len(passages)
+
+        changed = list(passages[1:])
+        changed[0] = changed[0]._replace(text=changed[0].text + " Neu.")
+        build_vector_store(changed, embedder, path)
+        assert embedder.embedded == len(passages) + 1
+
+        store = VectorStore(path, embedder)
+        assert len(store) == len(passages) - 1
+        with np.load(path) as data:
+            assert data["vectors"].dtype == np.float16
+
+    def test_other_embedder_starts_over(self, tmp_path, passages):
+        """Vektoren eines anderen Embedders werden nicht wiederverwendet."""
+        path = build_vector_store(passages[:10], StubEmbedder(), tmp_path / "vectors.npz")
+        other = StubEmbedder(dimensions=32)
+
+        build_vector_store(passages[:10], other, path)
+
+        assert other.embedded == 10
+        with pytest.raises(ResourceValidationError):
+            VectorStore(path, StubEmbedder())
+
+
+class TestVectorStore:
+    """
+    Tests für ``VectorStore``.
+    """
+
+    def test_search_finds_related_passages(self, store_path):
+        """Die nächsten Passagen teilen die Begriffe der Frage."""
+        store = VectorStore(store_path, StubEmbedder())
+
+        passages = store.search("Hochmütiger Drache", k=3)
+
+        assert len(passages) == 3
+        assert all("Drache" in p.text for p in passages)
+        assert passages[0].score >= passages[1].score >= passages[2].score
+
+    def test_search_within_hexagrams(self, store_path):
+        """Mit ``numbers`` werden nur die Passagen dieser Hexagramme durchsucht."""
+        store = VectorStore(store_path, StubEmbedder())
+
+        passages = store.search("Drache", numbers=[1, 2], k=5)
+
+        assert len(passages) == 5
+        assert {p.number for p in passages} <= {1, 2}
+
+    def test_search_is_fast_and_caches_queries(self, store_path):
+        """Die Suche bleibt unter 5 ms, eine wiederholte Frage wird nicht neu eingebettet."""
+        embedder = StubEmbedder()
+        store = VectorStore(store_path, embedder)
+        store.search("Was ist jetzt zu tun?")
+
+        durations = []
+        for _ in range(20):
+            start = time.perf_counter()
+            store.search("Was ist jetzt zu tun?", numbers=[5, 54], k=3)
+            durations.append(time.perf_counter() - start)
+
+        assert embedder.embedded == 1
+        assert sorted(durations)[len(durations) // 2] < 0.005
+
+    def test_missing_store(self, tmp_path):
+        """Ein nicht gebauter Speicher wird gemeldet."""
+        with pytest.raises(ResourceNotFoundError):
+            VectorStore(tmp_path / "fehlt.npz", StubEmbedder())
+
+
+class TestOracleEmbeddingRetrieval:
+    """
+    Tests für semantisch ausgewählte Kommentarstellen im Orakel.
+    """
+
+    def oracle(self, resources, store_path):
+        return YijingOracle(resources_path=resources, custom_settings={
+            "model_type": ModelType.STUB,
+            "commentary_passages": 2,
+            "commentary_retrieval": "embedding",
+            "embedding_backend": "stub",
+            "embedding_store_path": store_path
+        })
+
+    def test_prompt_uses_vector_store(self, resources, store_path):
+        """Der Prompt enthält die nächsten Passagen aus dem Vektorspeicher."""
+        oracle = self.oracle(resources, store_path)
+        manager = oracle.hexagram_manager
+        context = manager.create_reading_context(38, [1], 39)
+
+        prompt = manager.get_consultation_prompt(context, "Verdeckter Drache")
+
+        assert isinstance(manager.commentary_index, VectorStore)
+        assert "Kommentar:" in prompt
+        assert "KIEN / DAS SCHÖPFERISCHE, Linie 1" in prompt
+
+    async def test_async_consultation(self, resources, store_path):
+        """Auch asynchrone Befragungen erhalten Kommentarstellen."""
+        oracle = self.oracle(resources, store_path)
+
+        response = await oracle.aget_response("Wie gehe ich mit Hochmut um?")
+
+        assert response["answer"]
+
+    def test_stalled_embedder_falls_back_to_bm25(self, resources, store_path):
+        """Hängt das Embedding-Modell, begrenzt die Frist den Aufruf und BM25 springt ein."""
+        class StalledEmbedder(StubEmbedder):
+            def __init__(self):
+                super().__init__()
+                self.timeouts = []
+
+            def embed(self, texts, timeout=None):
+                self.timeouts.append(timeout)
+                time.sleep(timeout)
+                raise TimeoutError("keine Antwort")
+
+        manager = self.oracle(resources, store_path).hexagram_manager
+        embedder = manager.commentary_index.embedder = StalledEmbedder()
+        context = manager.create_reading_context(38, [1], 39)
+
+        started = time.monotonic()
+        try:
+            prompt = manager.get_consultation_prompt(context, "Verdeckter Drache", Deadline(0.2))
+        finally:
+            reset_circuit_breakers()
+
+        assert time.monotonic() - started < 1.0
+        assert embedder.timeouts and all(t <= 0.2 for t in embedder.timeouts)
+        assert "Kommentar:" in prompt
+
+    def test_embedding_errors_are_model_errors(self, store_path):
+        """Fehler des Embedding-Modells erscheinen als ``ModelError``."""
+        class BrokenEmbedder(StubEmbedder):
+            def embed(self, texts, timeout=None):
+                raise KeyError("embeddings")
+
+        store = VectorStore(store_path, BrokenEmbedder())
+
+        with pytest.raises(ModelResponseError):
+            store.search("Was ist jetzt zu tun?")
@@ -0,0 +1,181 @@
+# tests/test_core/test_generator.py
+
+"""
+Tests für die Erzeugung von Hypergrammen (Einzel- und Batch-Modus).
+"""
+
+import numpy as np
+import pytest
+
+from yijing.core.casting import (
+    AliasSampler,
+    get_casting_method,
+    register_casting_method
+)
+from yijing.core.generator import (
+    cast_compact_hypergram,
+    cast_hypergram,
+    cast_hypergrams
+)
+from yijing.core.rng import set_root_seed, spawn_rngs, thread_rng
+from yijing.enums import CastingMethod
+
+
+class TestBatchCasting:
+    """
+    Tests für die vektorisierte Batch-Erzeugung.
+    """
+
+    def test_shapes_and_dtypes(self):
+        """Die Arrays haben die erwartete Form und den Typ uint8."""
+        batch = cast_hypergrams(1000, rng=1)
+
+        assert len(batch) == 1000
+        assert batch.lines.shape == (1000, 6)
+        assert batch.lines.dtype == np.uint8
+        assert set(np.unique(batch.lines)) <= {6, 7, 8, 9}
+        assert batch.old_numbers.min() >= 1 and batch.old_numbers.max() <= 64
+        assert batch.new_numbers.min() >= 1 and batch.new_numbers.max() <= 64
+
+    def test_batch_matches_pydantic_models(self):
+        """Die Array-Ergebnisse stimmen mit den Pydantic-Modellen überein."""
+        batch = cast_hypergrams(200, rng=7)
+
+        for index, data in enumerate(batch.iter_hypergram_data()):
+            assert batch.old_numbers[index] == data.old_hexagram.to_binary_number() + 1
+            assert batch.new_numbers[index] == data.new_hexagram.to_binary_number() + 1
+            assert batch.changing_lines(index) == data.changing_lines
+
+    def test_mask_relation(self):
+        """Das resultierende Hexagramm entsteht durch XOR mit der Wandlungsmaske."""
+        batch = cast_hypergrams(500, rng=3)
+
+        expected = (batch.old_numbers - 1) ^ batch.changing_masks
+        assert np.array_equal(batch.new_numbers - 1, expected)
+
+    def test_seed_is_reproducible(self):
+        """Gleicher Seed liefert identische Würfe."""
+        assert np.array_equal(
+            cast_hypergrams(100, rng=99).lines,
+            cast_hypergrams(100, rng=99).lines
+        )
+
+    def test_negative_count_raises(self):
+        """Eine negative Anzahl wird abgelehnt."""
+        with pytest.raises(ValueError):
+            cast_hypergrams(-1)
+
+    def test_single_cast_still_works(self):
+        """Der Einzelwurf liefert weiterhin vollständige Daten."""
+        data = cast_hypergram()
+        assert len(data.hypergram.lines) == 6
+
+
+class TestCastingMethods:
+    """
+    Tests für die Registry der Wurfmethoden und die Alias-Tabellen.
+    """
+
+    @pytest.mark.parametrize("method, expected", [
+        ("uniform", (0.25, 0.25, 0.25, 0.25)),
+        ("three_coin", (1 / 8, 3 / 8, 3 / 8, 1 / 8)),
+        ("yarrow", (1 / 16, 5 / 16, 7 / 16, 3 / 16)),
+    ])
+    def test_batch_frequencies(self, method, expected):
+        """Die Häufigkeiten im Batch entsprechen den Wahrscheinlichkeiten."""
+        batch = cast_hypergrams(50_000, rng=11, method=method)
+        counts = np.bincount(batch.lines.ravel(), minlength=10)[6:10]
+        frequencies = counts / counts.sum()
+
+        assert np.allclose(frequencies, expected, atol=0.01)
+
+    def test_single_cast_frequencies(self):
+        """Der Einzelwurf nutzt dieselbe Verteilung wie der Batch."""
+        rng = np.random.default_rng(5)
+        values = [
+            value
+            for _ in range(7_000)
+            for value in cast_compact_hypergram(CastingMethod.YARROW, rng).line_values()
+        ]
+
+        assert values.count(8) / len(values) == pytest.approx(7 / 16, abs=0.01)
+
+    def test_custom_method(self):
+        """Benutzerdefinierte Gewichte werden registriert und genutzt."""
+        register_casting_method("only_changing", {6: 1, 9: 1})
+
+        batch = cast_hypergrams(1000, rng=2, method="only_changing")
+        assert set(np.unique(batch.lines)) <= {6, 9}
+        assert (batch.changing_masks == 63).all()
+
+        data = cast_hypergram(method="only_changing")
+        assert data.changing_lines == [0, 1, 2, 3, 4, 5]
+
+    def test_invalid_weights(self):
+        """Ungültige Gewichte werden abgelehnt."""
+        with pytest.raises(ValueError):
+            AliasSampler({5: 1})
+        with pytest.raises(ValueError):
+            AliasSampler({6: -1, 7: 2})
+        with pytest.raises(ValueError):
+            AliasSampler({6: 0})
+
+    def test_unknown_method(self):
+        """Unbekannte Methoden führen zu einem ValueError."""
+        with pytest.raises(ValueError):
+            get_casting_method("does_not_exist")
+
+
+class TestRandomStreams:
+    """
+    Tests für reproduzierbare und unabhängige Zufallsströme.
+    """
+
+    def test_seed_replays_reading(self):
+        """Ein gespeicherter Seed reproduziert den Wurf exakt."""
+        data = cast_hypergram(method="yarrow", rng=123456789)
+
+        assert data.seed == 123456789
+        replay = cast_hypergram(method="yarrow", rng=data.seed)
+        assert replay.hypergram == data.hypergram
+
+    def test_numpy_integer_seed_is_recorded(self):
+        """Auch ein NumPy-Integer als Seed wird als ``int`` festgehalten."""
+        data = cast_hypergram(rng=np.int64(42))
+
+        assert data.seed == 42 and type(data.seed) is int
+        assert data == cast_hypergram(rng=42)
+
+    def test_spawned_streams_are_independent(self):
+        """Gespawnte Ströme sind reproduzierbar, aber voneinander verschieden."""
+        first, second = spawn_rngs(2, seed=42)
+        again, _ = spawn_rngs(2, seed=42)
+
+        lines = cast_hypergrams(100, rng=first).lines
+        assert not np.array_equal(lines, cast_hypergrams(100, rng=second).lines)
+        assert np.array_equal(lines, cast_hypergrams(100, rng=again).lines)
+
+    def test_threads_use_own_streams(self):
+        """Jeder Thread erhält einen eigenen Generator."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        main = thread_rng()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            generators = list(pool.map(lambda _: thread_rng(), range(4)))
+
+        assert all(generator is not main for generator in generators)
+
+    def test_compact_cast_matches_pydantic_cast(self):
+        """Kompakter und Pydantic-Wurf ziehen bei gleichem Seed dieselben Linien."""
+        compact = cast_compact_hypergram(method="three_coin", rng=31)
+        data = cast_hypergram(method="three_coin", rng=31)
+
+        assert compact.to_model() == data.hypergram
+
+    def test_root_seed_makes_thread_stream_reproducible(self):
+        """Mit festem Root-Seed ist der Thread-Stream reproduzierbar."""
+        set_root_seed(7)
+        first = cast_hypergrams(20).lines
+        set_root_seed(7)
+        assert np.array_equal(first, cast_hypergrams(20).lines)
+        set_root_seed()
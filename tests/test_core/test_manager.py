@@ -0,0 +1,404 @@
+# tests/test_core/test_manager.py
+
+"""
+Tests für den HexagramManager und den gemeinsamen Korpus-Cache.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from yijing.core import artifact as artifact_module
+from yijing.core import corpus as corpus_module
+from yijing.core.artifact import HexagramArtifact, compile_corpus, ensure_artifact
+from yijing.core.corpus import HexagramCorpus
+from yijing.core.manager import HexagramManager
+
+PACKAGE_RESOURCES = Path(__file__).parent.parent.parent / 'yijing' / 'resources'
+
+
+def _write_hexagram(directory: Path, number: int, name: str) -> Path:
+    """Schreibt eine minimale Hexagramm-Datei."""
+    data = {
+        "hexagram": {"name": name},
+        "judgment": {"description": f"Urteil {name}"},
+        "image": {"description": f"Bild {name}"},
+        "lines": [
+            {"position": str(i), "text": f"Text {i}", "interpretation": f"Deutung {i}"}
+            for i in range(1, 7)
+        ]
+    }
+    path = directory / f"hexagram_{number:02d}.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def resources(tmp_path):
+    """Temporäres Ressourcenverzeichnis mit zwei Hexagrammen."""
+    hexagram_dir = tmp_path / "hexagram_json"
+    hexagram_dir.mkdir()
+    _write_hexagram(hexagram_dir, 1, "EINS")
+    _write_hexagram(hexagram_dir, 2, "ZWEI")
+    return tmp_path
+
+
+class TestCorpusCache:
+    """
+    Tests für das Caching der Hexagramm-Daten.
+    """
+
+    def test_second_access_is_a_hit(self, resources):
+        """Jede Datei wird nur einmal gelesen."""
+        manager = HexagramManager(resources)
+
+        first = manager.get_hexagram_data(1)
+        second = manager.get_hexagram_data(1)
+
+        assert first is second
+        assert manager.cache_stats.misses == 1
+        assert manager.cache_stats.hits == 1
+
+    def test_managers_share_corpus(self, resources):
+        """Manager desselben Verzeichnisses teilen sich den Cache."""
+        first = HexagramManager(resources)
+        second = HexagramManager(resources)
+
+        assert first.corpus is second.corpus
+        assert first.get_hexagram_data(2) is second.get_hexagram_data(2)
+
+    def test_changed_file_is_reloaded(self, resources):
+        """Eine geänderte Datei wird anhand der mtime erkannt."""
+        corpus = HexagramCorpus(resources / "hexagram_json", check_interval=0)
+        assert corpus.get(1)["hexagram"]["name"] == "EINS"
+
+        path = _write_hexagram(resources / "hexagram_json", 1, "NEU")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert corpus.get(1)["hexagram"]["name"] == "NEU"
+        assert corpus.stats.invalidations == 1
+
+    def test_concurrent_misses_load_once(self, resources, monkeypatch):
+        """Gleichzeitige Fehlzugriffe aus mehreren Threads lesen die Datei nur einmal."""
+        corpus = HexagramCorpus(resources / "hexagram_json", use_artifact=False)
+        load = corpus_module.load_hexagram_data
+        loads = []
+
+        def slow_load(number, directory):
+            loads.append(number)
+            time.sleep(0.02)
+            return load(number, directory)
+
+        monkeypatch.setattr(corpus_module, "load_hexagram_data", slow_load)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: corpus.get(1), range(8)))
+
+        assert loads == [1]
+        assert all(result is results[0] for result in results)
+        assert corpus.stats.misses == 1 and corpus.stats.hits == 7
+
+    def test_cold_loads_run_in_parallel(self, resources, monkeypatch):
+        """Verschiedene Hexagramme werden gleichzeitig gelesen, nicht nacheinander."""
+        corpus = HexagramCorpus(resources / "hexagram_json", use_artifact=False)
+        load = corpus_module.load_hexagram_data
+        both_reading = threading.Barrier(2, timeout=2)
+
+        def waiting_load(number, directory):
+            both_reading.wait()
+            return load(number, directory)
+
+        monkeypatch.setattr(corpus_module, "load_hexagram_data", waiting_load)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            names = [data["hexagram"]["name"] for data in executor.map(corpus.get, (1, 2))]
+
+        assert names == ["EINS", "ZWEI"]
+        assert corpus.stats.misses == 2
+
+    def test_missing_file(self, resources):
+        """Fehlende Dateien führen weiterhin zu FileNotFoundError."""
+        manager = HexagramManager(resources)
+        with pytest.raises(FileNotFoundError):
+            manager.get_hexagram_data(3)
+
+    def test_invalid_number(self, resources):
+        """Ungültige Nummern werden abgelehnt."""
+        with pytest.raises(ValueError):
+            HexagramManager(resources).get_hexagram_data(65)
+
+    def test_preload_package_corpus(self):
+        """Der Paketkorpus lässt sich vollständig vorab laden."""
+        manager = HexagramManager(PACKAGE_RESOURCES, preload=True)
+
+        assert len(manager.corpus) == 64
+        context = manager.create_reading_context(1, [0], 2)
+        assert context.original_hexagram == manager.get_hexagram_data(1)
+
+
+class TestCorpusArtifact:
+    """
+    Tests für das kompilierte, per mmap gelesene Korpus-Artefakt.
+    """
+
+    def test_artifact_matches_json(self, tmp_path):
+        """Das Artefakt liefert dieselben Daten wie die JSON-Dateien."""
+        source = PACKAGE_RESOURCES / "hexagram_json"
+        path = compile_corpus(source, tmp_path / "corpus.yjc")
+
+        with HexagramArtifact(path) as artifact:
+            assert artifact.is_current(source)
+            for number in (1, 32, 64):
+                expected = json.loads(
+                    (source / f"hexagram_{number:02d}.json").read_text(encoding="utf-8")
+                )
+                assert artifact.load(number) == expected
+                assert artifact.section(number, "lines.5") == expected["lines"][5]
+
+    def test_corpus_reads_from_artifact(self, tmp_path):
+        """Der Korpus nutzt das Artefakt und dekodiert einzelne Abschnitte."""
+        source = PACKAGE_RESOURCES / "hexagram_json"
+        path = compile_corpus(source, tmp_path / "corpus.yjc")
+        corpus = HexagramCorpus(source, artifact_path=path)
+
+        assert corpus.artifact is not None
+        judgment = corpus.get_section(7, "judgment")
+        assert corpus.get_section(7, "judgment") is judgment
+        assert corpus.get(7)["judgment"] == judgment
+
+    def test_ensure_artifact_skips_current(self, tmp_path):
+        """Ein aktuelles Artefakt wird nicht neu gebaut."""
+        source = PACKAGE_RESOURCES / "hexagram_json"
+        path = ensure_artifact(source, tmp_path / "corpus.yjc")
+        mtime = path.stat().st_mtime_ns
+
+        assert ensure_artifact(source, path) == path
+        assert path.stat().st_mtime_ns == mtime
+
+    def test_unchanged_sources_are_not_hashed(self, tmp_path, monkeypatch):
+        """Die JSON-Dateien werden nur gehasht, wenn sich mtime oder Größe ändern."""
+        source = tmp_path / "hexagram_json"
+        shutil.copytree(PACKAGE_RESOURCES / "hexagram_json", source)
+        path = compile_corpus(source, tmp_path / "corpus.yjc")
+        digest = artifact_module.source_digest
+        hashed = []
+        monkeypatch.setattr(
+            artifact_module, "source_digest",
+            lambda directory: hashed.append(directory) or digest(directory)
+        )
+
+        assert HexagramCorpus(source, artifact_path=path).artifact is not None
+        assert hashed == []
+
+        touched = source / "hexagram_05.json"
+        stat = touched.stat()
+        os.utime(touched, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert HexagramCorpus(source, artifact_path=path).artifact is not None
+        assert len(hashed) == 1
+
+        # Rebuilding records the new modification time
+        ensure_artifact(source, path)
+        hashed.clear()
+        assert HexagramCorpus(source, artifact_path=path).artifact is not None
+        assert hashed == []
+
+    def test_outdated_artifact_falls_back_to_json(self, tmp_path):
+        """Ein Artefakt, das älter als die JSON-Dateien ist, wird ignoriert."""
+        source = tmp_path / "hexagram_json"
+        shutil.copytree(PACKAGE_RESOURCES / "hexagram_json", source)
+        path = compile_corpus(source, tmp_path / "corpus.yjc")
+        _write_hexagram(source, 5, "NEU")
+
+        corpus = HexagramCorpus(source, artifact_path=path)
+
+        assert corpus.artifact is None
+        assert corpus.get(5)["hexagram"]["name"] == "NEU"
+
+    def test_edited_json_is_noticed_in_artifact_mode(self, tmp_path):
+        """Auch im Artefakt-Modus werden geänderte JSON-Dateien erkannt."""
+        source = tmp_path / "hexagram_json"
+        shutil.copytree(PACKAGE_RESOURCES / "hexagram_json", source)
+        path = compile_corpus(source, tmp_path / "corpus.yjc")
+        corpus = HexagramCorpus(source, check_interval=0, artifact_path=path)
+        corpus.get(5)
+        corpus.get_section(5, "judgment")
+
+        edited = _write_hexagram(source, 5, "NEU")
+        stat = edited.stat()
+        os.utime(edited, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert corpus.get_section(5, "judgment") == {"description": "Urteil NEU"}
+        assert corpus.artifact is None
+        assert corpus.get(5)["hexagram"]["name"] == "NEU"
+
+        compile_corpus(source, path)
+        assert corpus.get_section(5, "image") == {"description": "Bild NEU"}
+        assert corpus.artifact is not None
+
+    async def test_async_artifact_check_runs_in_thread(self, tmp_path):
+        """Die Prüfung des Artefakts blockiert die Event-Loop nicht."""
+        source = tmp_path / "hexagram_json"
+        shutil.copytree(PACKAGE_RESOURCES / "hexagram_json", source)
+        path = compile_corpus(source, tmp_path / "corpus.yjc")
+        corpus = HexagramCorpus(source, check_interval=0, artifact_path=path)
+        stat_sources = corpus._stat_artifact_sources
+        threads = []
+
+        def recording():
+            threads.append(threading.current_thread())
+            return stat_sources()
+
+        corpus._stat_artifact_sources = recording
+        await corpus.aget(1)
+        await corpus.aget_section(2, "image")
+
+        assert threads and threading.main_thread() not in threads
+
+    def test_invalid_artifact_falls_back_to_json(self, resources):
+        """Ein ungültiges Artefakt wird ignoriert."""
+        (resources / "hexagram_json.yjc").write_bytes(b"kein artefakt" * 10)
+        corpus = HexagramCorpus(resources / "hexagram_json")
+
+        assert corpus.artifact is None
+        assert corpus.get(1)["hexagram"]["name"] == "EINS"
+
+
+class TestLazyHexagram:
+    """
+    Tests für die verzögert geladenen Hexagramm-Ansichten.
+    """
+
+    def test_view_matches_full_data(self, tmp_path):
+        """Die Ansicht liefert dieselben Daten wie das vollständige Dictionary."""
+        source = PACKAGE_RESOURCES / "hexagram_json"
+        path = compile_corpus(source, tmp_path / "corpus.yjc")
+        manager = HexagramManager(
+            PACKAGE_RESOURCES, corpus=HexagramCorpus(source, artifact_path=path)
+        )
+
+        view = manager.get_hexagram_view(12)
+        assert view.materialize() == json.loads(
+            (source / "hexagram_12.json").read_text(encoding="utf-8")
+        )
+        assert view == manager.get_hexagram_data(12)
+
+    def test_only_touched_sections_are_loaded(self, tmp_path):
+        """Nur tatsächlich gelesene Abschnitte werden geladen."""
+        source = PACKAGE_RESOURCES / "hexagram_json"
+        path = compile_corpus(source, tmp_path / "corpus.yjc")
+        manager = HexagramManager(
+            PACKAGE_RESOURCES, corpus=HexagramCorpus(source, artifact_path=path)
+        )
+
+        context = manager.create_reading_context(3, [2], 4)
+        assert context.original_hexagram['hexagram']['name']
+        interpretations = context.get_relevant_line_interpretations()
+
+        assert len(interpretations) == 1
+        assert context.original_hexagram.loaded_sections() == ['hexagram', 'lines']
+        assert context.resulting_hexagram.loaded_sections() == []
+        assert len(manager.corpus._sections) == 2
+
+    async def test_async_context_stays_lazy(self, tmp_path):
+        """Auch der asynchrone Kontext dekodiert nur die gelesenen Abschnitte."""
+        source = PACKAGE_RESOURCES / "hexagram_json"
+        path = compile_corpus(source, tmp_path / "corpus.yjc")
+        manager = HexagramManager(
+            PACKAGE_RESOURCES, corpus=HexagramCorpus(source, artifact_path=path)
+        )
+
+        context = await manager.acreate_reading_context(3, [2], 4)
+        assert context.original_hexagram['hexagram']['name']
+
+        assert len(manager.corpus) == 0
+        assert context.resulting_hexagram.loaded_sections() == []
+        assert len(manager.corpus._sections) == 1
+
+    def test_lines_sequence(self, resources):
+        """Die Linien verhalten sich wie eine Liste."""
+        view = HexagramManager(resources).get_hexagram_view(1)
+
+        assert len(view['lines']) == 6
+        assert view['lines'][-1]['text'] == "Text 6"
+        assert [line['position'] for line in view['lines'][:2]] == ['1', '2']
+        with pytest.raises(KeyError):
+            view['unknown']
+
+    def test_eager_contexts(self, resources):
+        """Ohne lazy enthält der Kontext die vollständigen Dictionaries."""
+        manager = HexagramManager(resources, lazy=False)
+        context = manager.create_reading_context(1, [], 2)
+
+        assert context.original_hexagram is manager.get_hexagram_data(1)
+
+
+class TestAsyncLoading:
+    """
+    Tests für den asynchronen Ladepfad.
+    """
+
+    async def test_async_shares_cache_with_sync(self, resources):
+        """Synchrone und asynchrone Zugriffe nutzen denselben Cache."""
+        manager = HexagramManager(resources)
+
+        first = await manager.aget_hexagram_data(1)
+        second = manager.get_hexagram_data(1)
+
+        assert first is second
+        assert first["hexagram"]["name"] == "EINS"
+        assert manager.cache_stats.misses == 1
+        assert manager.cache_stats.hits == 1
+
+    async def test_async_reload_on_change(self, resources):
+        """Auch asynchron werden geänderte Dateien erkannt."""
+        corpus = HexagramCorpus(resources / "hexagram_json", check_interval=0)
+        assert (await corpus.aget(1))["hexagram"]["name"] == "EINS"
+
+        path = _write_hexagram(resources / "hexagram_json", 1, "NEU")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert (await corpus.aget(1))["hexagram"]["name"] == "NEU"
+        assert corpus.stats.invalidations == 1
+
+    async def test_concurrent_async_misses_share_data(self, resources, monkeypatch):
+        """Gleichzeitige asynchrone Fehlzugriffe lesen die Datei nur einmal."""
+        corpus = HexagramCorpus(resources / "hexagram_json", use_artifact=False)
+        load = corpus_module.aload_hexagram_data
+        loads = []
+
+        async def counting_load(number, directory):
+            loads.append(number)
+            return await load(number, directory)
+
+        monkeypatch.setattr(corpus_module, "aload_hexagram_data", counting_load)
+        results = await asyncio.gather(*(corpus.aget(1) for _ in range(4)))
+
+        assert loads == [1]
+        assert all(result is results[0] for result in results)
+        assert corpus.get(1) is results[0]
+        assert corpus.stats.misses == 1
+
+    async def test_async_errors(self, resources):
+        """Fehlende Dateien und ungültige Nummern verhalten sich wie synchron."""
+        manager = HexagramManager(resources)
+        with pytest.raises(FileNotFoundError):
+            await manager.aget_hexagram_data(3)
+        with pytest.raises(ValueError):
+            await manager.aget_hexagram_data(0)
+
+    async def test_async_reading_context(self, resources):
+        """Der asynchrone Kontext entspricht dem synchronen."""
+        manager = HexagramManager(resources)
+
+        context = await manager.acreate_reading_context(1, [0], 2)
+
+        assert context.original_hexagram == manager.create_reading_context(1, [0], 2).original_hexagram
+        assert context.resulting_hexagram["hexagram"]["name"] == "ZWEI"
+        assert manager.cache_stats.misses == 2
@@ -0,0 +1,962 @@
+# tests/test_core/test_oracle.py
+
+"""
+Tests für die synchrone und asynchrone API des YijingOracle.
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import numpy as np
+import pytest
+
+from yijing.config import ModelType, Settings
+from yijing.core.batch import BatchResult, arun_batch, run_batch
+from yijing.core.backends import (
+    ModelBackend,
+    OllamaBackend,
+    StubBackend,
+    create_backend,
+    register_backend
+)
+from yijing.core.oracle import YijingOracle, ask_oracle, clear_oracles, get_oracle
+from yijing.core.resilience import CircuitBreaker, RetryPolicy, reset_circuit_breakers
+from yijing.core.response_cache import ResponseCache
+from yijing.exceptions import (
+    CircuitOpenError,
+    ConfigurationError,
+    ModelConnectionError,
+    ModelResponseError,
+    ModelTimeoutError
+)
+from yijing.utils.cache import LRUCache, SQLiteCache
+from yijing.utils.singleflight import AsyncSingleFlight, SingleFlight
+from yijing.enums import ConsultationMode, StreamEventType
+
+STREAM_TOKENS = ["Der ", "Weise ", "", "wartet."]
+
+
+class FakeAsyncClient:
+    """Ersetzt ``ollama.AsyncClient`` und zeichnet die Anfragen auf."""
+
+    def __init__(self, *args, **kwargs):
+        self.calls = []
+        self.cancelled = False
+        self.block = False
+        self.stall = False
+        self.open_streams = 0
+        self.closed = False
+
+    async def chat(self, model, messages, stream=False, **kwargs):
+        self.calls.append(messages)
+        if stream:
+            return self._stream()
+        if self.block:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+        return {"message": {"content": f"Antwort auf: {messages[-1]['content'][:20]}"}}
+
+    async def _stream(self):
+        self.open_streams += 1
+        try:
+            for token in STREAM_TOKENS:
+                yield {"message": {"content": token}}
+                if self.stall:
+                    await asyncio.Event().wait()
+        finally:
+            self.open_streams -= 1
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """Ersetzt ``ollama.Client`` und zeichnet Optionen und Anfragen auf."""
+
+    def __init__(self, **options):
+        self.options = options
+        self.requests = []
+
+    def chat(self, model, messages, stream=False, **kwargs):
+        self.requests.append(("chat", kwargs))
+        if stream:
+            return ({"message": {"content": token}} for token in STREAM_TOKENS)
+        return {"message": {"content": "synchron"}}
+
+    def generate(self, model, prompt, **kwargs):
+        self.requests.append(("generate", kwargs))
+        return {"response": ""}
+
+
+class StalledServer:
+    """HTTP-Server, der nach der Anfrage (und optional einem ersten Token) nicht mehr antwortet."""
+
+    def __init__(self):
+        self.first_token = False
+        self.stopped = threading.Event()
+        self.socket = socket.create_server(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self.socket.getsockname()[1]}"
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while not self.stopped.is_set():
+            try:
+                connection, _ = self.socket.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+    def _serve(self, connection):
+        with connection:
+            connection.recv(65536)
+            if self.first_token:
+                line = json.dumps({"model": "m", "message": {"role": "assistant", "content": "Der "}, "done": False})
+                body = (line + "\n").encode("utf-8")
+                connection.sendall(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                    b"Transfer-Encoding: chunked\r\n\r\n"
+                    + f"{len(body):x}\r\n".encode() + body + b"\r\n"
+                )
+            self.stopped.wait()
+
+    def close(self):
+        self.stopped.set()
+        self.socket.close()
+
+
+@pytest.fixture
+def stalled_server():
+    server = StalledServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_circuit_breakers():
+    """Jeder Test beginnt mit geschlossenen Circuit Breakern."""
+    reset_circuit_breakers()
+    yield
+    reset_circuit_breakers()
+
+
+@pytest.fixture
+def ollama_oracle(monkeypatch):
+    """Orakel mit Ollama-Modell und gefälschten Clients."""
+    client = FakeAsyncClient()
+    monkeypatch.setattr("yijing.core.backends.ollama.AsyncClient", lambda *a, **k: client)
+    monkeypatch.setattr("yijing.core.backends.ollama.Client", FakeClient)
+    oracle = YijingOracle(custom_settings={"model_type": ModelType.OLLAMA})
+    oracle.fake_client = client
+    return oracle
+
+
+class TestAsyncOracle:
+    """
+    Tests für ``aget_response``.
+    """
+
+    async def test_aget_response(self, ollama_oracle):
+        """Die asynchrone Antwort hat dieselbe Struktur wie die synchrone."""
+        response = await ollama_oracle.aget_response("Wohin?", seed=42)
+        expected = ollama_oracle.get_response("Wohin?", seed=42)
+
+        assert response["answer"].startswith("Antwort auf")
+        assert response["hypergram_data"] == expected["hypergram_data"]
+        assert response["hexagram_context"] == expected["hexagram_context"]
+        assert ollama_oracle.fake_client.calls[0][0]["role"] == "system"
+
+    async def test_seed_and_rng_are_exclusive(self, ollama_oracle):
+        """``seed`` und ``rng`` schließen sich aus; NumPy-Seeds werden normalisiert."""
+        with pytest.raises(ValueError):
+            await ollama_oracle.aget_response("Wohin?", rng=1, seed=2)
+
+        response = await ollama_oracle.aget_response("Wohin?", seed=np.int64(42))
+        assert response["seed"] == 42 and type(response["seed"]) is int
+
+    async def test_concurrent_requests(self, ollama_oracle):
+        """Mehrere Weissagungen laufen gleichzeitig in einer Event-Loop."""
+        responses = await asyncio.gather(
+            *(ollama_oracle.aget_response(f"Frage {i}") for i in range(20))
+        )
+
+        assert len({r["seed"] for r in responses}) == 20
+        assert len(ollama_oracle.fake_client.calls) == 20
+
+    async def test_cancellation_reaches_backend(self, ollama_oracle):
+        """Ein abgebrochener Task bricht auch die Modellanfrage ab."""
+        ollama_oracle.fake_client.block = True
+        task = asyncio.create_task(ollama_oracle.aget_response("Frage"))
+        while not ollama_oracle.fake_client.calls:
+            await asyncio.sleep(0)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert ollama_oracle.fake_client.cancelled
+
+    async def test_timeout_and_empty_prompt(self):
+        """Timeouts werden übersetzt, leere Prompts abgelehnt."""
+        oracle = YijingOracle(custom_settings={"model_type": ModelType.STUB, "retry_attempts": 1})
+
+        async def timeout(messages, timeout=None):
+            raise asyncio.TimeoutError()
+
+        with pytest.raises(ValueError):
+            await oracle._acomplete(" ")
+        oracle.backend.acomplete = timeout
+        with pytest.raises(ModelConnectionError):
+            await oracle._acomplete("Frage")
+
+
+class TestOllamaClient:
+    """
+    Tests für den gepoolten Ollama-Client.
+    """
+
+    def test_client_is_configured_and_reused(self, monkeypatch):
+        """Host, Timeouts und Poolgröße kommen aus den Settings, alle Clients teilen einen Pool."""
+        clients = []
+
+        def create_client(**options):
+            clients.append(FakeClient(**options))
+            return clients[-1]
+
+        monkeypatch.setattr("yijing.core.backends.ollama.Client", create_client)
+        oracle = YijingOracle(custom_settings={
+            "model_type": ModelType.OLLAMA,
+            "ollama_host": "http://modell:11434",
+            "ollama_timeout": 30.0,
+            "ollama_pool_size": 4,
+            "ollama_keep_alive": "1h",
+            "request_timeout": 20.0
+        })
+        client = oracle.backend.client
+
+        oracle.get_response("Erste Frage")
+        oracle.get_response("Zweite Frage")
+
+        assert oracle.backend.client is client is clients[0]
+        assert client.options["host"] == "http://modell:11434"
+        assert client.options["timeout"].read == 30.0
+        assert oracle.backend._client_options["limits"].max_keepalive_connections == 4
+        assert all(c.options["transport"] is client.options["transport"] for c in clients)
+        assert all(c.options["timeout"].read <= 20.0 for c in clients[1:])
+        requests = [kwargs for c in clients for _, kwargs in c.requests]
+        assert [kwargs["keep_alive"] for kwargs in requests] == ["1h", "1h"]
+
+    def test_deadline_bounds_stalled_server(self, stalled_server):
+        """Ein hängender Server hält die Anfrage nicht über die Frist hinaus auf."""
+        backend = OllamaBackend(Settings(
+            model_type=ModelType.OLLAMA,
+            ollama_host=stalled_server.url,
+            ollama_timeout=30.0
+        ))
+        messages = [{"role": "user", "content": "Frage"}]
+
+        started = time.monotonic()
+        with pytest.raises((TimeoutError, httpx.TimeoutException)):
+            backend.complete(messages, timeout=0.3)
+        assert time.monotonic() - started < 2.0
+
+        stalled_server.first_token = True
+        stream = backend.stream(messages, timeout=0.3)
+        assert next(stream) == "Der "
+        with pytest.raises((TimeoutError, httpx.TimeoutException)):
+            next(stream)
+        assert time.monotonic() - started < 4.0
+
+    async def test_astream_closes_response(self, ollama_oracle):
+        """Abbruch durch den Aufrufer oder die Frist schließt die Antwort des Servers."""
+        backend, client = ollama_oracle.backend, ollama_oracle.fake_client
+        messages = [{"role": "user", "content": "Frage"}]
+
+        stream = backend.astream(messages)
+        assert await stream.__anext__() == STREAM_TOKENS[0]
+        await stream.aclose()
+        assert client.open_streams == 0
+
+        client.stall = True
+        with pytest.raises(asyncio.TimeoutError):
+            async for _ in backend.astream(messages, timeout=0.05):
+                pass
+        assert client.open_streams == 0
+
+    async def test_async_client_of_previous_loop_is_closed(self, monkeypatch):
+        """Der Client einer anderen Event-Loop wird auf dieser geschlossen."""
+        monkeypatch.setattr("yijing.core.backends.ollama.AsyncClient", FakeAsyncClient)
+        backend = OllamaBackend(Settings(model_type=ModelType.OLLAMA))
+        other_loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            async def get_client():
+                return backend._get_async_client()
+
+            previous = asyncio.run_coroutine_threadsafe(get_client(), other_loop).result()
+            assert backend._get_async_client() is not previous
+            await asyncio.sleep(0.05)
+            assert previous.closed
+        finally:
+            other_loop.call_soon_threadsafe(other_loop.stop)
+            thread.join()
+            other_loop.close()
+
+    def test_warm_up(self, monkeypatch):
+        """Das Modell wird beim Start geladen, Fehler sind nicht fatal."""
+        monkeypatch.setattr("yijing.core.backends.ollama.Client", FakeClient)
+        oracle = YijingOracle(custom_settings={
+            "model_type": ModelType.OLLAMA,
+            "ollama_warmup": True
+        })
+
+        assert [name for name, _ in oracle.backend.client.requests] == ["generate"]
+
+        def unreachable(**kwargs):
+            raise ConnectionError("kein Server")
+
+        oracle.backend.client.generate = unreachable
+        assert oracle.warm_up() is False
+        assert YijingOracle(custom_settings={"model_type": ModelType.STUB}).warm_up() is False
+
+
+class TestStreaming:
+    """
+    Tests für ``stream_response`` und ``astream_response``.
+    """
+
+    def test_stream_event_order(self, ollama_oracle):
+        """Erst die Lesung, dann die Tokens, zuletzt die Zusammenfassung."""
+        events = list(ollama_oracle.stream_response("Frage", seed=7))
+
+        assert [e["type"] for e in events] == (
+            [StreamEventType.READING] + [StreamEventType.TOKEN] * 3 + [StreamEventType.SUMMARY]
+        )
+        summary = events[-1]
+        assert summary["response"]["answer"] == "Der Weise wartet."
+        assert summary["response"]["seed"] == events[0]["seed"] == 7
+        assert summary["token_count"] == 3
+        assert 0 <= summary["time_to_first_token"] <= summary["elapsed"]
+
+    async def test_astream_matches_stream(self, ollama_oracle):
+        """Der asynchrone Stream liefert dieselben Ereignisse."""
+        events = [event async for event in ollama_oracle.astream_response("Frage", seed=7)]
+        expected = list(ollama_oracle.stream_response("Frage", seed=7))
+
+        assert [e["type"] for e in events] == [e["type"] for e in expected]
+        assert events[0]["hexagram_context"] == expected[0]["hexagram_context"]
+        assert events[-1]["response"]["answer"] == "Der Weise wartet."
+
+
+class TestBackends:
+    """
+    Tests für die Backend-Registry und das Stub-Backend.
+    """
+
+    def test_registry(self):
+        """Jeder Modelltyp hat ein Backend, die Stub-Instanz erfüllt das Protokoll."""
+        backend = create_backend(Settings(model_type=ModelType.STUB))
+
+        assert isinstance(backend, StubBackend)
+        assert isinstance(backend, ModelBackend)
+        with pytest.raises(ValueError):
+            create_backend(Settings(model_type=ModelType.STUB).model_copy(update={"model_type": "unbekannt"}))
+
+    def test_stub_is_deterministic(self):
+        """Gleiche Nachrichten ergeben dieselbe Antwort."""
+        backend = StubBackend(answer_tokens=8)
+        messages = [{"role": "user", "content": "Frage"}]
+
+        assert backend.complete(messages) == backend.complete(list(messages))
+        assert backend.complete(messages) != backend.complete([{"role": "user", "content": "Andere"}])
+        assert len(list(backend.stream(messages))) == 8
+
+    async def test_stub_latency_and_token_rate(self):
+        """Latenz und Token-Rate bestimmen die Dauer."""
+        backend = StubBackend(latency=0.02, token_rate=500, answer_tokens=5)
+        loop = asyncio.get_running_loop()
+
+        started = loop.time()
+        await backend.acomplete([{"role": "user", "content": "Frage"}])
+
+        assert loop.time() - started >= 0.02 + 5 / 500
+
+    def test_dialogue_history(self):
+        """Im Dialogmodus sieht das Backend den bisherigen Verlauf."""
+        oracle = YijingOracle(custom_settings={
+            "model_type": ModelType.STUB,
+            "consultation_mode": ConsultationMode.DIALOGUE
+        })
+        seen = []
+        complete = oracle.backend.complete
+        oracle.backend.complete = lambda messages, timeout=None: seen.append(len(messages)) or complete(messages)
+
+        oracle.get_response("Erste Frage")
+        oracle.get_response("Zweite Frage")
+        oracle.start_new_consultation()
+        oracle.get_response("Neue Frage")
+
+        assert seen == [2, 4, 2]
+
+    def test_settings_accept_string_values(self):
+        """Einstellungen als Zeichenketten werden wie im README in Enums umgewandelt."""
+        oracle = YijingOracle(custom_settings={
+            "model_type": "stub",
+            "consultation_mode": "dialogue"
+        })
+
+        assert oracle.settings.model_type is ModelType.STUB
+        assert oracle.settings.consultation_mode is ConsultationMode.DIALOGUE
+        assert oracle.get_response("Soll ich?")["answer"]
+        with pytest.raises(ConfigurationError):
+            YijingOracle(custom_settings={"model_type": "unbekannt"})
+
+    def test_custom_backend(self):
+        """Neue Backends lassen sich ohne Änderung des Orakels registrieren."""
+        class EchoBackend(StubBackend):
+            def complete(self, messages, timeout=None):
+                return messages[-1]["content"]
+
+        register_backend(ModelType.STUB, EchoBackend)
+        try:
+            oracle = YijingOracle(custom_settings={"model_type": ModelType.STUB})
+            response = oracle.get_response("Echo?")
+        finally:
+            register_backend(ModelType.STUB, StubBackend)
+
+        assert response["answer"].startswith("Frage: Echo?")
+
+
+class TestResponseCache:
+    """
+    Tests für den Antwort-Cache.
+    """
+
+    def test_repeated_reading_is_cached(self):
+        """Gleiche Frage und gleicher Wurf fragen das Modell nur einmal."""
+        oracle = YijingOracle(custom_settings={"model_type": ModelType.STUB})
+
+        first = oracle.get_response("Tageshexagramm", seed=3)
+        second = oracle.get_response("Tageshexagramm", seed=3)
+        other = oracle.get_response("Andere Frage", seed=3)
+
+        assert oracle.backend.calls == 2
+        assert (first["cached"], second["cached"], other["cached"]) == (False, True, False)
+        assert second["answer"] == first["answer"]
+        assert oracle.response_cache.metrics()["hits"] == 1
+
+    async def test_async_shares_cache(self):
+        """Der asynchrone Pfad nutzt denselben Cache."""
+        oracle = YijingOracle(custom_settings={"model_type": ModelType.STUB})
+
+        oracle.get_response("Frage", seed=5)
+        response = await oracle.aget_response("Frage", seed=5)
+
+        assert response["cached"]
+        assert oracle.backend.calls == 1
+
+    def test_prompt_digest_is_part_of_key(self):
+        """Ein geänderter System-Prompt ergibt einen anderen Schlüssel."""
+        parts = dict(
+            question="Frage", original_number=1, changing_lines=[0], resulting_number=2,
+            model_type=ModelType.STUB, model="m", mode=ConsultationMode.SINGLE
+        )
+        key = ResponseCache.make_key(prompt_digest="a", **parts)
+
+        assert key == ResponseCache.make_key(prompt_digest="a", **parts)
+        assert key != ResponseCache.make_key(prompt_digest="b", **parts)
+
+    def test_dialogue_and_disabled_cache(self):
+        """Im Dialogmodus und mit Größe 0 wird nicht gecacht."""
+        dialogue = YijingOracle(custom_settings={
+            "model_type": ModelType.STUB,
+            "consultation_mode": ConsultationMode.DIALOGUE
+        })
+        dialogue.get_response("Frage", seed=1)
+        dialogue.get_response("Frage", seed=1)
+        disabled = YijingOracle(custom_settings={
+            "model_type": ModelType.STUB,
+            "response_cache_size": 0
+        })
+
+        assert dialogue.backend.calls == 2
+        assert disabled.response_cache is None
+
+    def test_lru_eviction_and_ttl(self):
+        """Die Größe und die Lebensdauer begrenzen den Speicher-Cache."""
+        now = [0.0]
+        cache = LRUCache(maxsize=2, ttl=10, clock=lambda: now[0])
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "b" not in cache and cache.get("a") == 1
+        now[0] = 11
+        assert cache.get("c") is None
+        assert cache.stats.evictions == 2
+
+    def test_persistent_tier(self, tmp_path):
+        """Antworten überleben in SQLite einen Neustart."""
+        path = tmp_path / "antworten.sqlite"
+        cache = ResponseCache(path=path)
+        cache.set("schluessel", "Antwort")
+        cache.close()
+
+        restarted = ResponseCache(path=path)
+        assert restarted.get("schluessel") == "Antwort"
+        assert restarted.metrics()["persistent"]["hits"] == 1
+        assert restarted.get("schluessel") == "Antwort"
+        assert restarted.memory.stats.hits == 1
+
+    def test_concurrent_lookups_are_all_counted(self):
+        """Gleichzeitige Abfragen gehen in den Zählern nicht verloren."""
+        cache = ResponseCache(maxsize=4)
+        cache.set("bekannt", "Antwort")
+
+        def lookups(_):
+            for i in range(500):
+                cache.get("bekannt" if i % 2 else "unbekannt")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lookups, range(8)))
+
+        metrics = cache.metrics()
+        assert metrics["hits"] == metrics["misses"] == 2000
+        assert metrics["memory"]["size"] == 1
+
+    def test_persistent_eviction(self, tmp_path):
+        """Die Datenbank löscht die am längsten ungenutzten Einträge."""
+        now = [0.0]
+        cache = SQLiteCache(tmp_path / "cache.sqlite", maxsize=2, clock=lambda: now[0])
+        for i, key in enumerate("abc"):
+            now[0] = i
+            cache.set(key, key.upper())
+
+        assert len(cache) == 2
+        assert cache.get("a") is None
+        assert cache.get("c") == "C"
+
+
+class TestSingleFlight:
+    """
+    Tests für die Zusammenführung gleichzeitiger identischer Anfragen.
+    """
+
+    def test_threads_share_one_call(self):
+        """Gleichzeitige identische Anfragen aus Threads lösen einen Modellaufruf aus."""
+        oracle = YijingOracle(custom_settings={
+            "model_type": ModelType.STUB,
+            "stub_latency": 0.2,
+            "response_cache_size": 0
+        })
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            responses = list(pool.map(lambda _: oracle.get_response("Frage", seed=9), range(5)))
+
+        assert oracle.backend.calls == 1
+        assert len({r["answer"] for r in responses}) == 1
+        assert oracle.single_flight.stats.hits == 4
+
+    async def test_tasks_share_one_call(self):
+        """Gleichzeitige identische Anfragen in einer Event-Loop teilen sich einen Aufruf."""
+        oracle = YijingOracle(custom_settings={
+            "model_type": ModelType.STUB,
+            "stub_latency": 0.05,
+            "response_cache_size": 0
+        })
+
+        responses = await asyncio.gather(
+            *(oracle.aget_response("Frage", seed=9) for _ in range(5)),
+            oracle.aget_response("Andere Frage", seed=9)
+        )
+
+        assert oracle.backend.calls == 2
+        assert len({r["answer"] for r in responses[:5]}) == 1
+
+    def test_errors_reach_all_callers(self):
+        """Fehler des gemeinsamen Aufrufs erreichen jeden Wartenden."""
+        group = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def failing():
+            started.set()
+            release.wait()
+            raise RuntimeError("Modell weg")
+
+        def call():
+            with pytest.raises(RuntimeError):
+                group.do("k", failing)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=call)
+        follower.start()
+        while group.stats.hits == 0:
+            time.sleep(0.001)
+        release.set()
+        leader.join()
+        follower.join()
+
+        assert group.in_flight() == 0
+
+    async def test_cancel_only_when_no_waiter_left(self):
+        """Der gemeinsame Aufruf wird erst abgebrochen, wenn niemand mehr wartet."""
+        group = AsyncSingleFlight()
+        cancelled = []
+
+        async def slow():
+            try:
+                await asyncio.sleep(0.05)
+                return "fertig"
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        first = asyncio.create_task(group.do("k", slow))
+        second = asyncio.create_task(group.do("k", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == ("fertig", True)
+        assert not cancelled
+
+        third = asyncio.create_task(group.do("k", slow))
+        await asyncio.sleep(0.01)
+        third.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await third
+        await asyncio.sleep(0)
+        assert cancelled and group.in_flight() == 0
+
+
+class FlakyBackend(StubBackend):
+    """Schlägt bei den ersten ``failures`` Aufrufen mit ``error`` fehl."""
+
+    def __init__(self, failures, error=ConnectionError("Verbindung verloren"), **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.error = error
+        self.attempts = 0
+
+    def complete(self, messages, timeout=None):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise self.error
+        return super().complete(messages, timeout)
+
+    async def acomplete(self, messages, timeout=None):
+        return self.complete(messages, timeout)
+
+
+def stub_oracle(backend=None, **settings):
+    oracle = YijingOracle(custom_settings={
+        "model_type": ModelType.STUB,
+        "response_cache_size": 0,
+        "retry_base_delay": 0.0,
+        **settings
+    })
+    if backend is not None:
+        oracle.backend = backend
+    return oracle
+
+
+class TestResilience:
+    """
+    Tests für Fristen, Wiederholungen und den Circuit Breaker.
+    """
+
+    def test_transient_errors_are_retried(self):
+        """Vorübergehende Fehler werden wiederholt, andere nicht."""
+        backend = FlakyBackend(failures=2)
+        response = stub_oracle(backend).get_response("Frage")
+
+        assert backend.attempts == 3
+        assert response["answer"]
+
+        broken = FlakyBackend(failures=5, error=ValueError("kaputt"))
+        with pytest.raises(ModelResponseError):
+            stub_oracle(broken).get_response("Frage")
+        assert broken.attempts == 1
+
+    async def test_async_retry(self):
+        """Der asynchrone Pfad wiederholt ebenso."""
+        backend = FlakyBackend(failures=1)
+        await stub_oracle(backend).aget_response("Frage")
+
+        assert backend.attempts == 2
+
+    def test_backoff_has_full_jitter(self):
+        """Die Wartezeit liegt zwischen 0 und der exponentiellen Obergrenze."""
+        policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+        delays = [policy.delay(retry) for retry in range(6) for _ in range(50)]
+
+        assert all(0 <= delay <= 4.0 for delay in delays)
+        assert all(policy.delay(0) <= 1.0 for _ in range(50))
+
+    def test_deadline_bounds_request(self):
+        """Eine zu langsame Antwort endet nach der Frist mit ModelTimeoutError."""
+        oracle = stub_oracle(StubBackend(latency=1.0))
+
+        started = time.monotonic()
+        with pytest.raises(ModelTimeoutError):
+            oracle.get_response("Frage", timeout=0.05)
+
+        assert time.monotonic() - started < 0.5
+
+    async def test_async_deadline_and_stream(self):
+        """Frist für asynchrone Anfragen und Streams."""
+        oracle = stub_oracle(StubBackend(latency=1.0), request_timeout=0.05)
+        loop = asyncio.get_running_loop()
+
+        started = loop.time()
+        with pytest.raises(ModelTimeoutError):
+            await oracle.aget_response("Frage")
+        with pytest.raises(ModelTimeoutError):
+            async for _ in oracle.astream_response("Frage"):
+                pass
+
+        assert loop.time() - started < 0.5
+        with pytest.raises(ModelTimeoutError):
+            list(stub_oracle(StubBackend(token_rate=100)).stream_response("Frage", timeout=0.05))
+
+    def test_circuit_opens_and_fails_fast(self):
+        """Nach wiederholten Fehlern wird das Backend nicht mehr angefragt."""
+        backend = FlakyBackend(failures=100)
+        oracle = stub_oracle(backend, retry_attempts=1, circuit_failure_threshold=2)
+
+        for _ in range(2):
+            with pytest.raises(ModelConnectionError):
+                oracle.get_response("Frage")
+        with pytest.raises(CircuitOpenError) as error:
+            oracle.get_response("Frage")
+
+        assert backend.attempts == 2
+        assert error.value.retry_after > 0
+        assert oracle.circuit_breaker.state == CircuitBreaker.OPEN
+
+    def test_half_open_probe(self):
+        """Nach der Sperrzeit entscheidet ein einzelner Probeaufruf."""
+        now = [0.0]
+        breaker = CircuitBreaker("stub:test", failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+        breaker.allow()
+        breaker.record_failure()
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+
+        now[0] = 10
+        breaker.allow()
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        now[0] = 20
+        breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.allow()
+
+
+class SlowQuestionBackend(StubBackend):
+    """Antwortet umso später, je mehr Punkte die Frage enthält, und misst die Parallelität."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def _question(self, messages):
+        return messages[-1]["content"].split("Frage: ")[-1].split("\n")[0]
+
+    def complete(self, messages, timeout=None):
+        question = self._question(messages)
+        if "Fehler" in question:
+            raise ValueError("kaputt")
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.01 + 0.02 * question.count("."))
+        with self.lock:
+            self.running -= 1
+        return question
+
+    async def acomplete(self, messages, timeout=None):
+        question = self._question(messages)
+        if "Fehler" in question:
+            raise ValueError("kaputt")
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01 + 0.02 * question.count("."))
+        self.running -= 1
+        return question
+
+
+class TestBatch:
+    """
+    Tests für ``get_responses`` und ``aget_responses``.
+    """
+
+    QUESTIONS = ["Langsam...", "Schnell", "Fehler", "Mittel.", "Auch schnell"]
+
+    def test_get_responses(self):
+        """Ergebnisse kommen in der Reihenfolge der Fertigstellung, Fehler je Frage."""
+        backend = SlowQuestionBackend()
+        oracle = stub_oracle(backend)
+
+        results = list(oracle.get_responses(self.QUESTIONS, concurrency=2))
+
+        assert sorted(r.index for r in results) == list(range(5))
+        assert results[-1].item == "Langsam..."
+        failed = [r for r in results if not r.ok]
+        assert [r.item for r in failed] == ["Fehler"]
+        assert isinstance(failed[0].error, ModelResponseError)
+        assert all(r.item in r.response["answer"] for r in results if r.ok)
+        assert backend.max_running == 2
+
+    async def test_aget_responses(self):
+        """Der asynchrone Stapel begrenzt die gleichzeitigen Modellaufrufe."""
+        backend = SlowQuestionBackend()
+        oracle = stub_oracle(backend)
+
+        results = [r async for r in oracle.aget_responses(iter(self.QUESTIONS), concurrency=3)]
+
+        assert [r.item for r in results][-1] == "Langsam..."
+        assert sum(not r.ok for r in results) == 1
+        assert backend.max_running == 3
+
+    async def test_closing_cancels_running_items(self):
+        """Ein vorzeitig beendeter Stapel bricht laufende Aufgaben ab."""
+        cancelled = []
+
+        async def work(item):
+            try:
+                await asyncio.sleep(item)
+                return {"item": item}
+            except asyncio.CancelledError:
+                cancelled.append(item)
+                raise
+
+        batch = arun_batch(work, [0, 1, 1, 1], concurrency=2)
+        first = await batch.__anext__()
+        await batch.aclose()
+
+        assert first == BatchResult(0, 0, {"item": 0})
+        assert cancelled == [1]
+
+    def test_invalid_concurrency_raises_immediately(self):
+        """Eine ungültige Parallelität fällt schon beim Aufruf auf."""
+        with pytest.raises(ValueError):
+            run_batch(lambda item: item, [1], concurrency=0)
+        with pytest.raises(ValueError):
+            arun_batch(asyncio.sleep, [1], concurrency=0)
+
+    async def test_cancelled_item_is_reported(self):
+        """Eine abgebrochene Aufgabe wird als Fehler gemeldet, ohne den Stapel zu beenden."""
+        async def work(item):
+            if item == "abbrechen":
+                asyncio.current_task().cancel()
+                await asyncio.sleep(0)
+            return {"item": item}
+
+        results = [r async for r in arun_batch(work, ["abbrechen", "weiter"], concurrency=2)]
+
+        errors = {r.item: r.error for r in results}
+        assert isinstance(errors["abbrechen"], asyncio.CancelledError)
+        assert errors["weiter"] is None
+
+
+class TestOracleFactory:
+    """
+    Tests für ``get_oracle`` und ``prepare``.
+    """
+
+    @pytest.fixture(autouse=True)
+    def fresh_oracles(self):
+        clear_oracles()
+        yield
+        clear_oracles()
+
+    def test_oracles_are_shared_by_effective_settings(self):
+        """Gleiche wirksame Settings ergeben dasselbe vorbereitete Orakel."""
+        oracle = get_oracle(custom_settings={"model_type": ModelType.STUB})
+        same = get_oracle(custom_settings={
+            "model_type": ModelType.STUB,
+            "consultation_mode": ConsultationMode.SINGLE
+        })
+        other = get_oracle(custom_settings={"model_type": ModelType.STUB, "active_model": "anders"})
+
+        assert same is oracle
+        assert get_oracle(custom_settings={"model_type": "stub"}) is oracle
+        assert other is not oracle
+        assert oracle._prepared
+        assert len(oracle.hexagram_manager.corpus) == 64
+
+    def test_concurrent_first_use(self):
+        """Gleichzeitige erste Aufrufe erzeugen nur ein Orakel."""
+        settings = {"model_type": ModelType.STUB, "active_model": "parallel"}
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            oracles = list(pool.map(lambda _: get_oracle(custom_settings=settings), range(8)))
+
+        assert len({id(oracle) for oracle in oracles}) == 1
+
+    def test_slow_preparation_does_not_block_other_settings(self, monkeypatch):
+        """Die Vorbereitung eines Orakels hält andere Konfigurationen nicht auf."""
+        entered, release = threading.Event(), threading.Event()
+        original = YijingOracle.prepare
+
+        def slow_prepare(self):
+            if self.settings.active_model == "langsam":
+                entered.set()
+                assert release.wait(5)
+            return original(self)
+
+        monkeypatch.setattr(YijingOracle, "prepare", slow_prepare)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            slow = pool.submit(
+                get_oracle, custom_settings={"model_type": ModelType.STUB, "active_model": "langsam"}
+            )
+            try:
+                assert entered.wait(5)
+                fast = get_oracle(custom_settings={"model_type": ModelType.STUB, "active_model": "schnell"})
+                assert fast._prepared
+                assert not slow.done()
+            finally:
+                release.set()
+            assert slow.result(timeout=5)._prepared
+
+    def test_ask_oracle_reuses_oracle(self, monkeypatch):
+        """``ask_oracle`` baut das Orakel nur beim ersten Aufruf."""
+        monkeypatch.setattr("yijing.core.backends.ollama.Client", FakeClient)
+        created = []
+        original = YijingOracle.__init__
+
+        def counting_init(self, *args, **kwargs):
+            created.append(self)
+            original(self, *args, **kwargs)
+
+        monkeypatch.setattr(YijingOracle, "__init__", counting_init)
+
+        first = ask_oracle("Erste Frage", api_key=None)
+        second = ask_oracle("Zweite Frage", api_key=None)
+
+        assert len(created) == 1
+        assert first["answer"] == second["answer"] == "Der Weise wartet."
+
+    def test_prepare_is_idempotent(self):
+        """Die Vorbereitung läuft nur einmal."""
+        oracle = YijingOracle(custom_settings={"model_type": ModelType.STUB})
+        prepared = []
+        oracle.backend.prepare = prepared.append
+
+        assert oracle.prepare() is oracle.prepare()
+        assert prepared == [oracle._get_system_prompt()]
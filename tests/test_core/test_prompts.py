@@ -0,0 +1,113 @@
+# tests/test_core/test_prompts.py
+
+"""
+Tests für die Prompt-Registry.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from yijing.config import Settings
+from yijing.config.prompts import PromptRegistry
+from yijing.enums import ConsultationMode
+from yijing.utils.resource_loader import load_system_prompt
+
+
+@pytest.fixture
+def prompts(tmp_path):
+    """Temporäres Prompt-Verzeichnis mit allen Vorlagen."""
+    prompts_dir = tmp_path / "prompts"
+    prompts_dir.mkdir()
+    for name in ("system_prompt", "consultation_template", "single_mode_prompt", "dialogue_mode_prompt"):
+        (prompts_dir / f"{name}.txt").write_text(name.upper(), encoding="utf-8")
+    return prompts_dir
+
+
+class TestPromptRegistry:
+    """
+    Tests für das Kompilieren und Cachen der System-Prompts.
+    """
+
+    def test_system_prompt_is_compiled_once(self, prompts):
+        """Die Vorlagen werden nur einmal gelesen."""
+        registry = PromptRegistry(prompts)
+
+        first = registry.system_prompt(ConsultationMode.SINGLE)
+        second = registry.system_prompt("single")
+
+        assert first is second
+        assert first.text == "SYSTEM_PROMPT\n\nSINGLE_MODE_PROMPT\n\nCONSULTATION_TEMPLATE"
+        assert registry.stats.misses == 1
+        assert registry.stats.hits == 1
+
+    def test_modes_are_cached_separately(self, prompts):
+        """Jeder Modus hat seinen eigenen Prompt und Hash."""
+        registry = PromptRegistry(prompts)
+
+        single = registry.system_prompt(ConsultationMode.SINGLE)
+        dialogue = registry.system_prompt(ConsultationMode.DIALOGUE)
+
+        assert single.digest != dialogue.digest
+        assert len(registry) == 2
+
+    def test_changed_template_is_recompiled(self, prompts):
+        """Geänderte Vorlagen werden erkannt, der Hash ist inhaltsbasiert."""
+        registry = PromptRegistry(prompts, check_interval=0)
+        original = registry.system_prompt(ConsultationMode.SINGLE)
+        assert PromptRegistry(prompts).system_prompt("single").digest == original.digest
+
+        path = prompts / "consultation_template.txt"
+        path.write_text("NEU", encoding="utf-8")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        changed = registry.system_prompt(ConsultationMode.SINGLE)
+        assert changed.text.endswith("NEU")
+        assert changed.digest != original.digest
+        assert registry.stats.invalidations == 1
+
+    def test_concurrent_recompile_after_change(self, prompts):
+        """Gleichzeitige Zugriffe nach einer Änderung verwerfen den Eintrag nur einmal."""
+        registry = PromptRegistry(prompts, check_interval=0)
+        registry.system_prompt(ConsultationMode.SINGLE)
+
+        path = prompts / "system_prompt.txt"
+        path.write_text("NEU", encoding="utf-8")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(
+                lambda _: registry.system_prompt(ConsultationMode.SINGLE), range(32)
+            ))
+
+        assert all(prompt.text.startswith("NEU") for prompt in results)
+        assert registry.stats.invalidations == 1
+
+    def test_missing_template(self, prompts):
+        """Fehlende Vorlagen führen zu FileNotFoundError."""
+        (prompts / "system_prompt.txt").unlink()
+        with pytest.raises(FileNotFoundError, match="system_prompt"):
+            PromptRegistry(prompts).system_prompt(ConsultationMode.SINGLE)
+
+    async def test_async_shares_cache(self, prompts):
+        """Der asynchrone Pfad nutzt denselben Cache."""
+        registry = PromptRegistry(prompts)
+
+        first = await registry.asystem_prompt(ConsultationMode.SINGLE)
+
+        assert registry.system_prompt(ConsultationMode.SINGLE) is first
+
+    def test_settings_and_loader_share_registry(self):
+        """Settings und resource_loader lesen aus derselben Registry."""
+        settings = Settings()
+        registry = settings.prompt_registry
+
+        settings.get_system_prompt()
+        load_system_prompt(ConsultationMode.SINGLE)
+        hits = registry.stats.hits
+        settings.load_prompt_template("single_mode_prompt")
+
+        assert registry.stats.hits == hits + 1
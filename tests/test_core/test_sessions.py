@@ -0,0 +1,272 @@
+# tests/test_core/test_sessions.py
+
+"""
+Tests für die Dialogsitzungen mehrerer Nutzer.
+"""
+
+import asyncio
+import threading
+
+from yijing.config import ModelType
+from yijing.core.history import compact_history, estimate_tokens
+from yijing.core.oracle import YijingOracle
+from yijing.core.sessions import DialogueSessionManager
+from yijing.enums import ConsultationMode
+
+
+def dialogue_oracle(tmp_path, **settings):
+    return YijingOracle(custom_settings={
+        "model_type": ModelType.STUB,
+        "consultation_mode": ConsultationMode.DIALOGUE,
+        "dialogue_session_dir": tmp_path,
+        **settings
+    })
+
+
+class TestDialogueSessionManager:
+    """
+    Tests für ``DialogueSessionManager``.
+    """
+
+    def test_lru_spill_and_rehydrate(self, tmp_path):
+        """Verdrängte Sitzungen landen auf der Platte und kehren unverändert zurück."""
+        manager = DialogueSessionManager(tmp_path, max_sessions=2)
+        for session_id in ("a", "b", "c"):
+            with manager.checkout(session_id) as session:
+                session.append_turn(f"Frage {session_id}", f"Antwort {session_id}")
+
+        assert len(manager) == 2 and "a" not in manager
+        assert len(list(tmp_path.glob("*.json"))) == 1
+        assert manager.stats.evictions == 1
+
+        with manager.checkout("a") as session:
+            assert session.history == [
+                {"role": "user", "content": "Frage a"},
+                {"role": "assistant", "content": "Antwort a"}
+            ]
+        assert "b" not in manager
+        assert len(list(tmp_path.glob("*.json"))) == 1
+
+    def test_active_sessions_stay_in_memory(self, tmp_path):
+        """Eine Sitzung mitten in einer Runde wird nicht verdrängt."""
+        manager = DialogueSessionManager(tmp_path, max_sessions=1)
+        with manager.checkout("aktiv") as session:
+            session.append_turn("Frage", "Antwort")
+            with manager.checkout("andere"):
+                assert "aktiv" in manager
+            session.append_turn("Noch eine", "Antwort")
+
+        assert len(manager) == 1
+        assert len(manager.history("aktiv")) == 4
+
+    def test_reset_forgets_spilled_history(self, tmp_path):
+        """Ein Neustart löscht auch die ausgelagerte Datei."""
+        manager = DialogueSessionManager(tmp_path, max_sessions=1)
+        with manager.checkout("a") as session:
+            session.append_turn("Frage", "Antwort")
+        manager.spill_all()
+        manager.reset("a")
+
+        assert not list(tmp_path.glob("*.json"))
+        assert manager.history("a") == []
+
+    async def test_sync_and_async_turns_take_turns(self, tmp_path):
+        """Synchrone und asynchrone Runden derselben Sitzung laufen nacheinander."""
+        manager = DialogueSessionManager(tmp_path)
+        entered, leave = threading.Event(), threading.Event()
+
+        def sync_turn():
+            with manager.checkout("s") as session:
+                entered.set()
+                leave.wait()
+                session.append_turn("sync", "Antwort")
+
+        async def async_turn():
+            async with manager.acheckout("s") as session:
+                session.append_turn("async", "Antwort")
+
+        thread = threading.Thread(target=sync_turn)
+        thread.start()
+        await asyncio.to_thread(entered.wait)
+        task = asyncio.create_task(async_turn())
+        try:
+            await asyncio.sleep(0.05)
+            assert not task.done()
+        finally:
+            leave.set()
+        await task
+        await asyncio.to_thread(thread.join)
+        assert [m["content"] for m in manager.history("s")[::2]] == ["sync", "async"]
+
+    async def test_spill_runs_outside_manager_lock(self, tmp_path):
+        """Sitzungsdateien werden ohne die Sperre des Managers geschrieben."""
+        manager = DialogueSessionManager(tmp_path, max_sessions=1)
+        write = manager._write
+        locked = []
+
+        def checking_write(session):
+            locked.append(manager._lock.locked())
+            write(session)
+
+        manager._write = checking_write
+        with manager.checkout("a") as session:
+            session.append_turn("Frage", "Antwort")
+        async with manager.acheckout("b") as session:
+            session.append_turn("Frage", "Antwort")
+        async with manager.acheckout("a"):
+            pass
+
+        assert locked == [False, False]
+        assert len(list(tmp_path.glob("*.json"))) == 1
+
+    async def test_async_checkout_reads_spilled_session_in_thread(self, tmp_path):
+        """Eine ausgelagerte Sitzung wird nicht in der Event-Loop gelesen."""
+        manager = DialogueSessionManager(tmp_path, max_sessions=1)
+        read = manager._read
+        threads = []
+
+        def recording_read(session_id):
+            threads.append(threading.current_thread())
+            return read(session_id)
+
+        manager._read = recording_read
+        async with manager.acheckout("a") as session:
+            session.append_turn("Frage", "Antwort")
+        manager.spill_all()
+        async with manager.acheckout("a") as session:
+            assert len(session.history) == 2
+
+        assert threads and threading.main_thread() not in threads
+
+
+class TestOracleSessions:
+    """
+    Tests für Dialoge mehrerer Nutzer über ein Orakel.
+    """
+
+    def test_sessions_are_separate(self, tmp_path):
+        """Jede Sitzung sieht nur ihren eigenen Verlauf."""
+        oracle = dialogue_oracle(tmp_path, dialogue_max_sessions=1)
+        seen = []
+        complete = oracle.backend.complete
+        oracle.backend.complete = lambda messages, timeout=None: seen.append(len(messages)) or complete(messages)
+
+        oracle.get_response("Erste Frage", session_id="anna")
+        oracle.get_response("Erste Frage", session_id="ben")
+        oracle.get_response("Zweite Frage", session_id="anna")
+        oracle.start_new_consultation("ben")
+        oracle.get_response("Neue Frage", session_id="ben")
+
+        assert seen == [2, 2, 4, 2]
+        assert oracle.sessions.stats.evictions >= 2
+
+    async def test_concurrent_users(self, tmp_path):
+        """Viele Nutzer führen gleichzeitig Dialoge mit begrenztem Speicher."""
+        oracle = dialogue_oracle(tmp_path, dialogue_max_sessions=10, stub_latency=0.01)
+
+        for turn in range(2):
+            await asyncio.gather(*(
+                oracle.aget_response(f"Frage {turn}", session_id=f"nutzer-{i}")
+                for i in range(50)
+            ))
+
+        assert len(oracle.sessions) <= 10
+        assert all(
+            len(oracle.sessions.history(f"nutzer-{i}")) == 4 for i in range(50)
+        )
+
+
+class FakeGenerateClient:
+    """
+    Ersetzt ``ollama.Client``; ``generate`` liefert einen wachsenden Kontext.
+
+    Clients auf demselben Verbindungspool teilen sich die Liste der Anfragen.
+    """
+
+    pools = {}
+
+    def __init__(self, **options):
+        self.requests = self.pools.setdefault(options.get("transport"), [])
+
+    def generate(self, model, prompt, stream=False, **kwargs):
+        self.requests.append({"prompt": prompt, **kwargs})
+        context = list(kwargs.get("context") or []) + [len(self.requests)] * 10
+        return iter([
+            {"response": "Antwort ", "done": False},
+            {"response": f"{len(self.requests)}", "done": True, "context": context}
+        ])
+
+
+def turn(number, tokens=40):
+    return [
+        {"role": "user", "content": f"Frage {number} " + "x" * 4 * tokens},
+        {"role": "assistant", "content": f"Antwort {number}"}
+    ]
+
+
+class TestHistoryBudget:
+    """
+    Tests für das Token-Budget des Dialogverlaufs.
+    """
+
+    def test_compact_keeps_first_and_newest_turns(self):
+        """Die erste Runde bleibt, danach die neuesten, die ins Budget passen."""
+        history = turn(1) + turn(2) + turn(3) + turn(4)
+
+        kept, dropped = compact_history(history, budget=150, reserved=10)
+
+        assert kept == turn(1) + turn(3) + turn(4)
+        assert dropped == 1
+        assert compact_history(history, budget=None) == (history, 0)
+        assert compact_history(history, budget=10)[0] == turn(1)
+
+    def test_oracle_stays_within_budget(self, tmp_path):
+        """Die Anfragen an das Backend wachsen nicht über das Budget hinaus."""
+        oracle = dialogue_oracle(tmp_path, dialogue_token_budget=1000)
+        sizes = []
+        complete = oracle.backend.complete
+
+        def measuring(messages, timeout=None):
+            sizes.append(sum(estimate_tokens(m["content"]) for m in messages))
+            return complete(messages, timeout)
+
+        oracle.backend.complete = measuring
+        for number in range(6):
+            oracle.get_response(f"Frage {number}", session_id="lang")
+
+        with oracle.sessions.checkout("lang") as session:
+            first_question = session.history[0]["content"]
+            assert session.omitted_turns > 0
+        assert "Frage 0" in first_question
+        assert max(sizes) <= 1000
+
+    def test_ollama_context_is_reused(self, tmp_path, monkeypatch):
+        """Folgerunden senden nur die neue Frage mit dem Kontext der letzten Antwort."""
+        monkeypatch.setattr("yijing.core.backends.ollama.Client", FakeGenerateClient)
+        oracle = dialogue_oracle(tmp_path, model_type=ModelType.OLLAMA)
+        requests = oracle.backend.client.requests
+
+        first = oracle.get_response("Erste Frage", session_id="s")
+        second = oracle.get_response("Zweite Frage", session_id="s")
+
+        assert first["answer"] == "Antwort 1" and second["answer"] == "Antwort 2"
+        assert "system" in requests[0] and "context" not in requests[0]
+        assert requests[1]["context"] == [1] * 10
+        assert "system" not in requests[1]
+        assert requests[1]["prompt"].count("Zweite Frage") == 1
+        assert "Erste Frage" not in requests[1]["prompt"]
+
+    def test_oversized_context_is_rebuilt_from_text(self, tmp_path, monkeypatch):
+        """Passt der Kontext nicht mehr ins Budget, wird der Verlauf als Text gesendet."""
+        monkeypatch.setattr("yijing.core.backends.ollama.Client", FakeGenerateClient)
+        oracle = dialogue_oracle(tmp_path, model_type=ModelType.OLLAMA)
+        requests = oracle.backend.client.requests
+
+        oracle.get_response("Erste Frage", session_id="s")
+        with oracle.sessions.checkout("s") as session:
+            session.model_state = [0] * 100_000
+        oracle.get_response("Zweite Frage", session_id="s")
+
+        assert "context" not in requests[1]
+        assert "Erste Frage" in requests[1]["prompt"]
+        assert requests[1]["prompt"].startswith("Frage: ")
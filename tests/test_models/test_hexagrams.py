@@ -0,0 +1,201 @@
+# tests/test_models/test_hexagrams.py
+
+"""
+Tests für die Hexagramm-Modelle und die vorberechneten Übergangstabellen.
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from yijing.models import (
+    CompactHexagram,
+    CompactHypergram,
+    Hexagram,
+    Hypergram,
+    HypergramLine,
+    get_hexagram
+)
+from yijing.models.transitions import (
+    TRANSITIONS,
+    get_transition,
+    pack_hypergram,
+    pack_hypergram_array,
+    unpack_hypergram
+)
+
+
+def _reference_numbers(values):
+    """Berechnet Ursprung, Ergebnis und Wandlungen ohne Tabelle."""
+    old = int(''.join('1' if v in (7, 9) else '0' for v in values), 2)
+    new = int(''.join(
+        '1' if v in (6, 7) else '0' for v in values
+    ), 2)
+    changing = [i for i, v in enumerate(values) if v in (6, 9)]
+    return old + 1, new + 1, changing
+
+
+class TestTransitionTable:
+    """
+    Tests für die Übergangstabelle aller 4096 Hypergramme.
+    """
+
+    def test_table_matches_reference(self):
+        """Jeder Tabelleneintrag entspricht der direkten Berechnung."""
+        for values in itertools.product((6, 7, 8, 9), repeat=6):
+            transition = TRANSITIONS[pack_hypergram(values)]
+            original, resulting, changing = _reference_numbers(values)
+
+            assert transition.original_number == original
+            assert transition.resulting_number == resulting
+            assert list(transition.changing_lines) == changing
+
+    def test_pack_roundtrip(self):
+        """Packen und Entpacken sind invers zueinander."""
+        for code in range(4096):
+            assert pack_hypergram(unpack_hypergram(code)) == code
+
+    def test_array_packing(self):
+        """Die vektorisierte Packung entspricht der skalaren."""
+        lines = np.array([[6, 7, 8, 9, 9, 6], [8, 8, 8, 7, 7, 7]], dtype=np.uint8)
+        codes = pack_hypergram_array(lines)
+
+        assert codes.tolist() == [pack_hypergram(row) for row in lines.tolist()]
+
+    def test_invalid_code(self):
+        """Codes außerhalb des Wertebereichs werden abgelehnt."""
+        with pytest.raises(ValueError):
+            get_transition(4096)
+
+
+class TestModelFastPaths:
+    """
+    Tests für die tabellengestützten Methoden der Modelle.
+    """
+
+    def test_hypergram_methods(self):
+        """Hypergramm-Methoden liefern dieselben Werte wie die Tabelle."""
+        values = (6, 7, 8, 9, 7, 8)
+        hypergram = Hypergram(lines=[HypergramLine(value=v) for v in values])
+        original, resulting, changing = _reference_numbers(values)
+
+        assert hypergram.old_hexagram().to_binary_number() + 1 == original
+        assert hypergram.new_hexagram().to_binary_number() + 1 == resulting
+        assert hypergram.changing_lines() == changing
+        assert hypergram.transition().original_glyphs == (
+            hypergram.old_hexagram().to_unicode_representation()
+        )
+
+    def test_hexagram_binary_roundtrip(self):
+        """Binärwert und Hexagramm lassen sich verlustfrei umwandeln."""
+        for number in range(64):
+            assert Hexagram.from_binary_number(number).to_binary_number() == number
+
+
+class TestCompactModels:
+    """
+    Tests für die kompakte, slot-basierte Darstellung.
+    """
+
+    def test_roundtrip_with_pydantic(self):
+        """Kompakte und Pydantic-Modelle lassen sich verlustfrei umwandeln."""
+        values = (9, 8, 7, 6, 6, 7)
+        hypergram = Hypergram(lines=[HypergramLine(value=v) for v in values])
+        compact = CompactHypergram.from_model(hypergram)
+
+        assert compact.line_values() == values
+        assert compact.to_model() == hypergram
+        assert compact.old_hexagram().to_model() == hypergram.old_hexagram()
+        assert compact.new_hexagram().to_model() == hypergram.new_hexagram()
+        assert compact.changing_lines() == hypergram.changing_lines()
+        assert compact.old_hexagram().to_unicode_representation() == (
+            hypergram.old_hexagram().to_unicode_representation()
+        )
+
+    def test_hypergram_data_conversion(self):
+        """Die vollständigen Lesungsdaten entsprechen dem Pydantic-Pfad."""
+        compact = CompactHypergram.from_values((6, 6, 7, 8, 9, 9))
+        data = compact.to_hypergram_data(seed=5)
+
+        assert CompactHypergram.from_hypergram_data(data) == compact
+        assert data.seed == 5
+
+    def test_immutable_and_hashable(self):
+        """Kompakte Objekte sind unveränderlich, hashbar und ohne __dict__."""
+        compact = CompactHypergram(1234)
+
+        with pytest.raises(AttributeError):
+            compact._code = 1
+        assert not hasattr(compact, '__dict__')
+        assert {compact, CompactHypergram(1234)} == {compact}
+        assert CompactHexagram(5) == CompactHexagram.from_model(
+            Hexagram.from_binary_number(5)
+        )
+
+    def test_pickle(self):
+        """Kompakte Objekte lassen sich serialisieren."""
+        import pickle
+
+        compact = CompactHypergram(4095)
+        assert pickle.loads(pickle.dumps(compact)) == compact
+
+    def test_invalid_values(self):
+        """Werte außerhalb des Bereichs werden abgelehnt."""
+        with pytest.raises(ValueError):
+            CompactHypergram(4096)
+        with pytest.raises(ValueError):
+            CompactHexagram(64)
+
+
+class TestInterning:
+    """
+    Tests für die kanonischen, geteilten Hexagramm- und Trigramm-Instanzen.
+    """
+
+    def test_producers_return_shared_instances(self):
+        """Alle Erzeuger liefern dieselbe Instanz pro Hexagramm."""
+        first = Hypergram(lines=[HypergramLine(value=v) for v in (7, 7, 8, 8, 7, 8)])
+        second = Hypergram(lines=[HypergramLine(value=v) for v in (7, 9, 8, 6, 7, 8)])
+
+        assert first.old_hexagram() is second.old_hexagram()
+        assert first.old_hexagram() is Hexagram.from_binary_number(0b110010)
+        assert first.old_hexagram() is get_hexagram(0b110010 + 1)
+        assert CompactHypergram.from_model(second).old_hexagram().to_model() is (
+            first.old_hexagram()
+        )
+
+    def test_hypergram_data_keeps_identity(self):
+        """HypergramData speichert die geteilten Instanzen ohne Kopie."""
+        from yijing.core.generator import cast_hypergram
+
+        data = cast_hypergram(rng=3)
+        assert data.old_hexagram is data.hypergram.old_hexagram()
+        assert data.new_hexagram is data.hypergram.new_hexagram()
+
+    def test_hexagrams_are_immutable_and_hashable(self):
+        """Hexagramme sind eingefroren und als Schlüssel nutzbar."""
+        hexagram = get_hexagram(1)
+        built = Hexagram.from_binary_number(0).model_copy()
+
+        with pytest.raises(Exception):
+            hexagram.lines = []
+        with pytest.raises(AttributeError):
+            hexagram.lines.append(hexagram.lines[0])
+        assert len(get_hexagram(1).lines) == 6
+        assert isinstance(Hexagram(lines=list(hexagram.lines)).lines, tuple)
+        assert {hexagram: "data"}[built] == "data"
+        assert built.intern() is hexagram
+
+    def test_trigrams(self):
+        """Ober- und Untertrigramm sind kanonisch und korrekt zerlegt."""
+        hexagram = Hexagram.from_binary_number(0b101011)
+
+        assert hexagram.lower_trigram().to_binary_number() == 0b101
+        assert hexagram.upper_trigram().to_binary_number() == 0b011
+        assert hexagram.lower_trigram() is Hexagram.from_binary_number(
+            0b101000
+        ).lower_trigram()
+        assert hexagram.upper_trigram().to_unicode_representation() == (
+            hexagram.to_unicode_representation()[3:]
+        )
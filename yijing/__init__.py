@@ -16,6 +16,8 @@ from .enums import (
     ResourceType,
     LogLevel,
     ModelType,
+    CastingMethod,
+    StreamEventType,
 )
 
 # Import models
@@ -25,12 +27,16 @@ from .models import (
     HexagramContext,
     Hexagram,
     HexagramLine,
-    HypergramLine
+    HypergramLine,
+    HypergramBatch,
+    CompactHexagram,
+    CompactHypergram
 )
 
 # Import core functionality
-from .core.oracle import YijingOracle, ask_oracle
-from .core.generator import cast_hypergram
+from .core.oracle import YijingOracle, ask_oracle, get_oracle
+from .core.generator import cast_hypergram, cast_hypergrams, cast_compact_hypergram
+from .core.casting import register_casting_method
 from .utils.formatting import (
     generiere_erweiterte_weissagung,
     formatiere_weissagung_markdown
@@ -47,7 +53,11 @@ __all__ = [
     # Core functionality
     'YijingOracle',
     'ask_oracle',
+    'get_oracle',
     'cast_hypergram',
+    'cast_hypergrams',
+    'cast_compact_hypergram',
+    'register_casting_method',
     'generiere_erweiterte_weissagung',
     'formatiere_weissagung_markdown',
     'HexagramManager',
@@ -59,6 +69,9 @@ __all__ = [
     'Hexagram',
     'HexagramLine',
     'HypergramLine',
+    'HypergramBatch',
+    'CompactHexagram',
+    'CompactHypergram',
     
     # Enums
     'ConsultationMode',
@@ -67,6 +80,7 @@ __all__ = [
     'ResourceType',
     'LogLevel',
     'ModelType',  # ModelType hinzugefügt
+    'CastingMethod',
     
     # Configuration
     'Settings',
@@ -14,5 +14,13 @@ This package provides:
 from .settings import Settings, settings
 
 from .settings import Settings, settings, ModelType
+from .prompts import CompiledPrompt, PromptRegistry, get_prompt_registry
 
-__all__ = ['Settings', 'settings', 'ModelType']
\ No newline at end of file
+__all__ = [
+    'Settings',
+    'settings',
+    'ModelType',
+    'CompiledPrompt',
+    'PromptRegistry',
+    'get_prompt_registry'
+]
\ No newline at end of file
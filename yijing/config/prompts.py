@@ -0,0 +1,262 @@
+# yijing/config/prompts.py
+
+"""
+Prompts Module
+=============
+Process-wide registry of compiled prompt templates.
+
+A prompt is compiled from an ordered set of template files in the prompts
+directory, joined by blank lines. Each template set is read once and kept in
+memory together with a SHA-256 digest of the compiled text. Before a cached
+prompt is returned, the modification time and size of its templates are
+checked (at most once per ``check_interval`` seconds), so edited templates
+are picked up without restarting the process.
+"""
+
+import hashlib
+import threading
+import time
+import logging
+import aiofiles
+import aiofiles.os
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple, Union
+
+from ..enums import ConsultationMode
+from ..utils.cache import CacheStats
+
+logger = logging.getLogger(__name__)
+
+# Templates of the system prompt, ``{mode}`` is the consultation mode
+SYSTEM_PROMPT_TEMPLATES: Tuple[str, ...] = (
+    'system_prompt',
+    '{mode}_mode_prompt',
+    'consultation_template'
+)
+TEMPLATE_SEPARATOR = '\n\n'
+
+class CompiledPrompt(NamedTuple):
+    """
+    A prompt compiled from one or more template files.
+
+    Attributes:
+        text (str): The combined prompt text.
+        digest (str): SHA-256 hex digest of ``text``; equal texts have equal digests.
+        templates (Tuple[str, ...]): Names of the templates, in order.
+    """
+    text: str
+    digest: str
+    templates: Tuple[str, ...]
+
+class _PromptEntry(NamedTuple):
+    prompt: CompiledPrompt
+    sources: Tuple[Tuple[int, int], ...]
+    checked_at: float
+
+def _compile(templates: Tuple[str, ...], texts: Sequence[str]) -> CompiledPrompt:
+    text = TEMPLATE_SEPARATOR.join(texts)
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return CompiledPrompt(text=text, digest=digest, templates=templates)
+
+def _signature(stat) -> Tuple[int, int]:
+    return (stat.st_mtime_ns, stat.st_size)
+
+class PromptRegistry:
+    """
+    Cache of compiled prompts of one prompts directory.
+
+    Use ``PromptRegistry.for_directory`` to get the instance shared by the
+    whole process.
+
+    Args:
+        directory (Path): Directory containing the ``<name>.txt`` templates.
+        check_interval (float): Minimum number of seconds between two checks
+            of the templates' modification times. 0 checks on every access.
+
+    Attributes:
+        stats (CacheStats): Hit, miss and invalidation counters.
+    """
+
+    _instances: Dict[Path, 'PromptRegistry'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, directory: Path, check_interval: float = 1.0):
+        self.directory = Path(directory)
+        self.check_interval = check_interval
+        self.stats = CacheStats()
+        self._entries: Dict[Tuple[str, ...], _PromptEntry] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_directory(cls, directory: Path) -> 'PromptRegistry':
+        """
+        Get the process-wide registry of a directory, creating it on first use.
+
+        Args:
+            directory (Path): Directory containing the prompt templates.
+
+        Returns:
+            PromptRegistry: The shared registry instance.
+        """
+        key = Path(directory).resolve()
+        registry = cls._instances.get(key)
+        if registry is None:
+            with cls._instances_lock:
+                registry = cls._instances.setdefault(key, cls(key))
+        return registry
+
+    @staticmethod
+    def system_templates(mode: Union[ConsultationMode, str]) -> Tuple[str, ...]:
+        """Get the template names of the system prompt for a consultation mode."""
+        mode = ConsultationMode(mode).value
+        return tuple(name.format(mode=mode) for name in SYSTEM_PROMPT_TEMPLATES)
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f'{name}.txt'
+
+    def _cached(self, key: Tuple[str, ...]) -> Optional[_PromptEntry]:
+        """Get an entry that does not need to be revalidated yet."""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry.checked_at < self.check_interval:
+            self.stats.hits += 1
+            return entry
+        return None
+
+    def _revalidate(
+        self,
+        key: Tuple[str, ...],
+        sources: Optional[Tuple[Tuple[int, int], ...]]
+    ) -> Optional[CompiledPrompt]:
+        """Return the cached prompt if no template changed, otherwise drop it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or sources is None:
+                return None
+            if sources == entry.sources:
+                self._entries[key] = entry._replace(checked_at=time.monotonic())
+                self.stats.hits += 1
+                return entry.prompt
+
+            if self._entries.pop(key, None) is not None:
+                logger.debug(f"Prompt templates {', '.join(key)} changed, recompiling")
+                self.stats.invalidations += 1
+            return None
+
+    def _stat(self, key: Tuple[str, ...]) -> Optional[Tuple[Tuple[int, int], ...]]:
+        try:
+            return tuple(_signature(self._path(name).stat()) for name in key)
+        except FileNotFoundError:
+            return None
+
+    async def _astat(self, key: Tuple[str, ...]) -> Optional[Tuple[Tuple[int, int], ...]]:
+        try:
+            return tuple(
+                [_signature(await aiofiles.os.stat(self._path(name))) for name in key]
+            )
+        except FileNotFoundError:
+            return None
+
+    def _store(
+        self,
+        key: Tuple[str, ...],
+        texts: Sequence[str],
+        sources: Tuple[Tuple[int, int], ...]
+    ) -> CompiledPrompt:
+        prompt = _compile(key, texts)
+        self._entries[key] = _PromptEntry(prompt, sources, time.monotonic())
+        return prompt
+
+    def _missing(self, key: Tuple[str, ...]) -> FileNotFoundError:
+        for name in key:
+            if not self._path(name).exists():
+                return FileNotFoundError(f"Prompt template not found: {self._path(name)}")
+        return FileNotFoundError(f"Prompt templates not found: {', '.join(key)}")
+
+    def compile(self, templates: Sequence[str]) -> CompiledPrompt:
+        """
+        Get the compiled prompt of a template set.
+
+        Args:
+            templates (Sequence[str]): Template names without ``.txt``, in order.
+
+        Returns:
+            CompiledPrompt: The cached or freshly compiled prompt.
+
+        Raises:
+            FileNotFoundError: If a template file is missing.
+        """
+        key = tuple(templates)
+        entry = self._cached(key)
+        if entry is not None:
+            return entry.prompt
+        prompt = self._revalidate(key, self._stat(key))
+        if prompt is not None:
+            return prompt
+
+        with self._lock:
+            self.stats.misses += 1
+            sources = self._stat(key)
+            if sources is None:
+                raise self._missing(key)
+            texts = [self._path(name).read_text(encoding='utf-8') for name in key]
+            return self._store(key, texts, sources)
+
+    async def acompile(self, templates: Sequence[str]) -> CompiledPrompt:
+        """
+        Asynchronous counterpart of ``compile`` with the same cache.
+
+        Raises:
+            FileNotFoundError: If a template file is missing.
+        """
+        key = tuple(templates)
+        entry = self._cached(key)
+        if entry is not None:
+            return entry.prompt
+        prompt = self._revalidate(key, await self._astat(key))
+        if prompt is not None:
+            return prompt
+
+        sources = await self._astat(key)
+        if sources is None:
+            raise self._missing(key)
+        texts = []
+        for name in key:
+            async with aiofiles.open(self._path(name), 'r', encoding='utf-8') as f:
+                texts.append(await f.read())
+        with self._lock:
+            self.stats.misses += 1
+            return self._store(key, texts, sources)
+
+    def system_prompt(self, mode: Union[ConsultationMode, str]) -> CompiledPrompt:
+        """Get the compiled system prompt of a consultation mode."""
+        return self.compile(self.system_templates(mode))
+
+    async def asystem_prompt(self, mode: Union[ConsultationMode, str]) -> CompiledPrompt:
+        """Asynchronous counterpart of ``system_prompt``."""
+        return await self.acompile(self.system_templates(mode))
+
+    def template(self, name: str) -> str:
+        """Get the text of a single template."""
+        return self.compile((name,)).text
+
+    def invalidate(self) -> None:
+        """Drop all compiled prompts."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def default_prompts_dir() -> Path:
+    """Get the prompts directory shipped with the package."""
+    return Path(__file__).parent.parent / 'resources' / 'prompts'
+
+def get_prompt_registry(directory: Optional[Path] = None) -> PromptRegistry:
+    """
+    Get the shared registry of a prompts directory.
+
+    Args:
+        directory (Optional[Path]): Prompts directory. Defaults to the
+            package's ``resources/prompts``.
+    """
+    return PromptRegistry.for_directory(directory or default_prompts_dir())
@@ -7,10 +7,11 @@ Central configuration management for the I Ching oracle system.
 """
 
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional
+from typing import Optional, Union
 from pathlib import Path
 
-from ..enums import ConsultationMode, ModelType, LogLevel
+from ..enums import ConsultationMode, ModelType, LogLevel, CastingMethod
+from .prompts import CompiledPrompt, PromptRegistry
 
 class Settings(BaseModel):
     """Global configuration settings for the I Ching oracle system."""
@@ -19,6 +20,148 @@ class Settings(BaseModel):
     model_type: ModelType = ModelType.OLLAMA
     active_model: str = "llama2:latest"
     consultation_mode: ConsultationMode = ConsultationMode.SINGLE
+    casting_method: str = Field(
+        default=CastingMethod.UNIFORM.value,
+        description='Name of a registered casting method (uniform, three_coin, yarrow, ...)'
+    )
+    
+    # Ollama client
+    ollama_host: Optional[str] = Field(
+        default=None,
+        description='Ollama server URL (default: OLLAMA_HOST or http://localhost:11434)'
+    )
+    ollama_timeout: Optional[float] = Field(
+        default=120.0,
+        description='Seconds to wait for an Ollama response (None: no limit)'
+    )
+    ollama_connect_timeout: float = Field(
+        default=5.0,
+        description='Seconds to wait for a connection to the Ollama server'
+    )
+    ollama_pool_size: int = Field(
+        default=10,
+        ge=1,
+        description='Maximum number of pooled keep-alive connections to Ollama'
+    )
+    ollama_keep_alive: Optional[Union[float, str]] = Field(
+        default='30m',
+        description='How long Ollama keeps the model loaded after a request (e.g. "30m", -1: forever)'
+    )
+    ollama_warmup: bool = Field(
+        default=False,
+        description='Load the model with an empty request when the oracle starts'
+    )
+
+    # Deadlines, retries and circuit breaker
+    request_timeout: Optional[float] = Field(
+        default=120.0,
+        gt=0,
+        description='Seconds a consultation may take including retries (None: no limit)'
+    )
+    retry_attempts: int = Field(
+        default=3,
+        ge=1,
+        description='Attempts per model call on transient errors, including the first'
+    )
+    retry_base_delay: float = Field(
+        default=0.5,
+        ge=0,
+        description='Upper bound of the first backoff delay in seconds'
+    )
+    retry_max_delay: float = Field(
+        default=8.0,
+        ge=0,
+        description='Upper bound of any backoff delay in seconds'
+    )
+    circuit_failure_threshold: int = Field(
+        default=5,
+        ge=1,
+        description='Consecutive failed model calls that open the circuit breaker'
+    )
+    circuit_reset_timeout: float = Field(
+        default=30.0,
+        ge=0,
+        description='Seconds the circuit stays open before a probe call is allowed'
+    )
+
+    # Dialogue sessions
+    dialogue_max_sessions: int = Field(
+        default=1000,
+        ge=1,
+        description='Dialogue sessions kept in memory; older ones are spilled to disk'
+    )
+    dialogue_session_dir: Optional[Path] = Field(
+        default=None,
+        description='Directory of spilled dialogue sessions (None: a temporary directory)'
+    )
+    dialogue_token_budget: Optional[int] = Field(
+        default=4096,
+        ge=1,
+        description='Estimated tokens of system prompt, history and question per dialogue turn (None: no limit)'
+    )
+    dialogue_reuse_state: bool = Field(
+        default=True,
+        description="Continue dialogues from the backend's state (Ollama context) instead of resending the history"
+    )
+
+    # Commentary retrieval
+    commentary_passages: int = Field(
+        default=0,
+        ge=0,
+        description='Passages matching the question added to each consultation prompt (0: none)'
+    )
+    commentary_cache_dir: Optional[Path] = Field(
+        default=None,
+        description='Directory of the files built from yijing.txt, e.g. the BM25 index (None: next to yijing.txt)'
+    )
+    commentary_retrieval: str = Field(
+        default='bm25',
+        description="How passages are selected: 'bm25' (keywords in yijing.txt) or 'embedding' (vector store)"
+    )
+    embedding_backend: str = Field(
+        default='ollama',
+        description='Name of a registered embedder (ollama, stub, ...)'
+    )
+    embedding_model: str = Field(
+        default='nomic-embed-text',
+        description='Ollama model used for passage and question embeddings'
+    )
+    embedding_store_path: Optional[Path] = Field(
+        default=None,
+        description='File of the passage vectors (default: resources/yijing.vectors.npz)'
+    )
+
+    # Batch consultations
+    batch_concurrency: int = Field(
+        default=8,
+        ge=1,
+        description='Consultations run at once by get_responses and aget_responses'
+    )
+
+    # Response cache
+    response_cache_size: int = Field(
+        default=1024,
+        ge=0,
+        description='Model answers kept in memory for repeated questions (0 disables the cache)'
+    )
+    response_cache_ttl: Optional[float] = Field(
+        default=24 * 60 * 60,
+        description='Seconds a cached answer stays valid (None: no limit)'
+    )
+    response_cache_path: Optional[Path] = Field(
+        default=None,
+        description='SQLite file for a persistent answer cache shared by all processes'
+    )
+
+    # Stub backend
+    stub_latency: float = Field(
+        default=0.0,
+        description='Seconds the stub backend waits before its first token'
+    )
+    stub_token_rate: Optional[float] = Field(
+        default=None,
+        description='Tokens per second of the stub backend (None: no delay)'
+    )
     
     # API Settings
     api_key: Optional[str] = Field(
@@ -72,24 +215,22 @@ class Settings(BaseModel):
             )
         return v
 
+    @property
+    def prompt_registry(self) -> PromptRegistry:
+        """The shared registry of the prompts directory."""
+        return PromptRegistry.for_directory(self.resources_dir / 'prompts')
+
     def load_prompt_template(self, template_name: str) -> str:
         """Load a prompt template from the templates directory."""
-        template_path = self.resources_dir / 'prompts' / f"{template_name}.txt"
-        if not template_path.exists():
-            raise FileNotFoundError(
-                f"Prompt template not found: {template_path}"
-            )
-        return template_path.read_text(encoding='utf-8')
+        return self.prompt_registry.template(template_name)
+
+    def get_compiled_system_prompt(self) -> CompiledPrompt:
+        """Get the cached system prompt of the current mode with its content hash."""
+        return self.prompt_registry.system_prompt(self.consultation_mode)
 
     def get_system_prompt(self) -> str:
         """Get the system prompt for the current consultation mode."""
-        mode_template = self.load_prompt_template(
-            f"{self.consultation_mode.value}_mode_prompt"
-        )
-        base_template = self.load_prompt_template("system_prompt")
-        consultation_template = self.load_prompt_template("consultation_template")
-        
-        return f"{base_template}\n\n{mode_template}\n\n{consultation_template}"
+        return self.get_compiled_system_prompt().text
 
 # Create global settings instance
 settings = Settings()
\ No newline at end of file
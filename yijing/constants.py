@@ -14,6 +14,7 @@ VALID_LINE_VALUES: Final[tuple] = (CHANGING_YIN, STABLE_YANG, STABLE_YIN, CHANGI
 # Hexagram constraints
 MAX_BINARY_VALUE: Final[int] = 63  # 111111 in binary
 HEXAGRAM_LINE_COUNT: Final[int] = 6
+TRIGRAM_LINE_COUNT: Final[int] = 3
 
 # Model defaults
 DEFAULT_MODEL: Final[str] = "models/gemini-1.5-flash"
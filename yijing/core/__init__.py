@@ -7,17 +7,133 @@ Contains the core functionality of the I Ching oracle system.
 
 This package provides:
 - Oracle implementation (YijingOracle)
+- Process-wide prepared oracles (get_oracle)
 - Hexagram management (HexagramManager)
-- Reading generation (cast_hypergram)
+- Shared hexagram corpus cache (HexagramCorpus)
+- Compiled, memory-mapped corpus artifact (compile_corpus)
+- Memory-mapped commentary corpus with section offsets (CommentaryText)
+- BM25 full-text index over the commentary corpus (CommentaryIndex)
+- Embedding vector store for semantic passage retrieval (VectorStore)
+- Reading generation (cast_hypergram, cast_hypergrams)
+- Casting method registry (register_casting_method)
+- Per-thread random streams (thread_rng, spawn_rngs)
+- Pluggable model backends (ModelBackend, register_backend)
+- Two-tier cache of model answers (ResponseCache)
+- Batch consultations with bounded concurrency (BatchResult)
+- Dialogue sessions with spill-to-disk (DialogueSessionManager)
+- Deadlines, retries and circuit breakers for model calls (RetryPolicy, CircuitBreaker)
 """
 
-from .oracle import YijingOracle, ask_oracle
-from .generator import cast_hypergram
+from .oracle import YijingOracle, ask_oracle, get_oracle, clear_oracles
+from .generator import cast_hypergram, cast_hypergrams, cast_compact_hypergram
 from .manager import HexagramManager
+from .corpus import HexagramCorpus
+from .views import LazyHexagram
+from .artifact import HexagramArtifact, compile_corpus, ensure_artifact
+from .commentary import (
+    CommentarySegment,
+    CommentaryText,
+    segment_commentary,
+    ensure_commentary_map,
+    open_commentary_text
+)
+from .text_index import (
+    CommentaryIndex,
+    CommentaryPassage,
+    ensure_commentary_index,
+    open_commentary_index
+)
+from .embeddings import (
+    Embedder,
+    OllamaEmbedder,
+    StubEmbedder,
+    VectorStore,
+    build_vector_store,
+    corpus_passages,
+    register_embedder,
+    create_embedder
+)
+from .casting import (
+    AliasSampler,
+    register_casting_method,
+    get_casting_method,
+    available_casting_methods
+)
+from .rng import thread_rng, spawn_rngs, set_root_seed
+from .response_cache import ResponseCache
+from .batch import BatchResult, run_batch, arun_batch
+from .sessions import DialogueSession, DialogueSessionManager
+from .resilience import (
+    Deadline,
+    RetryPolicy,
+    CircuitBreaker,
+    get_circuit_breaker,
+    reset_circuit_breakers
+)
+from .backends import (
+    ModelBackend,
+    OllamaBackend,
+    GenAIBackend,
+    StubBackend,
+    register_backend,
+    create_backend,
+    available_backends
+)
 
 __all__ = [
     'YijingOracle',
     'ask_oracle',
+    'get_oracle',
+    'clear_oracles',
     'cast_hypergram',
-    'HexagramManager'
+    'cast_hypergrams',
+    'cast_compact_hypergram',
+    'HexagramManager',
+    'HexagramCorpus',
+    'LazyHexagram',
+    'HexagramArtifact',
+    'compile_corpus',
+    'ensure_artifact',
+    'CommentarySegment',
+    'CommentaryText',
+    'segment_commentary',
+    'ensure_commentary_map',
+    'open_commentary_text',
+    'CommentaryIndex',
+    'CommentaryPassage',
+    'ensure_commentary_index',
+    'open_commentary_index',
+    'Embedder',
+    'OllamaEmbedder',
+    'StubEmbedder',
+    'VectorStore',
+    'build_vector_store',
+    'corpus_passages',
+    'register_embedder',
+    'create_embedder',
+    'AliasSampler',
+    'register_casting_method',
+    'get_casting_method',
+    'available_casting_methods',
+    'thread_rng',
+    'spawn_rngs',
+    'set_root_seed',
+    'ModelBackend',
+    'OllamaBackend',
+    'GenAIBackend',
+    'StubBackend',
+    'register_backend',
+    'create_backend',
+    'available_backends',
+    'ResponseCache',
+    'BatchResult',
+    'run_batch',
+    'arun_batch',
+    'DialogueSession',
+    'DialogueSessionManager',
+    'Deadline',
+    'RetryPolicy',
+    'CircuitBreaker',
+    'get_circuit_breaker',
+    'reset_circuit_breakers'
 ]
\ No newline at end of file
@@ -0,0 +1,292 @@
+# yijing/core/artifact.py
+
+"""
+Corpus Artifact Module
+=====================
+Compiles the 64 hexagram JSON files into a single binary artifact and reads it
+through ``mmap``.
+
+Layout (all integers little-endian):
+    header   magic ``YJCA``, format version (u16), hexagram count (u16),
+             sections per hexagram (u16), SHA-256 digest of the sources
+    sources  per hexagram file: modification time in ns (u64) and size (u64)
+    index    one u32 offset per (hexagram, section), hexagram-major
+    data     per section: u32 length followed by the UTF-8 JSON payload
+
+Sections per hexagram are ``hexagram`` (meta data), ``judgment``, ``image``
+and ``lines.0`` to ``lines.5``. Readers decode only the sections they touch,
+and pre-forked workers share one page-cache copy of the file.
+
+Whether the artifact is current is decided from the recorded modification
+times and sizes of the JSON files; they are only hashed and compared with the
+digest when one of them differs.
+
+Build the artifact after editing the JSON files:
+
+    python -m yijing.core.artifact [source_dir] [artifact_path]
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from ..constants import HEXAGRAM_LINE_COUNT
+from ..exceptions import ResourceValidationError
+from .loader import load_hexagram_data
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'YJCA'
+FORMAT_VERSION = 2
+HEXAGRAM_TOTAL = 64
+SECTIONS: Tuple[str, ...] = ('hexagram', 'judgment', 'image') + tuple(
+    f'lines.{i}' for i in range(HEXAGRAM_LINE_COUNT)
+)
+ARTIFACT_SUFFIX = '.yjc'
+
+_HEADER = struct.Struct('<4sHHH32s')
+_SOURCE_STAT = struct.Struct('<QQ')
+_INDEX_START = _HEADER.size + HEXAGRAM_TOTAL * _SOURCE_STAT.size
+_U32 = struct.Struct('<I')
+_SECTION_IDS = {name: i for i, name in enumerate(SECTIONS)}
+
+def default_artifact_path(source_dir: Path) -> Path:
+    """Get the default artifact location next to a hexagram JSON directory."""
+    source_dir = Path(source_dir)
+    return source_dir.with_name(source_dir.name + ARTIFACT_SUFFIX)
+
+SourceStats = Tuple[Tuple[int, int], ...]
+
+def source_stats(source_dir: Path) -> SourceStats:
+    """
+    Get modification time (ns) and size of every hexagram file.
+
+    Raises:
+        FileNotFoundError: If a hexagram file is missing.
+    """
+    stats = []
+    for number in range(1, HEXAGRAM_TOTAL + 1):
+        stat = (Path(source_dir) / f'hexagram_{number:02d}.json').stat()
+        stats.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(stats)
+
+def source_digest(source_dir: Path) -> bytes:
+    """
+    Compute the SHA-256 digest over the names and contents of all hexagram files.
+
+    Raises:
+        FileNotFoundError: If a hexagram file is missing.
+    """
+    digest = hashlib.sha256()
+    for number in range(1, HEXAGRAM_TOTAL + 1):
+        path = Path(source_dir) / f'hexagram_{number:02d}.json'
+        digest.update(path.name.encode('utf-8'))
+        digest.update(path.read_bytes())
+    return digest.digest()
+
+def _section_value(data: Dict[str, Any], name: str) -> Any:
+    if name.startswith('lines.'):
+        lines = data.get('lines', [])
+        index = int(name.split('.', 1)[1])
+        return lines[index] if index < len(lines) else None
+    return data.get(name)
+
+def compile_corpus(source_dir: Path, artifact_path: Optional[Path] = None) -> Path:
+    """
+    Compile the hexagram JSON files into a single artifact.
+
+    The file is written to a temporary name and moved into place atomically,
+    so processes that have the previous artifact mapped keep a valid view.
+
+    Args:
+        source_dir (Path): Directory containing ``hexagram_01.json`` to ``hexagram_64.json``.
+        artifact_path (Optional[Path]): Target file. Defaults to
+            ``default_artifact_path(source_dir)``.
+
+    Returns:
+        Path: The path of the written artifact.
+
+    Raises:
+        FileNotFoundError: If a hexagram file is missing.
+    """
+    source_dir = Path(source_dir)
+    artifact_path = Path(artifact_path or default_artifact_path(source_dir))
+
+    # Stat before reading, so a file edited meanwhile is hashed on the next check
+    stats = source_stats(source_dir)
+    index_size = HEXAGRAM_TOTAL * len(SECTIONS) * _U32.size
+    position = _INDEX_START + index_size
+    offsets = []
+    payloads = []
+
+    for number in range(1, HEXAGRAM_TOTAL + 1):
+        data = load_hexagram_data(number, source_dir)
+        for name in SECTIONS:
+            payload = json.dumps(
+                _section_value(data, name),
+                ensure_ascii=False,
+                separators=(',', ':')
+            ).encode('utf-8')
+            offsets.append(position)
+            payloads.append(_U32.pack(len(payload)) + payload)
+            position += _U32.size + len(payload)
+
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, HEXAGRAM_TOTAL, len(SECTIONS), source_digest(source_dir)
+    )
+    temp_path = artifact_path.with_name(f'{artifact_path.name}.{os.getpid()}.tmp')
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        f.write(b''.join(_SOURCE_STAT.pack(*stat) for stat in stats))
+        f.write(b''.join(_U32.pack(offset) for offset in offsets))
+        f.write(b''.join(payloads))
+    os.replace(temp_path, artifact_path)
+
+    logger.info(f"Compiled hexagram corpus to {artifact_path} ({position} bytes)")
+    return artifact_path
+
+class HexagramArtifact:
+    """
+    Read-only, memory-mapped view of a compiled hexagram corpus.
+
+    Args:
+        path (Path): Path of the artifact file.
+
+    Raises:
+        FileNotFoundError: If the artifact does not exist.
+        ResourceValidationError: If the file is not a valid artifact.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _INDEX_START:
+                raise ResourceValidationError(str(self.path), ["file too short"])
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        errors = []
+        magic, version, count, sections, digest = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            errors.append("wrong magic number")
+        elif version != FORMAT_VERSION:
+            errors.append(f"unsupported format version {version}")
+        elif count != HEXAGRAM_TOTAL or sections != len(SECTIONS):
+            errors.append("unexpected section layout")
+        if errors:
+            self._mmap.close()
+            raise ResourceValidationError(str(self.path), errors)
+
+        self.digest: bytes = digest
+        self.source_stats: SourceStats = tuple(
+            _SOURCE_STAT.unpack_from(self._mmap, _HEADER.size + i * _SOURCE_STAT.size)
+            for i in range(HEXAGRAM_TOTAL)
+        )
+
+    def __enter__(self) -> 'HexagramArtifact':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def is_current(self, source_dir: Path, stats: Optional[SourceStats] = None) -> bool:
+        """
+        Check whether the artifact was compiled from the current source files.
+
+        The files are only hashed if their modification times or sizes differ
+        from the recorded ones. If the contents still match, the new values
+        are remembered, so unchanged files are hashed once per process.
+
+        Args:
+            source_dir (Path): Directory of the hexagram JSON files.
+            stats (Optional[SourceStats]): Result of ``source_stats``, if the
+                caller has already taken it.
+
+        Raises:
+            FileNotFoundError: If a hexagram file is missing.
+        """
+        if stats is None:
+            stats = source_stats(source_dir)
+        if stats == self.source_stats:
+            return True
+        if self.digest != source_digest(source_dir):
+            return False
+        self.source_stats = stats
+        return True
+
+    def section_bytes(self, number: int, section: str) -> bytes:
+        """
+        Get the raw JSON payload of a single section.
+
+        Args:
+            number (int): Hexagram number (1-64).
+            section (str): Section name, one of ``SECTIONS``.
+
+        Raises:
+            ValueError: If the hexagram number or section name is invalid.
+        """
+        if not 1 <= number <= HEXAGRAM_TOTAL:
+            raise ValueError(f"Invalid hexagram number: {number}")
+        try:
+            section_id = _SECTION_IDS[section]
+        except KeyError:
+            raise ValueError(f"Unknown section: {section}") from None
+
+        slot = (number - 1) * len(SECTIONS) + section_id
+        (offset,) = _U32.unpack_from(self._mmap, _INDEX_START + slot * _U32.size)
+        (length,) = _U32.unpack_from(self._mmap, offset)
+        start = offset + _U32.size
+        return self._mmap[start:start + length]
+
+    def section(self, number: int, section: str) -> Any:
+        """Decode a single section of a hexagram."""
+        return json.loads(self.section_bytes(number, section))
+
+    def load(self, number: int) -> Dict[str, Any]:
+        """Decode the complete data of a hexagram, equal to its JSON file."""
+        data = {
+            name: self.section(number, name)
+            for name in ('hexagram', 'judgment', 'image')
+        }
+        lines = (
+            self.section(number, f'lines.{i}') for i in range(HEXAGRAM_LINE_COUNT)
+        )
+        data['lines'] = [line for line in lines if line is not None]
+        return data
+
+def ensure_artifact(source_dir: Path, artifact_path: Optional[Path] = None) -> Path:
+    """
+    Compile the artifact unless an up-to-date one already exists.
+
+    An artifact whose sources were only touched is compiled again as well,
+    so the recorded modification times match and later checks skip hashing.
+
+    Returns:
+        Path: The path of the current artifact.
+    """
+    artifact_path = Path(artifact_path or default_artifact_path(source_dir))
+    if artifact_path.exists():
+        try:
+            with HexagramArtifact(artifact_path) as artifact:
+                if artifact.source_stats == source_stats(source_dir):
+                    return artifact_path
+        except ResourceValidationError:
+            logger.warning(f"Invalid corpus artifact {artifact_path}, rebuilding")
+    return compile_corpus(source_dir, artifact_path)
+
+if __name__ == '__main__':
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else (
+        Path(__file__).parent.parent / 'resources' / 'hexagram_json'
+    )
+    target = Path(sys.argv[2]) if len(sys.argv) > 2 else None
+    print(ensure_artifact(source, target))
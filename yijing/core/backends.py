@@ -0,0 +1,561 @@
+# yijing/core/backends.py
+
+"""
+Model Backends Module
+====================
+Pluggable language model backends of the oracle.
+
+A backend turns a list of chat messages (``{"role": ..., "content": ...}``
+with the roles ``system``, ``user`` and ``assistant``) into an answer. Every
+backend offers a blocking, an asynchronous and two streaming variants, so the
+oracle core never depends on a specific client library. All of them accept
+an optional ``timeout`` in seconds (the remaining time of the request's
+deadline) and raise ``TimeoutError`` when it is exceeded.
+
+Backends are registered per model type:
+
+    register_backend(ModelType.OLLAMA, OllamaBackend)
+
+and created with ``create_backend(settings, api_key)``. Built-in backends:
+    ollama: Ollama server through a pooled ``ollama.Client`` / ``ollama.AsyncClient``
+    genai:  Google Generative AI
+    stub:   deterministic in-process answers with configurable latency and
+            token rate, for tests and load tests without a model server
+
+Backends may additionally implement ``continue_dialogue`` /
+``acontinue_dialogue``: they return the answer together with an opaque
+conversation state, which the oracle hands back on the next dialogue turn
+so the backend does not need the history as text again.
+"""
+
+import asyncio
+import hashlib
+import time
+import logging
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+    runtime_checkable
+)
+import google.generativeai as genai
+import httpx
+import ollama
+
+from ..config import Settings
+from ..enums import ModelType
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, str]
+
+@runtime_checkable
+class ModelBackend(Protocol):
+    """Interface of a language model backend."""
+
+    def complete(self, messages: Sequence[Message], timeout: Optional[float] = None) -> str:
+        """Get the complete answer to a conversation."""
+        ...
+
+    async def acomplete(self, messages: Sequence[Message], timeout: Optional[float] = None) -> str:
+        """Get the complete answer without blocking the event loop."""
+        ...
+
+    def stream(self, messages: Sequence[Message], timeout: Optional[float] = None) -> Iterator[str]:
+        """Yield the answer in pieces as they are generated."""
+        ...
+
+    def astream(self, messages: Sequence[Message], timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Asynchronously yield the answer in pieces as they are generated."""
+        ...
+
+BackendFactory = Callable[[Settings, Optional[str]], ModelBackend]
+
+_TRANSCRIPT_LABELS = {'user': 'Frage', 'assistant': 'Antwort'}
+
+def _close(chunks: Iterator[Any]) -> None:
+    """End a streamed HTTP response instead of leaving it to the garbage collector."""
+    close = getattr(chunks, 'close', None)
+    if close is not None:
+        close()
+
+async def _aclose(chunks: AsyncIterator[Any]) -> None:
+    """Asynchronous counterpart of ``_close``."""
+    aclose = getattr(chunks, 'aclose', None)
+    if aclose is not None:
+        await aclose()
+
+def _discard_async_client(client: 'ollama.AsyncClient', loop: asyncio.AbstractEventLoop) -> None:
+    """
+    Close the client of another event loop on that loop.
+
+    A closed loop has already dropped its connections, and a loop that is not
+    running cannot close them, so the client is only released then.
+    """
+    if loop.is_running() and not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(client.close(), loop)
+
+class OllamaBackend:
+    """
+    Backend for an Ollama server.
+
+    The backend owns one ``ollama.Client`` with a pool of keep-alive
+    connections (plus one ``ollama.AsyncClient`` per event loop), so
+    consecutive requests reuse open connections. Requests with a deadline
+    go through a client built for the call on the same pool, whose read
+    timeout is the remaining time, so a stalled server cannot hold them past
+    the deadline. Every request asks the server to keep the model loaded for
+    ``ollama_keep_alive``. Dialogue turns use ``generate`` and continue from
+    the returned ``context``.
+
+    Args:
+        settings (Settings): Oracle settings (``active_model`` and ``ollama_*``).
+        api_key (Optional[str]): Unused.
+    """
+
+    def __init__(self, settings: Settings, api_key: Optional[str] = None):
+        self.model = settings.active_model
+        self.keep_alive = settings.ollama_keep_alive
+        self._client_options = {
+            'host': settings.ollama_host,
+            'timeout': httpx.Timeout(
+                settings.ollama_timeout,
+                connect=settings.ollama_connect_timeout
+            ),
+            'limits': httpx.Limits(
+                max_connections=settings.ollama_pool_size,
+                max_keepalive_connections=settings.ollama_pool_size
+            )
+        }
+        self._connect_timeout = settings.ollama_connect_timeout
+        self._transport = httpx.HTTPTransport(limits=self._client_options['limits'])
+        self.client = ollama.Client(
+            host=settings.ollama_host,
+            timeout=self._client_options['timeout'],
+            transport=self._transport
+        )
+        self._async_client: Optional[ollama.AsyncClient] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_async_client(self) -> ollama.AsyncClient:
+        """
+        Get the asynchronous client of the running event loop.
+
+        The underlying connection pool is bound to the loop it was created
+        in, so a new client is created when the backend is used from another
+        loop, and the client of the previous loop is closed there.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            previous, previous_loop = self._async_client, self._async_loop
+            self._async_client = ollama.AsyncClient(**self._client_options)
+            self._async_loop = loop
+            if previous is not None:
+                _discard_async_client(previous, previous_loop)
+        return self._async_client
+
+    def _client_for(self, timeout: Optional[float]) -> ollama.Client:
+        """
+        Get a client whose reads end at the deadline.
+
+        The client shares the connection pool of ``self.client`` and must not
+        be closed, since that would close the pool.
+        """
+        if timeout is None:
+            return self.client
+        timeout = max(timeout, 0.001)
+        return ollama.Client(
+            host=self._client_options['host'],
+            timeout=httpx.Timeout(timeout, connect=min(self._connect_timeout, timeout)),
+            transport=self._transport
+        )
+
+    def warm_up(self) -> None:
+        """Load the model into memory with an empty request."""
+        self.client.generate(model=self.model, prompt='', keep_alive=self.keep_alive)
+        logger.info(f"Warmed up Ollama model {self.model}")
+
+    async def awarm_up(self) -> None:
+        """Asynchronous counterpart of ``warm_up``."""
+        await self._get_async_client().generate(
+            model=self.model, prompt='', keep_alive=self.keep_alive
+        )
+        logger.info(f"Warmed up Ollama model {self.model}")
+
+    def complete(self, messages: Sequence[Message], timeout: Optional[float] = None) -> str:
+        if timeout is not None:
+            # The read timeout only bounds each read; stream to check the whole deadline
+            return ''.join(self.stream(messages, timeout))
+        response = self.client.chat(
+            model=self.model,
+            messages=list(messages),
+            keep_alive=self.keep_alive
+        )
+        return response['message']['content']
+
+    async def acomplete(self, messages: Sequence[Message], timeout: Optional[float] = None) -> str:
+        response = await asyncio.wait_for(
+            self._get_async_client().chat(
+                model=self.model,
+                messages=list(messages),
+                keep_alive=self.keep_alive
+            ),
+            timeout
+        )
+        return response['message']['content']
+
+    def stream(self, messages: Sequence[Message], timeout: Optional[float] = None) -> Iterator[str]:
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        chunks = self._client_for(timeout).chat(
+            model=self.model,
+            messages=list(messages),
+            stream=True,
+            keep_alive=self.keep_alive
+        )
+        try:
+            for chunk in chunks:
+                if expires_at is not None and time.monotonic() > expires_at:
+                    raise TimeoutError(f"Ollama request exceeded {timeout:.1f}s")
+                yield chunk['message']['content']
+        finally:
+            _close(chunks)
+
+    async def astream(self, messages: Sequence[Message], timeout: Optional[float] = None) -> AsyncIterator[str]:
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        chunks = await asyncio.wait_for(
+            self._get_async_client().chat(
+                model=self.model,
+                messages=list(messages),
+                stream=True,
+                keep_alive=self.keep_alive
+            ),
+            timeout
+        )
+        iterator = chunks.__aiter__()
+        try:
+            while True:
+                remaining = None if expires_at is None else max(0.0, expires_at - time.monotonic())
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), remaining)
+                except StopAsyncIteration:
+                    return
+                yield chunk['message']['content']
+        finally:
+            await _aclose(chunks)
+
+    @staticmethod
+    def _generate_request(messages: Sequence[Message], state: Optional[List[int]]) -> Dict[str, Any]:
+        """
+        Build the ``generate`` arguments of a dialogue turn.
+
+        With a state only the new question is sent; the system prompt and
+        history are already part of the context. Without, they are sent as
+        system prompt and a transcript of the turns.
+        """
+        if state:
+            return {'prompt': messages[-1]['content'], 'context': state}
+        system = [m['content'] for m in messages if m['role'] == 'system']
+        turns = [m for m in messages if m['role'] != 'system']
+        if len(turns) == 1:
+            prompt = turns[0]['content']
+        else:
+            prompt = '\n\n'.join(
+                f"{_TRANSCRIPT_LABELS.get(m['role'], m['role'])}: {m['content']}"
+                for m in turns
+            )
+        request = {'prompt': prompt}
+        if system:
+            request['system'] = system[0]
+        return request
+
+    def continue_dialogue(
+        self,
+        messages: Sequence[Message],
+        state: Optional[List[int]] = None,
+        timeout: Optional[float] = None
+    ) -> Tuple[str, Optional[List[int]]]:
+        """
+        Answer a dialogue turn and return Ollama's ``context`` for the next one.
+
+        Args:
+            messages (Sequence[Message]): System prompt, history and question.
+            state (Optional[List[int]]): Context of the previous turn, None
+                to start from the messages.
+            timeout (Optional[float]): Seconds until the deadline.
+
+        Returns:
+            Tuple[str, Optional[List[int]]]: The answer and the new context.
+        """
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        parts, context = [], None
+        chunks = self._client_for(timeout).generate(
+            model=self.model,
+            stream=True,
+            keep_alive=self.keep_alive,
+            **self._generate_request(messages, state)
+        )
+        try:
+            for chunk in chunks:
+                if expires_at is not None and time.monotonic() > expires_at:
+                    raise TimeoutError(f"Ollama request exceeded {timeout:.1f}s")
+                parts.append(chunk['response'])
+                if chunk.get('done'):
+                    context = chunk.get('context')
+        finally:
+            _close(chunks)
+        return ''.join(parts), context
+
+    async def acontinue_dialogue(
+        self,
+        messages: Sequence[Message],
+        state: Optional[List[int]] = None,
+        timeout: Optional[float] = None
+    ) -> Tuple[str, Optional[List[int]]]:
+        """Asynchronous counterpart of ``continue_dialogue``."""
+        response = await asyncio.wait_for(
+            self._get_async_client().generate(
+                model=self.model,
+                keep_alive=self.keep_alive,
+                **self._generate_request(messages, state)
+            ),
+            timeout
+        )
+        return response['response'], response.get('context')
+
+    def close(self) -> None:
+        """Close the pooled connections of the synchronous client."""
+        self.client.close()
+
+_genai_api_key: Optional[str] = None
+
+def _configure_genai(api_key: Optional[str]) -> None:
+    """Configure the process-global GenAI client unless the key is already set."""
+    global _genai_api_key
+    if api_key is None or api_key != _genai_api_key:
+        genai.configure(api_key=api_key)
+        _genai_api_key = api_key
+
+class GenAIBackend:
+    """
+    Backend for Google Generative AI.
+
+    The system message becomes the model's system instruction, the remaining
+    messages are sent as conversation contents. One model object is kept
+    per distinct system prompt.
+
+    Args:
+        settings (Settings): Oracle settings, ``active_model`` is the model name.
+        api_key (Optional[str]): The GenAI API key.
+    """
+
+    def __init__(self, settings: Settings, api_key: Optional[str] = None):
+        _configure_genai(api_key)
+        self.model_name = settings.active_model
+        self._models: Dict[Optional[str], genai.GenerativeModel] = {}
+
+    def _prepare(self, messages: Sequence[Message]) -> Tuple[genai.GenerativeModel, List[Dict]]:
+        """Split the messages into the model for the system prompt and the contents."""
+        system_prompt = None
+        contents = []
+        for message in messages:
+            if message['role'] == 'system':
+                system_prompt = message['content']
+            else:
+                role = 'model' if message['role'] == 'assistant' else 'user'
+                contents.append({'role': role, 'parts': [message['content']]})
+
+        model = self._models.get(system_prompt)
+        if model is None:
+            model = genai.GenerativeModel(
+                model_name=self.model_name,
+                system_instruction=system_prompt
+            )
+            self._models[system_prompt] = model
+        return model, contents
+
+    def prepare(self, system_prompt: str) -> None:
+        """Create the model of a system prompt ahead of the first request."""
+        self._prepare([{'role': 'system', 'content': system_prompt}])
+
+    @staticmethod
+    def _text(response) -> str:
+        if not response or not hasattr(response, 'text'):
+            raise ValueError("No valid response received from GenAI")
+        return response.text
+
+    @staticmethod
+    def _request_options(timeout: Optional[float]) -> Dict[str, float]:
+        return {} if timeout is None else {'timeout': timeout}
+
+    def complete(self, messages: Sequence[Message], timeout: Optional[float] = None) -> str:
+        model, contents = self._prepare(messages)
+        return self._text(model.generate_content(
+            contents, request_options=self._request_options(timeout)
+        ))
+
+    async def acomplete(self, messages: Sequence[Message], timeout: Optional[float] = None) -> str:
+        model, contents = self._prepare(messages)
+        return self._text(await model.generate_content_async(
+            contents, request_options=self._request_options(timeout)
+        ))
+
+    def stream(self, messages: Sequence[Message], timeout: Optional[float] = None) -> Iterator[str]:
+        model, contents = self._prepare(messages)
+        for chunk in model.generate_content(
+            contents, stream=True, request_options=self._request_options(timeout)
+        ):
+            yield chunk.text
+
+    async def astream(self, messages: Sequence[Message], timeout: Optional[float] = None) -> AsyncIterator[str]:
+        model, contents = self._prepare(messages)
+        chunks = await model.generate_content_async(
+            contents, stream=True, request_options=self._request_options(timeout)
+        )
+        async for chunk in chunks:
+            yield chunk.text
+
+_STUB_WORDS = (
+    'Der', 'Weise', 'wartet', 'geduldig', 'auf', 'die', 'rechte', 'Zeit',
+    'Beharrlichkeit', 'bringt', 'Heil', 'Wasser', 'fließt', 'stetig', 'zum',
+    'Meer', 'Reue', 'schwindet', 'Berg', 'Donner', 'Wind', 'Himmel', 'Erde',
+    'das', 'Kleine', 'geht', 'Große', 'kommt', 'Wandel', 'und', 'Dauer'
+)
+
+class StubBackend:
+    """
+    Deterministic in-process backend without a model server.
+
+    The answer is derived from a hash of the conversation, so equal messages
+    always produce the same answer. Latency and token rate simulate the
+    timing of a real model for benchmarks and load tests.
+
+    Args:
+        settings (Optional[Settings]): Oracle settings. ``stub_latency`` and
+            ``stub_token_rate`` are used unless given explicitly.
+        api_key (Optional[str]): Unused.
+        latency (Optional[float]): Seconds before the first token.
+        token_rate (Optional[float]): Tokens per second, None for no delay.
+        answer_tokens (int): Number of words per answer.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        api_key: Optional[str] = None,
+        latency: Optional[float] = None,
+        token_rate: Optional[float] = None,
+        answer_tokens: int = 24
+    ):
+        if latency is None:
+            latency = settings.stub_latency if settings is not None else 0.0
+        if token_rate is None and settings is not None:
+            token_rate = settings.stub_token_rate
+        if latency < 0 or (token_rate is not None and token_rate <= 0):
+            raise ValueError("Latency must be >= 0 and token rate > 0")
+        self.latency = latency
+        self.token_rate = token_rate
+        self.answer_tokens = answer_tokens
+        self.calls = 0
+
+    def tokens(self, messages: Sequence[Message]) -> List[str]:
+        """Get the deterministic answer tokens of a conversation."""
+        digest = hashlib.sha256()
+        for message in messages:
+            digest.update(f"{message['role']}\0{message['content']}\0".encode('utf-8'))
+        seed = digest.digest()
+        words = [
+            _STUB_WORDS[seed[i % len(seed)] % len(_STUB_WORDS)]
+            for i in range(self.answer_tokens)
+        ]
+        return [word + ('.' if i == len(words) - 1 else ' ') for i, word in enumerate(words)]
+
+    def _delay(self, index: int) -> float:
+        """Seconds to wait before yielding the token at ``index``."""
+        delay = self.latency if index == 0 else 0.0
+        if self.token_rate is not None:
+            delay += 1.0 / self.token_rate
+        return delay
+
+    def _schedule(self, messages: Sequence[Message], timeout: Optional[float]) -> Iterator[Tuple[float, Optional[str]]]:
+        """
+        Pair each token with its delay. If the answer would exceed the
+        timeout, the last pair waits out the remaining time with token None.
+        """
+        self.calls += 1
+        elapsed = 0.0
+        for index, token in enumerate(self.tokens(messages)):
+            delay = self._delay(index)
+            if timeout is not None and elapsed + delay > timeout:
+                yield timeout - elapsed, None
+                return
+            elapsed += delay
+            yield delay, token
+
+    def complete(self, messages: Sequence[Message], timeout: Optional[float] = None) -> str:
+        return ''.join(self.stream(messages, timeout))
+
+    async def acomplete(self, messages: Sequence[Message], timeout: Optional[float] = None) -> str:
+        return ''.join([token async for token in self.astream(messages, timeout)])
+
+    def stream(self, messages: Sequence[Message], timeout: Optional[float] = None) -> Iterator[str]:
+        for delay, token in self._schedule(messages, timeout):
+            if delay:
+                time.sleep(delay)
+            if token is None:
+                raise TimeoutError(f"Stub answer exceeded {timeout:.1f}s")
+            yield token
+
+    async def astream(self, messages: Sequence[Message], timeout: Optional[float] = None) -> AsyncIterator[str]:
+        for delay, token in self._schedule(messages, timeout):
+            if delay:
+                await asyncio.sleep(delay)
+            if token is None:
+                raise TimeoutError(f"Stub answer exceeded {timeout:.1f}s")
+            yield token
+
+_BACKENDS: Dict[str, BackendFactory] = {}
+
+def register_backend(model_type: Union[ModelType, str], factory: BackendFactory) -> None:
+    """
+    Register (or replace) the backend of a model type.
+
+    Args:
+        model_type (Union[ModelType, str]): The model type the backend serves.
+        factory (BackendFactory): Callable taking the settings and the API key
+            and returning a ``ModelBackend``; usually the backend class.
+    """
+    _BACKENDS[str(getattr(model_type, 'value', model_type))] = factory
+    logger.debug(f"Registered model backend {model_type}: {factory}")
+
+def available_backends() -> List[str]:
+    """Get the names of all registered backends."""
+    return sorted(_BACKENDS)
+
+def create_backend(settings: Settings, api_key: Optional[str] = None) -> ModelBackend:
+    """
+    Create the backend for ``settings.model_type``.
+
+    Raises:
+        ValueError: If no backend is registered for the model type.
+    """
+    name = str(getattr(settings.model_type, 'value', settings.model_type))
+    try:
+        factory = _BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown model type: {name}. "
+            f"Available backends: {', '.join(available_backends())}"
+        ) from None
+    return factory(settings, api_key)
+
+register_backend(ModelType.OLLAMA, OllamaBackend)
+register_backend(ModelType.GENAI, GenAIBackend)
+register_backend(ModelType.STUB, StubBackend)
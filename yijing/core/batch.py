@@ -0,0 +1,162 @@
+# yijing/core/batch.py
+
+"""
+Batch Module
+===========
+Runs many consultations with bounded concurrency.
+
+Items are taken lazily from the input, so a job of any size keeps at most
+``concurrency`` consultations (and their futures or tasks) in memory. Results
+are yielded in completion order; each one carries the index of its item, and
+a failed consultation is reported as a result with ``error`` instead of
+aborting the whole batch. An invalid ``concurrency`` raises right away, not
+only when the results are first iterated.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import islice
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    TypeVar
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+@dataclass(frozen=True)
+class BatchResult(Generic[T]):
+    """
+    Outcome of one item of a batch.
+
+    Attributes:
+        index (int): Position of the item in the input.
+        item (T): The item itself, usually the question.
+        response (Optional[Dict[str, Any]]): The result, None on failure.
+        error (Optional[BaseException]): The exception of a failed item,
+            ``asyncio.CancelledError`` if its task was cancelled.
+    """
+    index: int
+    item: T
+    response: Optional[Dict[str, Any]] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def _check_concurrency(concurrency: int) -> None:
+    if concurrency < 1:
+        raise ValueError(f"Concurrency must be at least 1, got {concurrency}")
+
+def run_batch(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    concurrency: int
+) -> Iterator[BatchResult[T]]:
+    """
+    Call ``fn`` for every item in a thread pool.
+
+    Args:
+        fn (Callable[[T], R]): Function processing one item.
+        items (Iterable[T]): The items, consumed lazily.
+        concurrency (int): Maximum number of items processed at once.
+
+    Returns:
+        Iterator[BatchResult[T]]: One result per item, in completion order.
+
+    Raises:
+        ValueError: If ``concurrency`` is less than 1.
+    """
+    _check_concurrency(concurrency)
+    return _run_batch(fn, items, concurrency)
+
+def _run_batch(fn: Callable[[T], R], items: Iterable[T], concurrency: int) -> Iterator[BatchResult[T]]:
+    numbered = enumerate(items)
+    pending: Dict[Future, Tuple[int, T]] = {}
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='yijing-batch') as pool:
+        try:
+            while True:
+                for index, item in islice(numbered, concurrency - len(pending)):
+                    pending[pool.submit(fn, item)] = (index, item)
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, item = pending.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        yield BatchResult(index, item, error=error)
+                    else:
+                        yield BatchResult(index, item, future.result())
+        finally:
+            # Closed early by the consumer: skip what has not started yet
+            for future in pending:
+                future.cancel()
+
+def arun_batch(
+    fn: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    concurrency: int
+) -> AsyncIterator[BatchResult[T]]:
+    """
+    Await ``fn`` for every item as tasks of the running event loop.
+
+    Closing the iterator early cancels the consultations still running.
+
+    Args:
+        fn (Callable[[T], Awaitable[R]]): Coroutine function processing one item.
+        items (Iterable[T]): The items, consumed lazily.
+        concurrency (int): Maximum number of items processed at once.
+
+    Returns:
+        AsyncIterator[BatchResult[T]]: One result per item, in completion order.
+
+    Raises:
+        ValueError: If ``concurrency`` is less than 1.
+    """
+    _check_concurrency(concurrency)
+    return _arun_batch(fn, items, concurrency)
+
+async def _arun_batch(
+    fn: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    concurrency: int
+) -> AsyncIterator[BatchResult[T]]:
+    numbered = enumerate(items)
+    pending: Dict[asyncio.Task, Tuple[int, T]] = {}
+    try:
+        while True:
+            for index, item in islice(numbered, concurrency - len(pending)):
+                pending[asyncio.ensure_future(fn(item))] = (index, item)
+            if not pending:
+                return
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, item = pending.pop(task)
+                if task.cancelled():
+                    yield BatchResult(index, item, error=asyncio.CancelledError())
+                    continue
+                error = task.exception()
+                if error is not None:
+                    yield BatchResult(index, item, error=error)
+                else:
+                    yield BatchResult(index, item, task.result())
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
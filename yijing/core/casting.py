@@ -0,0 +1,162 @@
+# yijing/core/casting.py
+
+"""
+Casting Methods Module
+=====================
+Registry of casting methods and their line value probabilities.
+
+Each method is compiled once into an alias table (Walker/Vose), so drawing a
+line value costs a single uniform random number regardless of the method.
+Single casts and batch casts draw through the same vectorized sampler, so a
+seed gives the same lines either way.
+
+Built-in methods:
+    uniform:    6, 7, 8, 9 with equal probability
+    three_coin: 1/8, 3/8, 3/8, 1/8
+    yarrow:     1/16, 5/16, 7/16, 3/16
+"""
+
+import logging
+from typing import Dict, Mapping, Tuple, Union
+import numpy as np
+
+from ..constants import VALID_LINE_VALUES
+from ..enums import CastingMethod
+
+logger = logging.getLogger(__name__)
+
+class AliasSampler:
+    """
+    O(1) sampler for a discrete distribution over line values.
+
+    Args:
+        weights (Mapping[int, float]): Relative weight per line value (6-9).
+            Values that are missing get weight zero.
+
+    Raises:
+        ValueError: If a key is not a valid line value, a weight is negative
+            or all weights are zero.
+    """
+
+    def __init__(self, weights: Mapping[int, float]):
+        invalid = set(weights) - set(VALID_LINE_VALUES)
+        if invalid:
+            raise ValueError(f"Invalid line values in weights: {sorted(invalid)}")
+        if any(w < 0 for w in weights.values()):
+            raise ValueError("Weights must not be negative")
+
+        total = float(sum(weights.values()))
+        if total <= 0:
+            raise ValueError("At least one weight must be positive")
+
+        self.values: Tuple[int, ...] = VALID_LINE_VALUES
+        self.probabilities: Tuple[float, ...] = tuple(
+            weights.get(value, 0) / total for value in self.values
+        )
+        self._prob, self._alias = self._build_table(self.probabilities)
+
+        # Array versions of the table for batch sampling
+        self._values_array = np.array(self.values, dtype=np.uint8)
+        self._prob_array = np.array(self._prob, dtype=np.float64)
+        self._alias_array = np.array(self._alias, dtype=np.intp)
+
+    @staticmethod
+    def _build_table(probabilities: Tuple[float, ...]) -> Tuple[Tuple[float, ...], Tuple[int, ...]]:
+        """Build the probability and alias columns with Vose's method."""
+        k = len(probabilities)
+        scaled = [p * k for p in probabilities]
+        prob = [1.0] * k
+        alias = list(range(k))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+
+        # Remaining columns are full (up to rounding errors)
+        for i in small + large:
+            prob[i] = 1.0
+
+        return tuple(prob), tuple(alias)
+
+    def sample_array(self, size: Union[int, Tuple[int, ...]], rng: np.random.Generator) -> np.ndarray:
+        """
+        Draw many line values at once.
+
+        Args:
+            size (Union[int, Tuple[int, ...]]): Shape of the result.
+            rng (np.random.Generator): NumPy random generator.
+
+        Returns:
+            np.ndarray: ``uint8`` array of line values.
+        """
+        u = rng.random(size) * len(self.values)
+        columns = u.astype(np.intp)
+        keep = (u - columns) < self._prob_array[columns]
+        return self._values_array[np.where(keep, columns, self._alias_array[columns])]
+
+    def __repr__(self) -> str:
+        pairs = ", ".join(
+            f"{value}: {p:.4f}" for value, p in zip(self.values, self.probabilities)
+        )
+        return f"AliasSampler({{{pairs}}})"
+
+# Registry of compiled samplers, keyed by method name
+_CASTING_METHODS: Dict[str, AliasSampler] = {}
+
+def register_casting_method(name: str, weights: Mapping[int, float]) -> AliasSampler:
+    """
+    Register (or replace) a casting method.
+
+    Args:
+        name (str): Name of the method.
+        weights (Mapping[int, float]): Relative weight per line value (6-9).
+
+    Returns:
+        AliasSampler: The compiled sampler for the method.
+    """
+    sampler = AliasSampler(weights)
+    _CASTING_METHODS[str(getattr(name, 'value', name))] = sampler
+    logger.debug(f"Registered casting method {name}: {sampler}")
+    return sampler
+
+def get_casting_method(method: Union[CastingMethod, str, AliasSampler]) -> AliasSampler:
+    """
+    Look up the sampler of a casting method.
+
+    Args:
+        method (Union[CastingMethod, str, AliasSampler]): Method name, enum
+            member or an already compiled sampler.
+
+    Returns:
+        AliasSampler: The compiled sampler.
+
+    Raises:
+        ValueError: If no method with the given name is registered.
+    """
+    if isinstance(method, AliasSampler):
+        return method
+
+    name = str(getattr(method, 'value', method))
+    try:
+        return _CASTING_METHODS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown casting method: {name}. "
+            f"Available methods: {', '.join(sorted(_CASTING_METHODS))}"
+        ) from None
+
+def available_casting_methods() -> Tuple[str, ...]:
+    """Get the names of all registered casting methods."""
+    return tuple(sorted(_CASTING_METHODS))
+
+# Compile the built-in methods once at import time
+register_casting_method(CastingMethod.UNIFORM, {6: 1, 7: 1, 8: 1, 9: 1})
+register_casting_method(CastingMethod.THREE_COIN, {6: 1, 7: 3, 8: 3, 9: 1})
+register_casting_method(CastingMethod.YARROW, {6: 1, 7: 5, 8: 7, 9: 3})
@@ -0,0 +1,539 @@
+# yijing/core/commentary.py
+
+"""
+Commentary Module
+================
+Segments the commentary corpus ``resources/yijing.txt`` by hexagram and section.
+
+The file holds one block per hexagram, in the order of the ``hexagram_json``
+numbering, and repeats every block three times. A block consists of
+
+    a header line   ``NAME / TITLE`` with meaning, ``Das Urteil`` and ``DAS BILD``
+    a lines line    ``Die einzelnen Linien`` with one paragraph per line
+
+followed by the same text once more without the name, which is skipped.
+Hexagrams are identified by the title of their JSON file, because some
+headers carry King Wen numbers or variant spellings of the name. Only the
+first copy of each block is used. Segments are byte ranges into the file,
+keyed by the section names of the corpus artifact (``hexagram``,
+``judgment``, ``image``, ``lines.0`` to ``lines.5``).
+
+The segmentation runs once; its offsets are stored in ``yijing.offsets.json``
+together with the hexagram names and the SHA-256 digest of the file and the
+names. The map is written to the directory configured as
+``commentary_cache_dir`` (default: next to the corpus), or kept in memory if
+that directory is not writable. ``CommentaryText`` maps the corpus and
+slices single sections out of it without reading the whole file; the shared
+instance is reopened when the corpus or the map changes, checked at most
+once per ``CHECK_INTERVAL`` seconds. Rebuild the offsets after editing the
+hexagram names:
+
+    python -m yijing.core.commentary [resources_dir]
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from ..exceptions import ResourceValidationError
+from .artifact import HEXAGRAM_TOTAL, SECTIONS
+
+logger = logging.getLogger(__name__)
+
+COMMENTARY_FILE = 'yijing.txt'
+MAP_SUFFIX = '.offsets.json'
+MAP_VERSION = 2
+CHECK_INTERVAL = 1.0
+
+_HEADER = re.compile(r'(?:\d+\s+)?[A-ZÄÖÜ][A-ZÄÖÜ. ]*/\s*(.+)')
+_LINES = re.compile(r'Die [eE]inzelnen Linien')
+_NAVIGATION = re.compile(r'\s*<< zurück(?: weiter >>)?\s*$'.encode('utf-8'))
+_NAVIGATION_LABEL = 'Unbekannt'
+_JUNK = ('Unbekannt I-Ging', 'Unbekannter chinesischer Autor', '----')
+_JUDGMENT = re.compile(r'Das Urteil\b')
+_IMAGE = re.compile(r'DAS BILD\b')
+_LINE_MARKER = re.compile(
+    r'(?:(Anfangs) (?:eine|[Dd]ie)(?: \w+)?'
+    r'|(?:Neun|Sechs) auf (zweitem|drittem|viertem|fünftem) Platz'
+    r'|(Oben) (?:eine|[Dd]ie)(?: \w+)?) bedeutet'
+)
+_SENTENCE_END = re.compile(r'(?<=[.!?«"])\s+')
+_LINE_INDEX = {
+    'Anfangs': 0, 'zweitem': 1, 'drittem': 2, 'viertem': 3, 'fünftem': 4, 'Oben': 5
+}
+
+class CommentarySegment(NamedTuple):
+    """
+    Byte range of one section of a hexagram's commentary.
+
+    Attributes:
+        number (int): Hexagram number as in ``hexagram_json`` (1-64).
+        section (str): One of the artifact's ``SECTIONS``.
+        start (int): Offset of the first byte.
+        end (int): Offset after the last byte.
+    """
+    number: int
+    section: str
+    start: int
+    end: int
+
+def default_commentary_path(resources_path: Path) -> Path:
+    """Get the commentary corpus of a resources directory."""
+    return Path(resources_path) / COMMENTARY_FILE
+
+def load_hexagram_names(source_dir: Path) -> Dict[int, str]:
+    """
+    Read the names (``NAME / TITLE``) of all hexagram JSON files.
+
+    Raises:
+        FileNotFoundError: If a hexagram file is missing.
+    """
+    names = {}
+    for number in range(1, HEXAGRAM_TOTAL + 1):
+        path = Path(source_dir) / f'hexagram_{number:02d}.json'
+        with open(path, 'r', encoding='utf-8') as f:
+            names[number] = json.load(f)['hexagram']['name']
+    return names
+
+def _header_number(text: str, titles: Dict[str, int]) -> Optional[int]:
+    """Get the hexagram a header line introduces, None for other lines."""
+    match = _HEADER.match(text)
+    if match is None:
+        return None
+    rest = match.group(1).upper()
+    matches = [title for title in titles if rest.startswith(title)]
+    return titles[max(matches, key=len)] if matches else None
+
+def _lines(data: bytes) -> Iterator[Tuple[int, int, str, bool]]:
+    """
+    Yield start, end and stripped text of the non-empty lines.
+
+    Trailing ``<< zurück weiter >>`` links are cut off; the last value tells
+    whether a line ended with one.
+    """
+    position = 0
+    for raw in data.split(b'\n'):
+        line_start, position = position, position + len(raw) + 1
+        navigation = _NAVIGATION.search(raw)
+        if navigation is not None:
+            raw = raw[:navigation.start()]
+        stripped = raw.strip()
+        if stripped:
+            start = line_start + len(raw) - len(raw.lstrip())
+            yield start, start + len(stripped), stripped.decode('utf-8'), navigation is not None
+
+def _byte_range(text: str, index: int, bound: int, base: int) -> Tuple[int, int]:
+    """Byte offsets of ``text[index:bound]`` without trailing whitespace."""
+    start = base + len(text[:index].encode('utf-8'))
+    return start, start + len(text[index:bound].rstrip().encode('utf-8'))
+
+def _split(
+    data: bytes,
+    start: int,
+    end: int,
+    first: str,
+    markers: List[Tuple[str, re.Pattern]]
+) -> Iterator[Tuple[str, int, int]]:
+    """Split a byte range at the first match of each marker after the previous one."""
+    text = data[start:end].decode('utf-8')
+    cuts = [(first, 0)]
+    position = 0
+    for section, pattern in markers:
+        match = pattern.search(text, position)
+        if match is not None:
+            cuts.append((section, match.start()))
+            position = match.end()
+    bounds = [index for _, index in cuts[1:]] + [len(text)]
+    for (section, index), bound in zip(cuts, bounds):
+        yield (section,) + _byte_range(text, index, bound, start)
+
+def _line_sections(data: bytes, start: int, end: int) -> Iterator[Tuple[str, int, int]]:
+    """Split the lines paragraph at the line markers, keeping the first of each line."""
+    text = data[start:end].decode('utf-8')
+    cuts: List[Tuple[int, int]] = []
+    for match in _LINE_MARKER.finditer(text):
+        index = _LINE_INDEX[next(group for group in match.groups() if group)]
+        if not cuts or index > cuts[-1][0]:
+            cuts.append((index, match.start()))
+    bounds = [position for _, position in cuts[1:]] + [len(text)]
+    for (index, position), bound in zip(cuts, bounds):
+        yield (f'lines.{index}',) + _byte_range(text, position, bound, start)
+
+def segment_commentary(data: bytes, names: Dict[int, str]) -> List[CommentarySegment]:
+    """
+    Find the sections of every hexagram in the commentary corpus.
+
+    Args:
+        data (bytes): Content of ``yijing.txt``.
+        names (Dict[int, str]): Hexagram names by number, as returned by
+            ``load_hexagram_names``.
+
+    Returns:
+        List[CommentarySegment]: Segments ordered by hexagram and position.
+            Sections missing in the text are left out.
+    """
+    titles = {name.split(' / ', 1)[-1].upper(): number for number, name in names.items()}
+    blocks: Dict[int, List[Tuple[int, int, str]]] = {}
+    current: Optional[List[Tuple[int, int, str]]] = None
+    for start, end, text, navigation in _lines(data):
+        if navigation and text.endswith(_NAVIGATION_LABEL):
+            # Link bar between two blocks
+            current = None
+            continue
+        number = _header_number(text, titles)
+        if number is not None:
+            current = None if number in blocks else blocks.setdefault(number, [])
+        if current is not None and not text.startswith(_JUNK):
+            current.append((start, end, text))
+
+    segments = []
+    for number in sorted(blocks):
+        block = blocks[number]
+        split = next(
+            (i for i, (_, _, text) in enumerate(block) if _LINES.match(text)), len(block)
+        )
+        head, body = block[:split], block[split:split + 1]
+        if head:
+            markers = [('judgment', _JUDGMENT), ('image', _IMAGE)]
+            for section, start, end in _split(data, head[0][0], head[-1][1], 'hexagram', markers):
+                segments.append(CommentarySegment(number, section, start, end))
+        if body:
+            for section, start, end in _line_sections(data, body[0][0], body[0][1]):
+                segments.append(CommentarySegment(number, section, start, end))
+    return segments
+
+def split_segment(data: bytes, segment: CommentarySegment, max_chars: int) -> List[CommentarySegment]:
+    """
+    Split a long segment at sentence ends into parts of about ``max_chars``.
+
+    Sentences longer than ``max_chars`` are not split.
+
+    Args:
+        data (bytes): Content of ``yijing.txt``.
+        segment (CommentarySegment): The segment to split.
+        max_chars (int): Preferred maximum number of characters per part.
+
+    Returns:
+        List[CommentarySegment]: Consecutive parts with the segment's
+            number and section.
+    """
+    text = data[segment.start:segment.end].decode('utf-8')
+    ends = [match.start() for match in _SENTENCE_END.finditer(text)] + [len(text)]
+    parts = []
+    begin = previous = 0
+    for end in ends:
+        if end - begin > max_chars and previous > begin:
+            parts.append((begin, previous))
+            begin = _SENTENCE_END.match(text, previous).end()
+        previous = end
+    parts.append((begin, len(text)))
+    return [
+        segment._replace(start=start, end=end)
+        for start, end in (_byte_range(text, b, e, segment.start) for b, e in parts)
+    ]
+
+def default_map_path(source_path: Path, directory: Optional[Path] = None) -> Path:
+    """Get the offset map location in ``directory``, by default next to the commentary corpus."""
+    source_path = Path(source_path)
+    return Path(directory or source_path.parent) / (source_path.stem + MAP_SUFFIX)
+
+def source_digest(source_path: Path, names: Dict[int, str]) -> str:
+    """Compute the SHA-256 digest over the corpus (read through ``mmap``) and the hexagram names."""
+    digest = hashlib.sha256()
+    with open(source_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                digest.update(data)
+    digest.update(json.dumps(names, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+def _signature(path: Optional[Path]) -> Optional[Tuple[int, int]]:
+    if path is None:
+        return None
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _map_payload(source_path: Path, names: Dict[int, str]) -> Dict[str, Any]:
+    """Segment the commentary corpus into the contents of an offset map."""
+    source_path = Path(source_path)
+    stat = source_path.stat()
+    data = source_path.read_bytes()
+
+    hexagrams: Dict[str, Dict[str, List[int]]] = {}
+    for segment in segment_commentary(data, names):
+        hexagrams.setdefault(str(segment.number), {})[segment.section] = [segment.start, segment.end]
+
+    return {
+        'version': MAP_VERSION,
+        'digest': source_digest(source_path, names),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'names': {str(number): name for number, name in names.items()},
+        'hexagrams': hexagrams
+    }
+
+def build_commentary_map(
+    source_path: Path,
+    names: Dict[int, str],
+    map_path: Optional[Path] = None
+) -> Path:
+    """
+    Segment the commentary corpus and store the offsets of all sections.
+
+    Args:
+        source_path (Path): The commentary corpus (``yijing.txt``).
+        names (Dict[int, str]): Hexagram names by number, see ``load_hexagram_names``.
+        map_path (Optional[Path]): Target file. Defaults to
+            ``default_map_path(source_path)``.
+
+    Returns:
+        Path: The path of the written offset map.
+    """
+    source_path = Path(source_path)
+    map_path = Path(map_path or default_map_path(source_path))
+    payload = _map_payload(source_path, names)
+
+    map_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = map_path.with_name(f'{map_path.name}.{os.getpid()}.tmp')
+    temp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding='utf-8')
+    os.replace(temp_path, map_path)
+
+    logger.info(f"Mapped {len(payload['hexagrams'])} hexagrams of {source_path} to {map_path}")
+    return map_path
+
+class CommentaryText:
+    """
+    Read-only, memory-mapped commentary corpus with the offsets of its sections.
+
+    Use ``CommentaryText.for_resources`` to get the instance shared by the
+    whole process, with the offsets built on first use.
+
+    Args:
+        source_path (Path): The commentary corpus (``yijing.txt``).
+        map_path (Optional[Path]): The offset map. Defaults to
+            ``default_map_path(source_path)``.
+        offsets (Optional[Dict[str, Any]]): Contents of an offset map to use
+            instead of reading ``map_path``, see ``CommentaryText.in_memory``.
+
+    Raises:
+        FileNotFoundError: If the corpus or the offset map does not exist.
+        ResourceValidationError: If the offset map is not valid.
+    """
+
+    _instances: Dict[Tuple[Path, Optional[Path]], 'CommentaryText'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        source_path: Path,
+        map_path: Optional[Path] = None,
+        offsets: Optional[Dict[str, Any]] = None
+    ):
+        self.source_path = Path(source_path)
+        if offsets is None:
+            self.map_path: Optional[Path] = Path(map_path or default_map_path(self.source_path))
+            try:
+                offsets = json.loads(self.map_path.read_text(encoding='utf-8'))
+            except json.JSONDecodeError as e:
+                raise ResourceValidationError(str(self.map_path), [str(e)]) from e
+        else:
+            self.map_path = None
+        if not isinstance(offsets, dict) or offsets.get('version') != MAP_VERSION:
+            raise ResourceValidationError(str(self.map_path), ["unsupported format version"])
+
+        self.digest: str = offsets['digest']
+        self.names: Dict[int, str] = {int(number): name for number, name in offsets['names'].items()}
+        self._stat = (offsets['size'], offsets['mtime_ns'])
+        self._offsets: Dict[int, Dict[str, Tuple[int, int]]] = {
+            int(number): {section: tuple(span) for section, span in sections.items()}
+            for number, sections in offsets['hexagrams'].items()
+        }
+        self._sources = (_signature(self.source_path), _signature(self.map_path))
+        self._checked_at = time.monotonic()
+        with open(self.source_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    def in_memory(cls, source_path: Path, names: Dict[int, str]) -> 'CommentaryText':
+        """Segment the commentary corpus without writing an offset map."""
+        return cls(source_path, offsets=_map_payload(source_path, names))
+
+    @classmethod
+    def for_resources(
+        cls,
+        resources_path: Path,
+        cache_dir: Optional[Path] = None
+    ) -> 'CommentaryText':
+        """
+        Get the process-wide commentary of a resources directory.
+
+        The corpus and the offset map are statted at most once per
+        ``CHECK_INTERVAL`` seconds. If either changed, the commentary is
+        reopened, with new offsets if needed. The replaced instance is not
+        closed, since other threads may still read from it; it is unmapped
+        once the last of them drops it.
+
+        Args:
+            resources_path (Path): Directory containing ``yijing.txt`` and
+                ``hexagram_json``.
+            cache_dir (Optional[Path]): Directory the offset map is written
+                to. Defaults to the directory of ``yijing.txt``.
+
+        Returns:
+            CommentaryText: The shared instance.
+        """
+        key = (Path(resources_path).resolve(), None if cache_dir is None else Path(cache_dir).resolve())
+        text = cls._instances.get(key)
+        if text is not None and time.monotonic() - text._checked_at < CHECK_INTERVAL:
+            return text
+        with cls._instances_lock:
+            text = cls._instances.get(key)
+            if text is None or not text._revalidate():
+                text = cls._instances[key] = open_commentary_text(*key)
+        return text
+
+    def _revalidate(self) -> bool:
+        """Check whether corpus and offset map are unchanged since they were opened."""
+        if (_signature(self.source_path), _signature(self.map_path)) != self._sources:
+            logger.debug(f"Commentary corpus {self.source_path} changed, reopening it")
+            return False
+        self._checked_at = time.monotonic()
+        return True
+
+    def __enter__(self) -> 'CommentaryText':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def is_current(self, names: Optional[Dict[int, str]] = None) -> bool:
+        """
+        Check whether the offsets were built from the current corpus.
+
+        Size and modification time are compared first; the digest is only
+        computed when they differ. If it still matches, the new size and
+        modification time are remembered, so the file is hashed only once.
+
+        Args:
+            names (Optional[Dict[int, str]]): The current hexagram names.
+                Only the corpus is checked if omitted.
+        """
+        if names is not None and names != self.names:
+            return False
+        stat = self.source_path.stat()
+        if (stat.st_size, stat.st_mtime_ns) == self._stat:
+            return True
+        if source_digest(self.source_path, self.names) != self.digest:
+            return False
+        self._stat = (stat.st_size, stat.st_mtime_ns)
+        return True
+
+    def segments(self, number: Optional[int] = None) -> List[CommentarySegment]:
+        """Get the segments of one hexagram, or of all hexagrams if None."""
+        numbers = sorted(self._offsets) if number is None else [number]
+        return [
+            CommentarySegment(n, section, start, end)
+            for n in numbers
+            for section, (start, end) in self._offsets.get(n, {}).items()
+        ]
+
+    def section_bytes(self, number: int, section: str) -> Optional[bytes]:
+        """
+        Get the raw text of a single section.
+
+        Args:
+            number (int): Hexagram number (1-64).
+            section (str): Section name, one of the artifact's ``SECTIONS``.
+
+        Returns:
+            Optional[bytes]: The UTF-8 text, None if the corpus lacks the section.
+
+        Raises:
+            ValueError: If the hexagram number or section name is invalid.
+        """
+        if not 1 <= number <= HEXAGRAM_TOTAL:
+            raise ValueError(f"Invalid hexagram number: {number}")
+        if section not in SECTIONS:
+            raise ValueError(f"Unknown section: {section}")
+        span = self._offsets.get(number, {}).get(section)
+        if span is None:
+            return None
+        start, end = span
+        return self._mmap[start:end]
+
+    def section(self, number: int, section: str) -> Optional[str]:
+        """Get the text of a single section, None if the corpus lacks it."""
+        data = self.section_bytes(number, section)
+        return None if data is None else data.decode('utf-8')
+
+    def hexagram(self, number: int) -> Dict[str, str]:
+        """Get the text of all sections of a hexagram, keyed by section name."""
+        return {
+            section: self.section(number, section)
+            for section in SECTIONS if section in self._offsets.get(number, {})
+        }
+
+def ensure_commentary_map(resources_path: Path, map_path: Optional[Path] = None) -> Path:
+    """
+    Build the offset map of a resources directory unless a current one exists.
+
+    Returns:
+        Path: The path of the current offset map.
+    """
+    resources_path = Path(resources_path)
+    source_path = default_commentary_path(resources_path)
+    map_path = Path(map_path or default_map_path(source_path))
+    names = load_hexagram_names(resources_path / 'hexagram_json')
+    if map_path.exists():
+        try:
+            with CommentaryText(source_path, map_path) as text:
+                if text.is_current(names):
+                    return map_path
+        except (ResourceValidationError, KeyError, TypeError):
+            logger.warning(f"Invalid commentary offset map {map_path}, rebuilding")
+    return build_commentary_map(source_path, names, map_path)
+
+def open_commentary_text(
+    resources_path: Path,
+    cache_dir: Optional[Path] = None
+) -> CommentaryText:
+    """
+    Open the commentary of a resources directory with current offsets.
+
+    Falls back to offsets in memory if the map cannot be written to
+    ``cache_dir`` (by default the directory of ``yijing.txt``).
+
+    Raises:
+        FileNotFoundError: If ``yijing.txt`` or a hexagram file is missing.
+    """
+    resources_path = Path(resources_path)
+    source_path = default_commentary_path(resources_path)
+    map_path = default_map_path(source_path, cache_dir)
+    try:
+        return CommentaryText(source_path, ensure_commentary_map(resources_path, map_path))
+    except OSError as e:
+        if not source_path.is_file():
+            raise
+        logger.warning(f"Cannot write commentary offsets {map_path} ({e}), keeping them in memory")
+    names = load_hexagram_names(resources_path / 'hexagram_json')
+    return CommentaryText.in_memory(source_path, names)
+
+if __name__ == '__main__':
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    resources = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent.parent / 'resources'
+    print(ensure_commentary_map(resources))
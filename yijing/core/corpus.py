@@ -0,0 +1,465 @@
+# yijing/core/corpus.py
+
+"""
+Corpus Module
+============
+Process-wide in-memory cache of the hexagram JSON corpus.
+
+The 64 hexagram files never change during normal operation, so each file is
+parsed once and shared by every HexagramManager that uses the same directory.
+Entries are revalidated against the file's modification time and size, at
+most once per ``check_interval`` seconds, so edited files are picked up
+without restarting the process. Files are read outside the cache lock, and
+concurrent loads of the same hexagram share a single read.
+
+If a compiled corpus artifact (see ``artifact``) exists next to the JSON
+directory, hexagrams are decoded from the memory-mapped artifact instead of
+opening 64 separate files. The artifact is only used while it matches the
+JSON files: when it is mapped, their modification times and sizes are
+compared with the ones recorded in the artifact, and only if they differ are
+the files hashed and compared with its digest. The artifact and JSON files are
+statted at most once per ``check_interval``. An outdated artifact is ignored
+with a warning until it is rebuilt.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import logging
+import aiofiles.os
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from ..exceptions import ResourceValidationError
+from ..utils.cache import CacheStats
+from ..utils.singleflight import AsyncSingleFlight, SingleFlight
+from .artifact import HexagramArtifact, default_artifact_path
+from .loader import load_hexagram_data, aload_hexagram_data
+
+logger = logging.getLogger(__name__)
+
+HEXAGRAM_NUMBERS = range(1, 65)
+
+_MISSING = object()
+
+class _CorpusEntry(NamedTuple):
+    data: Dict[str, Any]
+    mtime_ns: int
+    size: int
+    checked_at: float
+
+def _select_section(data: Dict[str, Any], section: str) -> Any:
+    """Take a section out of the parsed data of a hexagram, None for missing lines."""
+    if section.startswith('lines.'):
+        index = int(section.split('.', 1)[1])
+        lines = data.get('lines', [])
+        return lines[index] if index < len(lines) else None
+    return data[section]
+
+class HexagramCorpus:
+    """
+    Cache of the parsed hexagram data of one directory.
+
+    Use ``HexagramCorpus.for_directory`` to get the instance shared by the whole
+    process. The returned dictionaries are shared as well and must be treated
+    as read-only.
+
+    Args:
+        directory (Path): Directory containing the ``hexagram_XX.json`` files.
+        check_interval (float): Minimum number of seconds between two checks of
+            a file's modification time. 0 checks on every access.
+        artifact_path (Optional[Path]): Compiled corpus artifact to read from.
+            Defaults to ``default_artifact_path(directory)`` if that file exists.
+        use_artifact (bool): Set to False to always read the JSON files.
+
+    Attributes:
+        stats (CacheStats): Hit, miss and invalidation counters.
+        artifact (Optional[HexagramArtifact]): The mapped artifact, if in use.
+    """
+
+    _instances: Dict[Path, 'HexagramCorpus'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        directory: Path,
+        check_interval: float = 1.0,
+        artifact_path: Optional[Path] = None,
+        use_artifact: bool = True
+    ):
+        self.directory = Path(directory)
+        self.check_interval = check_interval
+        self.stats = CacheStats()
+        self._entries: Dict[int, _CorpusEntry] = {}
+        self._sections: Dict[Tuple[int, str], Any] = {}
+        self._lock = threading.Lock()
+        # Cold loads run outside the lock; concurrent loads of one hexagram share a read
+        self._loads = SingleFlight()
+        self._aloads = AsyncSingleFlight()
+
+        self.artifact: Optional[HexagramArtifact] = None
+        self._artifact_path = Path(artifact_path or default_artifact_path(self.directory))
+        self._artifact_sources: Tuple[Optional[Tuple[int, int]], ...] = ()
+        self._artifact_checked_at = 0.0
+        self._watch_artifact = use_artifact and self._artifact_path.exists()
+        if self._watch_artifact:
+            self._open_artifact()
+
+    def _open_artifact(self) -> None:
+        """
+        Map the artifact, falling back to the JSON files if it is invalid or
+        was compiled from other versions of the JSON files.
+        """
+        self.artifact = None
+        self._artifact_sources = self._stat_artifact_sources()
+        self._artifact_checked_at = time.monotonic()
+        try:
+            artifact = HexagramArtifact(self._artifact_path)
+        except (OSError, ResourceValidationError) as e:
+            logger.warning(f"Ignoring corpus artifact {self._artifact_path}: {e}")
+            return
+
+        stats = self._artifact_sources[1:]
+        # Without the JSON files the artifact is the only copy of the corpus
+        current = None in stats or artifact.is_current(self.directory, stats)
+        if not current:
+            logger.warning(
+                f"Ignoring corpus artifact {self._artifact_path}: the JSON files in "
+                f"{self.directory} changed since it was compiled, rebuild it"
+            )
+            artifact.close()
+            return
+
+        self.artifact = artifact
+        logger.debug(f"Using corpus artifact {self._artifact_path}")
+
+    def _stat_artifact_sources(self) -> Tuple[Optional[Tuple[int, int]], ...]:
+        """Get modification time and size of the artifact and every JSON file."""
+        paths = [self._artifact_path]
+        paths.extend(self.directory / f'hexagram_{number:02d}.json' for number in HEXAGRAM_NUMBERS)
+        sources = []
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                sources.append(None)
+            else:
+                sources.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(sources)
+
+    def _artifact_due(self) -> bool:
+        return (
+            self._watch_artifact
+            and time.monotonic() - self._artifact_checked_at >= self.check_interval
+        )
+
+    def _check_artifact(self) -> None:
+        """Keep the current mode if neither the artifact nor a JSON file changed, otherwise reopen it."""
+        sources = self._stat_artifact_sources()
+        with self._lock:
+            if sources == self._artifact_sources:
+                self._artifact_checked_at = time.monotonic()
+                return
+            self.stats.invalidations += 1
+        logger.debug(f"Corpus artifact {self._artifact_path} or its sources changed")
+        self._reopen_artifact()
+
+    @classmethod
+    def for_directory(cls, directory: Path) -> 'HexagramCorpus':
+        """
+        Get the process-wide corpus of a directory, creating it on first use.
+
+        Args:
+            directory (Path): Directory containing the hexagram JSON files.
+
+        Returns:
+            HexagramCorpus: The shared corpus instance.
+        """
+        key = Path(directory).resolve()
+        corpus = cls._instances.get(key)
+        if corpus is None:
+            with cls._instances_lock:
+                corpus = cls._instances.setdefault(key, cls(key))
+        return corpus
+
+    def _path(self, number: int) -> Path:
+        """Get the file an entry is loaded from and validated against."""
+        if self.artifact is not None:
+            return self._artifact_path
+        return self.directory / f'hexagram_{number:02d}.json'
+
+    def get(self, number: int) -> Dict[str, Any]:
+        """
+        Get the data of a hexagram, loading it on first access.
+
+        Args:
+            number (int): Hexagram number (1-64).
+
+        Returns:
+            Dict[str, Any]: The shared, parsed hexagram data.
+
+        Raises:
+            FileNotFoundError: If the hexagram file cannot be found.
+        """
+        if self._artifact_due():
+            self._check_artifact()
+        entry = self._entries.get(number)
+        if entry is not None:
+            if time.monotonic() - entry.checked_at < self.check_interval:
+                with self._lock:
+                    self.stats.hits += 1
+                return entry.data
+            data = self._revalidate(number, entry, self._stat(number))
+            if data is not None:
+                return data
+
+        return self._load(number)
+
+    async def aget(self, number: int) -> Dict[str, Any]:
+        """
+        Asynchronous counterpart of ``get`` with the same cache.
+
+        File checks and reads go through ``aiofiles``, and checking or
+        reopening the artifact runs in a worker thread, so the event loop is
+        never blocked by disk I/O.
+
+        Args:
+            number (int): Hexagram number (1-64).
+
+        Returns:
+            Dict[str, Any]: The shared, parsed hexagram data.
+
+        Raises:
+            FileNotFoundError: If the hexagram file cannot be found.
+        """
+        if self._artifact_due():
+            await asyncio.to_thread(self._check_artifact)
+        entry = self._entries.get(number)
+        if entry is not None:
+            if time.monotonic() - entry.checked_at < self.check_interval:
+                with self._lock:
+                    self.stats.hits += 1
+                return entry.data
+            stat = await self._astat(number)
+            if self.artifact is not None:
+                # A changed artifact is reopened, which reads the JSON files
+                data = await asyncio.to_thread(self._revalidate, number, entry, stat)
+            else:
+                data = self._revalidate(number, entry, stat)
+            if data is not None:
+                return data
+
+        return await self._aload(number)
+
+    def get_section(self, number: int, section: str) -> Any:
+        """
+        Get a single section of a hexagram.
+
+        With an artifact only the requested section is decoded; otherwise the
+        section is taken from the fully parsed JSON file.
+
+        Args:
+            number (int): Hexagram number (1-64).
+            section (str): ``hexagram``, ``judgment``, ``image`` or ``lines.<i>``.
+
+        Returns:
+            Any: The decoded section (shared, read-only), None for missing lines.
+        """
+        if self._artifact_due():
+            self._check_artifact()
+        artifact = self.artifact
+        if artifact is None:
+            return _select_section(self.get(number), section)
+        return self._decode_section(artifact, number, section)
+
+    def _decode_section(self, artifact: HexagramArtifact, number: int, section: str) -> Any:
+        """Decode a section from the artifact, once per artifact."""
+        key = (number, section)
+        value = self._sections.get(key, _MISSING)
+        if value is _MISSING:
+            value = artifact.section(number, section)
+            with self._lock:
+                self.stats.misses += 1
+                return self._sections.setdefault(key, value)
+        with self._lock:
+            self.stats.hits += 1
+        return value
+
+    async def aprepare(self, number: int) -> None:
+        """
+        Make the sections of a hexagram readable without disk I/O.
+
+        Checks the artifact in a worker thread. With an artifact nothing else
+        is needed, since sections are decoded from the mapping on access;
+        without one the JSON file is loaded into the cache.
+
+        Args:
+            number (int): Hexagram number (1-64).
+        """
+        if self._artifact_due():
+            await asyncio.to_thread(self._check_artifact)
+        if self.artifact is None:
+            await self.aget(number)
+
+    async def aget_section(self, number: int, section: str) -> Any:
+        """Asynchronous counterpart of ``get_section`` with the same cache."""
+        if self._artifact_due():
+            await asyncio.to_thread(self._check_artifact)
+        artifact = self.artifact
+        if artifact is None:
+            return _select_section(await self.aget(number), section)
+        return self._decode_section(artifact, number, section)
+
+    def _stat(self, number: int) -> Optional[os.stat_result]:
+        try:
+            return self._path(number).stat()
+        except FileNotFoundError:
+            return None
+
+    async def _astat(self, number: int) -> Optional[os.stat_result]:
+        try:
+            return await aiofiles.os.stat(self._path(number))
+        except FileNotFoundError:
+            return None
+
+    def _revalidate(
+        self,
+        number: int,
+        entry: _CorpusEntry,
+        stat: Optional[os.stat_result]
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached data if the source is unchanged, otherwise drop it."""
+        with self._lock:
+            if self._entries.get(number) is not entry:
+                # Another thread has revalidated or reloaded it meanwhile
+                return None
+            if stat is not None and stat.st_mtime_ns == entry.mtime_ns and stat.st_size == entry.size:
+                self._entries[number] = entry._replace(checked_at=time.monotonic())
+                self.stats.hits += 1
+                return entry.data
+            del self._entries[number]
+            self.stats.invalidations += 1
+
+        logger.debug(f"Hexagram file {number:02d} changed, reloading")
+        if self.artifact is not None:
+            self._reopen_artifact()
+        return None
+
+    def _store(self, number: int, data: Dict[str, Any], stat: os.stat_result) -> Dict[str, Any]:
+        """
+        Cache freshly loaded data, unless a concurrent load stored it first;
+        then that data is returned, so every caller shares one copy.
+        """
+        with self._lock:
+            entry = self._entries.get(number)
+            if entry is not None:
+                return entry.data
+            self._entries[number] = _CorpusEntry(
+                data=data,
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size,
+                checked_at=time.monotonic()
+            )
+            return data
+
+    def _cached(self, number: int) -> Optional[Dict[str, Any]]:
+        """Get an entry loaded by another caller meanwhile, counting a hit."""
+        with self._lock:
+            entry = self._entries.get(number)
+            if entry is None:
+                return None
+            self.stats.hits += 1
+            return entry.data
+
+    def _count_load(self, shared: bool) -> None:
+        """Count a load as miss, or as hit if it joined a running one."""
+        with self._lock:
+            if shared:
+                self.stats.hits += 1
+            else:
+                self.stats.misses += 1
+
+    def _missing(self, number: int) -> FileNotFoundError:
+        with self._lock:
+            self._entries.pop(number, None)
+        return FileNotFoundError(f"Hexagram file not found: {self._path(number)}")
+
+    def _load(self, number: int) -> Dict[str, Any]:
+        data = self._cached(number)
+        if data is not None:
+            return data
+        data, shared = self._loads.do(number, self._read, number)
+        self._count_load(shared)
+        return data
+
+    def _read(self, number: int) -> Dict[str, Any]:
+        """Load a hexagram without holding the lock; concurrent loads of it wait for this one."""
+        artifact = self.artifact
+        stat = self._stat(number)
+        if stat is None:
+            raise self._missing(number)
+        if artifact is not None:
+            data = artifact.load(number)
+        else:
+            data = load_hexagram_data(number, self.directory)
+        return self._store(number, data, stat)
+
+    async def _aload(self, number: int) -> Dict[str, Any]:
+        data = self._cached(number)
+        if data is not None:
+            return data
+        data, shared = await self._aloads.do(number, self._aread, number)
+        self._count_load(shared)
+        return data
+
+    async def _aread(self, number: int) -> Dict[str, Any]:
+        """Asynchronous counterpart of ``_read``."""
+        artifact = self.artifact
+        stat = await self._astat(number)
+        if stat is None:
+            raise self._missing(number)
+        if artifact is not None:
+            data = artifact.load(number)
+        else:
+            data = await aload_hexagram_data(number, self.directory)
+        return self._store(number, data, stat)
+
+    def _reopen_artifact(self) -> None:
+        """
+        Map the rebuilt artifact and drop everything decoded from the old one.
+
+        The old mapping is not closed here: readers in other threads may still
+        hold it, and it is unmapped as soon as the last of them drops it.
+        Everything read from it is decoded into new objects, so no buffer
+        outlives the mapping.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._sections.clear()
+            self._open_artifact()
+
+    def preload(self) -> None:
+        """Load all 64 hexagrams eagerly."""
+        for number in HEXAGRAM_NUMBERS:
+            if number not in self._entries:
+                self._load(number)
+        logger.debug(f"Preloaded hexagram corpus from {self.directory}")
+
+    def invalidate(self, number: Optional[int] = None) -> None:
+        """
+        Drop cached entries.
+
+        Args:
+            number (Optional[int]): Hexagram to drop. Drops all entries if omitted.
+        """
+        with self._lock:
+            if number is None:
+                self.stats.invalidations += len(self._entries)
+                self._entries.clear()
+                self._sections.clear()
+            elif self._entries.pop(number, None) is not None:
+                self.stats.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
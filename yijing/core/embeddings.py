@@ -0,0 +1,568 @@
+# yijing/core/embeddings.py
+
+"""
+Embeddings Module
+================
+Semantic retrieval over the passages of ``hexagram_json`` and ``yijing.txt``.
+
+Passages are the sections of every hexagram JSON file and of the commentary
+(long commentary sections split at sentence ends). An offline build embeds
+them with an ``Embedder`` and stores the unit-length vectors as a float16
+matrix in a single ``.npz`` file next to the resources. Each passage carries
+the digest of its text, so rebuilding only embeds passages that are new or
+have changed.
+
+At runtime ``VectorStore`` answers queries with one matrix-vector product
+over the whole corpus. The matrix is kept in float32 in memory, because
+NumPy has no fast float16 matrix product; for about 1200 passages of 768
+dimensions that is under 4 MB and a search takes well under a millisecond.
+Query vectors are cached, so a repeated question does not call the
+embedding model again. Embedding a question is bounded by the request's
+``Deadline`` and goes through the retries and a circuit breaker of its own,
+like model calls; failures are raised as ``ModelError``.
+
+Embedders are registered per name:
+
+    register_embedder('ollama', OllamaEmbedder)
+
+Built-in embedders:
+    ollama: the configured Ollama server's embedding endpoint
+    stub:   deterministic in-process feature hashing, for tests
+
+Build the store after editing the resources:
+
+    python -m yijing.core.embeddings [resources_dir] [store_path]
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Sequence,
+    runtime_checkable
+)
+
+import httpx
+import numpy as np
+import ollama
+
+from ..config import Settings
+from ..exceptions import (
+    ModelError,
+    ModelResponseError,
+    ResourceNotFoundError,
+    ResourceValidationError
+)
+from ..utils.cache import LRUCache
+from .artifact import HEXAGRAM_TOTAL, SECTIONS
+from .commentary import (
+    default_commentary_path,
+    load_hexagram_names,
+    open_commentary_text,
+    split_segment
+)
+from .loader import load_hexagram_data
+from .resilience import (
+    CircuitBreaker,
+    Deadline,
+    RetryPolicy,
+    call_with_resilience,
+    get_circuit_breaker
+)
+from .text_index import MAX_PASSAGE_CHARS, CommentaryPassage, tokenize
+
+logger = logging.getLogger(__name__)
+
+STORE_FILE = 'yijing.vectors.npz'
+FORMAT_VERSION = 1
+QUERY_CACHE_SIZE = 1024
+
+_MISSING = 'Keine Information verfügbar'
+
+@runtime_checkable
+class Embedder(Protocol):
+    """
+    Interface of an embedding model.
+
+    Attributes:
+        name (str): Identifies model and dimensions; vectors of different
+            names are never mixed in one store.
+    """
+    name: str
+
+    def embed(self, texts: Sequence[str], timeout: Optional[float] = None) -> np.ndarray:
+        """
+        Embed texts into a float32 matrix with one row per text.
+
+        Args:
+            texts (Sequence[str]): The texts.
+            timeout (Optional[float]): Seconds until the request's deadline,
+                None for no limit.
+        """
+        ...
+
+EmbedderFactory = Callable[[Settings], Embedder]
+
+class OllamaEmbedder:
+    """
+    Embeddings from the ``embed`` endpoint of the configured Ollama server.
+
+    Calls with a timeout go through a client built for the call on the same
+    connection pool, whose read timeout is the remaining time.
+
+    Args:
+        settings (Settings): Oracle settings (``embedding_model`` and ``ollama_*``).
+    """
+
+    def __init__(self, settings: Settings):
+        self.model = settings.embedding_model
+        self.name = f'ollama:{self.model}'
+        self.keep_alive = settings.ollama_keep_alive
+        self._host = settings.ollama_host
+        self._connect_timeout = settings.ollama_connect_timeout
+        self._transport = httpx.HTTPTransport()
+        self.client = ollama.Client(
+            host=settings.ollama_host,
+            timeout=httpx.Timeout(settings.ollama_timeout, connect=settings.ollama_connect_timeout),
+            transport=self._transport
+        )
+
+    def _client_for(self, timeout: Optional[float]) -> ollama.Client:
+        """Get a client whose reads end at the deadline; it must not be closed."""
+        if timeout is None:
+            return self.client
+        timeout = max(timeout, 0.001)
+        return ollama.Client(
+            host=self._host,
+            timeout=httpx.Timeout(timeout, connect=min(self._connect_timeout, timeout)),
+            transport=self._transport
+        )
+
+    def embed(self, texts: Sequence[str], timeout: Optional[float] = None) -> np.ndarray:
+        response = self._client_for(timeout).embed(
+            model=self.model, input=list(texts), keep_alive=self.keep_alive
+        )
+        return np.asarray(response['embeddings'], dtype=np.float32)
+
+class StubEmbedder:
+    """
+    Deterministic in-process embeddings without a model server.
+
+    Every index term (see ``tokenize``) is hashed onto one dimension with a
+    random sign, so texts sharing words get similar vectors.
+
+    Args:
+        settings (Optional[Settings]): Unused.
+        dimensions (int): Length of the vectors.
+
+    Attributes:
+        embedded (int): Number of texts embedded so far.
+    """
+
+    def __init__(self, settings: Optional[Settings] = None, dimensions: int = 256):
+        self.dimensions = dimensions
+        self.name = f'stub:{dimensions}'
+        self.embedded = 0
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for term in tokenize(text):
+            digest = int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+            vector[digest % self.dimensions] += 1.0 if digest >> 63 else -1.0
+        return vector
+
+    def embed(self, texts: Sequence[str], timeout: Optional[float] = None) -> np.ndarray:
+        self.embedded += len(texts)
+        return np.stack([self._vector(text) for text in texts]).reshape(len(texts), self.dimensions)
+
+_EMBEDDERS: Dict[str, EmbedderFactory] = {}
+
+def register_embedder(name: str, factory: EmbedderFactory) -> None:
+    """
+    Register (or replace) an embedder.
+
+    Args:
+        name (str): Name used in ``Settings.embedding_backend``.
+        factory (EmbedderFactory): Callable taking the settings and returning
+            an ``Embedder``; usually the embedder class.
+    """
+    _EMBEDDERS[name] = factory
+    logger.debug(f"Registered embedder {name}: {factory}")
+
+def create_embedder(settings: Settings) -> Embedder:
+    """
+    Create the embedder of ``settings.embedding_backend``.
+
+    Raises:
+        ValueError: If no embedder is registered under that name.
+    """
+    try:
+        factory = _EMBEDDERS[settings.embedding_backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown embedding backend: {settings.embedding_backend}. "
+            f"Available embedders: {', '.join(sorted(_EMBEDDERS))}"
+        ) from None
+    return factory(settings)
+
+register_embedder('ollama', OllamaEmbedder)
+register_embedder('stub', StubEmbedder)
+
+class EmbeddingPassage(NamedTuple):
+    """
+    A passage to embed.
+
+    Attributes:
+        key (str): Unique, stable ID (source, hexagram, section and part).
+        number (int): Hexagram number as in ``hexagram_json``.
+        section (str): Section name as in the corpus artifact.
+        text (str): The passage.
+    """
+    key: str
+    number: int
+    section: str
+    text: str
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.text.encode('utf-8')).hexdigest()
+
+def _strings(value: Any) -> Iterator[str]:
+    """Yield all strings of a JSON value in order."""
+    if isinstance(value, str):
+        if value and value != _MISSING:
+            yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+def corpus_passages(resources_path: Path, cache_dir: Optional[Path] = None) -> List[EmbeddingPassage]:
+    """
+    Collect the passages of the hexagram JSON files and of the commentary.
+
+    Args:
+        resources_path (Path): Directory containing ``hexagram_json`` and ``yijing.txt``.
+        cache_dir (Optional[Path]): Directory of the commentary offset map,
+            see ``Settings.commentary_cache_dir``.
+
+    Returns:
+        List[EmbeddingPassage]: JSON sections first, then commentary passages.
+    """
+    resources_path = Path(resources_path)
+    passages = []
+    for number in range(1, HEXAGRAM_TOTAL + 1):
+        data = load_hexagram_data(number, resources_path / 'hexagram_json')
+        lines = data.get('lines', [])
+        for section in SECTIONS:
+            if section.startswith('lines.'):
+                index = int(section.split('.', 1)[1])
+                value = lines[index] if index < len(lines) else None
+            else:
+                value = data.get(section)
+            text = ' '.join(_strings(value))
+            if text:
+                passages.append(EmbeddingPassage(f'json/{number}/{section}', number, section, text))
+
+    source_path = default_commentary_path(resources_path)
+    data = source_path.read_bytes()
+    with open_commentary_text(resources_path, cache_dir) as commentary:
+        segments = commentary.segments()
+    for segment in segments:
+        for part, piece in enumerate(split_segment(data, segment, MAX_PASSAGE_CHARS)):
+            text = data[piece.start:piece.end].decode('utf-8')
+            passages.append(EmbeddingPassage(
+                f'txt/{segment.number}/{segment.section}/{part}', segment.number, segment.section, text
+            ))
+    return passages
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+def _read_store(path: Path) -> Dict[str, Any]:
+    """
+    Read a store file.
+
+    Raises:
+        ResourceValidationError: If the file is not a valid store.
+    """
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            vectors = data['vectors']
+    except (OSError, ValueError, KeyError) as e:
+        raise ResourceValidationError(str(path), [str(e)]) from e
+    if meta.get('version') != FORMAT_VERSION:
+        raise ResourceValidationError(str(path), ["unsupported format version"])
+    if vectors.shape[0] != len(meta['passages']):
+        raise ResourceValidationError(str(path), ["vector count does not match passages"])
+    return {'meta': meta, 'vectors': vectors}
+
+def build_vector_store(
+    passages: Sequence[EmbeddingPassage],
+    embedder: Embedder,
+    path: Path,
+    batch_size: int = 32
+) -> Path:
+    """
+    Embed the passages and write the store, reusing the vectors of an existing one.
+
+    Passages whose key and text digest are already in the store at ``path``
+    (embedded by the same embedder) keep their vectors; only the others are
+    sent to the embedder. Passages that no longer exist are dropped.
+
+    Args:
+        passages (Sequence[EmbeddingPassage]): All passages to store.
+        embedder (Embedder): The embedding model.
+        path (Path): The store file, written atomically.
+        batch_size (int): Passages per call to the embedder.
+
+    Returns:
+        Path: The path of the written store.
+    """
+    path = Path(path)
+    previous: Dict[tuple, np.ndarray] = {}
+    if path.exists():
+        try:
+            store = _read_store(path)
+        except ResourceValidationError:
+            logger.warning(f"Invalid vector store {path}, rebuilding")
+        else:
+            if store['meta']['embedder'] == embedder.name:
+                previous = {
+                    (entry['key'], entry['digest']): vector
+                    for entry, vector in zip(store['meta']['passages'], store['vectors'])
+                }
+
+    digests = [passage.digest for passage in passages]
+    vectors: List[Optional[np.ndarray]] = [
+        previous.get((passage.key, digest)) for passage, digest in zip(passages, digests)
+    ]
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        embedded = _normalize(embedder.embed([passages[i].text for i in batch]))
+        for i, vector in zip(batch, embedded):
+            vectors[i] = vector.astype(np.float16)
+
+    matrix = np.stack(vectors).astype(np.float16) if vectors else np.zeros((0, 0), np.float16)
+    meta = {
+        'version': FORMAT_VERSION,
+        'embedder': embedder.name,
+        'passages': [
+            {'key': p.key, 'number': p.number, 'section': p.section, 'digest': d, 'text': p.text}
+            for p, d in zip(passages, digests)
+        ]
+    }
+    temp_path = path.with_name(f'{path.stem}.{os.getpid()}.tmp.npz')
+    np.savez(temp_path, vectors=matrix, meta=np.array(json.dumps(meta, ensure_ascii=False)))
+    os.replace(temp_path, path)
+
+    logger.info(
+        f"Stored {len(passages)} passage vectors in {path} "
+        f"({len(missing)} embedded, {len(passages) - len(missing)} reused)"
+    )
+    return path
+
+class VectorStore:
+    """
+    Cosine top-k search over the stored passage vectors.
+
+    Offers the same ``search`` and ``number_of`` as ``CommentaryIndex``, so
+    ``HexagramManager`` can use either for its consultation prompts.
+
+    Args:
+        path (Path): The store file.
+        embedder (Embedder): Embeds the queries; must be the embedder the
+            store was built with.
+        names (Optional[Dict[int, str]]): Hexagram names by number, for
+            ``number_of`` and prompt labels.
+        retry_policy (Optional[RetryPolicy]): Retries of a failed query
+            embedding. Defaults to ``RetryPolicy()``.
+        breaker (Optional[CircuitBreaker]): Circuit breaker of the embedding
+            model, None for none.
+
+    Raises:
+        ResourceNotFoundError: If the store has not been built.
+        ResourceValidationError: If the file is not a valid store or was
+            built by another embedder.
+
+    Attributes:
+        query_cache (LRUCache): Vectors of recent queries.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        embedder: Embedder,
+        names: Optional[Dict[int, str]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.path = Path(path)
+        if not self.path.exists():
+            raise ResourceNotFoundError(resource_path=str(self.path))
+        store = _read_store(self.path)
+        meta = store['meta']
+        if meta['embedder'] != embedder.name:
+            raise ResourceValidationError(
+                str(self.path), [f"built by {meta['embedder']}, not {embedder.name}"]
+            )
+        self.embedder = embedder
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker
+        self.names: Dict[int, str] = dict(names or {})
+        self._numbers = {name: number for number, name in self.names.items()}
+        self._passages = meta['passages']
+        self._hexagrams = np.array([p['number'] for p in self._passages], dtype=np.int16)
+        self._matrix = np.ascontiguousarray(store['vectors'], dtype=np.float32)
+        self.query_cache = LRUCache(maxsize=QUERY_CACHE_SIZE)
+
+    @classmethod
+    def from_settings(cls, settings: Settings, resources_path: Optional[Path] = None) -> 'VectorStore':
+        """
+        Open the store configured in the settings with the configured embedder.
+
+        Retries and circuit breaker of the query embeddings follow the
+        ``retry_*`` and ``circuit_*`` settings.
+
+        Args:
+            settings (Settings): Oracle settings (``embedding_*``).
+            resources_path (Optional[Path]): Resources directory, defaults to
+                ``settings.resources_dir``.
+        """
+        resources_path = Path(resources_path or settings.resources_dir)
+        path = settings.embedding_store_path or resources_path / STORE_FILE
+        names = load_hexagram_names(resources_path / 'hexagram_json')
+        embedder = create_embedder(settings)
+        return cls(
+            path,
+            embedder,
+            names,
+            retry_policy=RetryPolicy(
+                attempts=settings.retry_attempts,
+                base_delay=settings.retry_base_delay,
+                max_delay=settings.retry_max_delay
+            ),
+            breaker=get_circuit_breaker(
+                f'embedding:{embedder.name}',
+                failure_threshold=settings.circuit_failure_threshold,
+                reset_timeout=settings.circuit_reset_timeout
+            )
+        )
+
+    def __len__(self) -> int:
+        return len(self._passages)
+
+    def number_of(self, name: str) -> Optional[int]:
+        """Get the number of a hexagram by its name (``NAME / TITLE``)."""
+        return self._numbers.get(name)
+
+    def embed_query(self, query: str, deadline: Optional[Deadline] = None) -> np.ndarray:
+        """
+        Get the unit-length vector of a query, cached per query text.
+
+        Args:
+            query (str): The query.
+            deadline (Optional[Deadline]): Deadline of the request; the
+                embedding call gets the remaining time as timeout.
+
+        Raises:
+            ModelError: If the embedding model fails, times out or its
+                circuit breaker is open.
+        """
+        vector = self.query_cache.get(query)
+        if vector is None:
+            try:
+                embedded = call_with_resilience(
+                    lambda timeout: self.embedder.embed([query], timeout),
+                    self.embedder.name,
+                    deadline or Deadline(),
+                    self.retry_policy,
+                    self.breaker
+                )
+            except ModelError:
+                raise
+            except Exception as e:
+                raise ModelResponseError(self.embedder.name, str(e) or type(e).__name__) from e
+            vector = _normalize(embedded[0]).astype(np.float32)
+            self.query_cache.set(query, vector)
+        return vector
+
+    def search_vector(
+        self,
+        vector: np.ndarray,
+        numbers: Optional[Iterable[int]] = None,
+        k: int = 3
+    ) -> List[CommentaryPassage]:
+        """
+        Find the passages closest to a unit-length query vector.
+
+        Args:
+            vector (np.ndarray): The query vector.
+            numbers (Optional[Iterable[int]]): Only search the passages of
+                these hexagrams.
+            k (int): Maximum number of passages.
+
+        Returns:
+            List[CommentaryPassage]: Up to ``k`` passages with their cosine
+                similarity as score, best first.
+        """
+        scores = self._matrix @ vector
+        if numbers is not None:
+            scores = np.where(np.isin(self._hexagrams, list(numbers)), scores, -np.inf)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [
+            CommentaryPassage(
+                self._passages[i]['number'],
+                self._passages[i]['section'],
+                float(scores[i]),
+                self._passages[i]['text']
+            )
+            for i in top if np.isfinite(scores[i])
+        ]
+
+    def search(
+        self,
+        query: str,
+        numbers: Optional[Iterable[int]] = None,
+        k: int = 3,
+        deadline: Optional[Deadline] = None
+    ) -> List[CommentaryPassage]:
+        """
+        Find the passages semantically closest to a query, see ``search_vector``.
+
+        Raises:
+            ModelError: If the query cannot be embedded, see ``embed_query``.
+        """
+        return self.search_vector(self.embed_query(query, deadline), numbers, k)
+
+if __name__ == '__main__':
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    settings = Settings()
+    resources = Path(sys.argv[1]) if len(sys.argv) > 1 else settings.resources_dir
+    target = Path(sys.argv[2]) if len(sys.argv) > 2 else (
+        settings.embedding_store_path or resources / STORE_FILE
+    )
+    passages = corpus_passages(resources, settings.commentary_cache_dir)
+    print(build_vector_store(passages, create_embedder(settings), target))
@@ -6,17 +6,36 @@ Generator Module
 Contains functions for generating I Ching readings through random line generation.
 """
 
-import random
 import logging
+from typing import Union
+
+import numpy as np
+
+from ..constants import HEXAGRAM_LINE_COUNT
+from ..enums import CastingMethod
 from ..models import (
+    CompactHypergram,
     Hypergram,
+    HypergramBatch,
     HypergramData, 
     HypergramLine
 )
+from ..models.transitions import (
+    CHANGING_MASKS,
+    ORIGINAL_NUMBERS,
+    RESULTING_NUMBERS,
+    pack_hypergram_array
+)
+
+from .casting import AliasSampler, get_casting_method
+from .rng import RngLike, resolve_rng
 
 logger = logging.getLogger(__name__)
 
-def cast_hypergram() -> HypergramData:
+def cast_hypergram(
+    method: Union[CastingMethod, str, AliasSampler] = CastingMethod.UNIFORM,
+    rng: RngLike = None
+) -> HypergramData:
     """
     Generate a complete I Ching reading through random line generation.
     
@@ -27,25 +46,37 @@ def cast_hypergram() -> HypergramData:
         8: Stable yin
         9: Changing yang
     
+    Args:
+        method (Union[CastingMethod, str, AliasSampler]): Casting method that
+            determines the line value probabilities. Defaults to uniform.
+        rng (RngLike): Random generator or seed. Defaults to the calling
+            thread's own stream. An integer seed, also a NumPy integer, is
+            recorded in the result, so the reading can be replayed with
+            ``cast_hypergram(rng=seed)``.
+    
     Returns:
         HypergramData: A complete reading containing:
             - The original hypergram
             - The old (initial) hexagram
             - The new (transformed) hexagram
             - List of changing line indices
+            - The seed, if the reading was cast from an integer seed
     
     Example:
-        >>> data = cast_hypergram()
+        >>> data = cast_hypergram(rng=1234)
+        >>> assert cast_hypergram(rng=data.seed) == data
         >>> print(f"Old hexagram: {data.old_hexagram.to_unicode_representation()}")
         >>> print(f"Changes at lines: {data.changing_lines}")
         >>> print(f"New hexagram: {data.new_hexagram.to_unicode_representation()}")
     """
     logger.debug("Generating six random lines for hypergram")
+    sampler = get_casting_method(method)
+    seed = int(rng) if isinstance(rng, (int, np.integer)) else None
     
     # Generate six random lines
     lines = [
-        HypergramLine(value=random.choice([6, 7, 8, 9])) 
-        for _ in range(6)
+        HypergramLine(value=value) 
+        for value in sampler.sample_array(HEXAGRAM_LINE_COUNT, resolve_rng(rng)).tolist()
     ]
     
     hypergram = Hypergram(lines=lines)
@@ -54,5 +85,83 @@ def cast_hypergram() -> HypergramData:
         hypergram=hypergram,
         old_hexagram=hypergram.old_hexagram(),
         new_hexagram=hypergram.new_hexagram(),
-        changing_lines=hypergram.changing_lines()
-    )
\ No newline at end of file
+        changing_lines=hypergram.changing_lines(),
+        seed=seed
+    )
+
+def cast_compact_hypergram(
+    method: Union[CastingMethod, str, AliasSampler] = CastingMethod.UNIFORM,
+    rng: RngLike = None
+) -> CompactHypergram:
+    """
+    Generate a single reading as compact hypergram.
+
+    Draws the same line values as ``cast_hypergram`` for the same method and
+    seed, but skips building pydantic models. Use this in high-throughput
+    paths and convert with ``to_hypergram_data`` only where needed.
+
+    Args:
+        method (Union[CastingMethod, str, AliasSampler]): Casting method that
+            determines the line value probabilities. Defaults to uniform.
+        rng (RngLike): Random generator or seed. Defaults to the calling
+            thread's own stream.
+
+    Returns:
+        CompactHypergram: The cast hypergram.
+    """
+    sampler = get_casting_method(method)
+    values = sampler.sample_array(HEXAGRAM_LINE_COUNT, resolve_rng(rng)).tolist()
+    return CompactHypergram.from_values(values)
+
+def cast_hypergrams(
+    n: int,
+    rng: RngLike = None,
+    method: Union[CastingMethod, str, AliasSampler] = CastingMethod.UNIFORM
+) -> HypergramBatch:
+    """
+    Generate many I Ching readings at once.
+
+    All line values are drawn in a single call into a ``uint8`` array of shape
+    (n, 6). Each row is packed into a 12-bit hypergram code, and hexagram numbers
+    and changing-line masks are read from the precomputed transition table; no
+    pydantic objects are created until they are requested
+    through ``HypergramBatch.to_hypergram_data``.
+
+    Args:
+        n (int): Number of readings to generate.
+        rng (RngLike): Random generator or seed. Defaults to the calling
+            thread's own stream.
+        method (Union[CastingMethod, str, AliasSampler]): Casting method that
+            determines the line value probabilities. Defaults to uniform.
+
+    Returns:
+        HypergramBatch: Line values, old/new hexagram numbers (1-64) and
+            changing-line bitmasks for all readings.
+
+    Raises:
+        ValueError: If n is negative.
+
+    Example:
+        >>> batch = cast_hypergrams(1_000_000, rng=42, method="yarrow")
+        >>> batch.old_numbers[:3], batch.changing_masks[:3]
+        >>> first = batch.to_hypergram_data(0)
+    """
+    if n < 0:
+        raise ValueError(f"Number of readings must not be negative: {n}")
+
+    logger.debug(f"Generating {n} hypergrams in batch mode")
+    rng = resolve_rng(rng)
+    sampler = get_casting_method(method)
+
+    lines = sampler.sample_array((n, HEXAGRAM_LINE_COUNT), rng)
+
+    # One table lookup per reading instead of per-line arithmetic
+    codes = pack_hypergram_array(lines)
+
+    return HypergramBatch(
+        lines=lines,
+        codes=codes,
+        old_numbers=ORIGINAL_NUMBERS[codes],
+        new_numbers=RESULTING_NUMBERS[codes],
+        changing_masks=CHANGING_MASKS[codes]
+    )
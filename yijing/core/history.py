@@ -0,0 +1,70 @@
+# yijing/core/history.py
+
+"""
+History Module
+=============
+Keeps dialogue histories within a token budget.
+
+Token counts are estimated from the text length (about four characters per
+token for the models in use), which is cheap enough to run on every turn
+and close enough to keep prompts below the context window. When the system
+prompt, the history and the new question exceed the budget, the oldest
+turns are dropped. The first turn always stays: its prompt carries the
+original cast and hexagram context the whole dialogue refers to.
+"""
+
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+from .backends import Message
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def message_tokens(messages: Sequence[Message]) -> int:
+    """Estimate the number of tokens of a conversation."""
+    return sum(estimate_tokens(message['content']) for message in messages)
+
+def compact_history(
+    history: Sequence[Message],
+    budget: Optional[int],
+    reserved: int = 0
+) -> Tuple[List[Message], int]:
+    """
+    Drop the oldest turns (except the first) until the history fits the budget.
+
+    Args:
+        history (Sequence[Message]): Alternating user and assistant messages.
+        budget (Optional[int]): Estimated tokens allowed for the whole
+            request, None for no limit.
+        reserved (int): Estimated tokens of the rest of the request
+            (system prompt and new question).
+
+    Returns:
+        Tuple[List[Message], int]: The kept messages and the number of
+            dropped turns.
+    """
+    history = list(history)
+    if budget is None or message_tokens(history) + reserved <= budget:
+        return history, 0
+
+    first, rest = history[:2], history[2:]
+    available = budget - reserved - message_tokens(first)
+    kept: List[Message] = []
+    used = 0
+    for start in range(len(rest) - 2, -1, -2):
+        turn = rest[start:start + 2]
+        tokens = message_tokens(turn)
+        if used + tokens > available:
+            break
+        kept[:0] = turn
+        used += tokens
+
+    dropped = (len(rest) - len(kept)) // 2
+    logger.debug(f"Dropped {dropped} dialogue turns to stay within {budget} tokens")
+    return first + kept, dropped
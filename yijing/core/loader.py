@@ -7,13 +7,17 @@ Contains functions for loading hexagram data from JSON files.
 """
 from pathlib import Path
 import json
-from typing import Dict
+from typing import Dict, Optional
+import aiofiles
+import aiofiles.os
 
-def load_hexagram_data(number: int) -> Dict:
+def load_hexagram_data(number: int, resources_dir: Optional[Path] = None) -> Dict:
     """Load data for a specific hexagram.
     
     Args:
         number (int): Hexagram number (1-64)
+        resources_dir (Optional[Path]): Directory containing the hexagram
+            JSON files. Defaults to the package resources.
         
     Returns:
         Dict: Complete hexagram data
@@ -21,7 +25,8 @@ def load_hexagram_data(number: int) -> Dict:
     Raises:
         FileNotFoundError: If hexagram file cannot be found
     """
-    resources_dir = Path(__file__).parent.parent / 'resources/hexagram_json'
+    if resources_dir is None:
+        resources_dir = Path(__file__).parent.parent / 'resources/hexagram_json'
     hexagram_file = resources_dir / f'hexagram_{number:02d}.json'
     
     if not hexagram_file.exists():
@@ -30,4 +35,30 @@ def load_hexagram_data(number: int) -> Dict:
         )
         
     with open(hexagram_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
\ No newline at end of file
+        return json.load(f)
+
+async def aload_hexagram_data(number: int, resources_dir: Optional[Path] = None) -> Dict:
+    """Load data for a specific hexagram without blocking the event loop.
+    
+    Args:
+        number (int): Hexagram number (1-64)
+        resources_dir (Optional[Path]): Directory containing the hexagram
+            JSON files. Defaults to the package resources.
+        
+    Returns:
+        Dict: Complete hexagram data
+        
+    Raises:
+        FileNotFoundError: If hexagram file cannot be found
+    """
+    if resources_dir is None:
+        resources_dir = Path(__file__).parent.parent / 'resources/hexagram_json'
+    hexagram_file = resources_dir / f'hexagram_{number:02d}.json'
+    
+    if not await aiofiles.os.path.exists(hexagram_file):
+        raise FileNotFoundError(
+            f"Hexagram file not found: {hexagram_file}"
+        )
+        
+    async with aiofiles.open(hexagram_file, 'r', encoding='utf-8') as f:
+        return json.loads(await f.read())
@@ -1,14 +1,29 @@
 # yijing/core/manager.py
 
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Mapping, Optional
 import logging
 
+from ..exceptions import ModelError
 from ..models import HexagramContext
-from .loader import load_hexagram_data
+from ..utils.cache import CacheStats
+from .commentary import CommentaryText
+from .corpus import HexagramCorpus
+from .embeddings import VectorStore
+from .resilience import Deadline
+from .text_index import CommentaryIndex, CommentaryPassage
+from .views import LazyHexagram
 
 logger = logging.getLogger(__name__)
 
+_SECTION_LABELS = {'hexagram': 'Zeichen', 'judgment': 'Das Urteil', 'image': 'Das Bild'}
+
+def _section_label(section: str) -> str:
+    """German label of a commentary section for the prompt."""
+    if section.startswith('lines.'):
+        return f"Linie {int(section.split('.', 1)[1]) + 1}"
+    return _SECTION_LABELS.get(section, section)
+
 class HexagramManager:
     """
     HexagramManager manages hexagram data and contexts for Yijing oracle readings.
@@ -16,8 +31,15 @@ class HexagramManager:
     This class provides centralized management of hexagram data and reading contexts,
     handling file operations and data validation for the oracle system.
     
+    Hexagram data is served from the process-wide ``HexagramCorpus`` of the
+    resources directory, so every manager of the same directory shares one
+    parsed copy of each hexagram.
+
     Attributes:
         resources_path (Path): Path to the resources directory containing hexagram data.
+        corpus (HexagramCorpus): The shared cache of parsed hexagram data.
+        commentary_passages (int): Passages of ``yijing.txt`` added to each
+            consultation prompt.
         
     Methods:
         get_hexagram_data(number: int) -> Dict[str, Any]:
@@ -27,19 +49,76 @@ class HexagramManager:
                              resulting_hex_num: int) -> HexagramContext:
             Creates a complete reading context based on hexagram numbers and changing lines.
             
+        aget_hexagram_data, aget_hexagram_view, acreate_reading_context:
+            Asynchronous counterparts that read files through ``aiofiles``.
+            
+        get_hexagram_commentary(number: int, section: Optional[str] = None) -> Any:
+            Slices a hexagram's commentary out of the memory-mapped ``yijing.txt``.
+            
         get_consultation_prompt(context: HexagramContext, question: str) -> str:
-            Generates a consultation prompt based on the context and question.
+            Generates a consultation prompt based on the context and question,
+            with the best matching commentary passages if enabled.
     """
-    def __init__(self, resources_path: Path):
+    def __init__(
+        self,
+        resources_path: Path,
+        corpus: Optional[HexagramCorpus] = None,
+        preload: bool = False,
+        lazy: bool = True,
+        commentary_passages: int = 0,
+        commentary_index: Optional[CommentaryIndex] = None,
+        commentary_cache_dir: Optional[Path] = None
+    ):
         """
         Initialize the HexagramManager.
         
         Args:
             resources_path (Path): Path to the resources directory.
+            corpus (Optional[HexagramCorpus]): Corpus cache to use. Defaults to
+                the process-wide corpus of ``resources_path / 'hexagram_json'``.
+            preload (bool): Load all 64 hexagrams immediately instead of on
+                first access.
+            lazy (bool): Build reading contexts from ``LazyHexagram`` views
+                that fetch sections on access instead of full dictionaries.
+            commentary_passages (int): Number of passages of the commentary
+                corpus that ``get_consultation_prompt`` selects for the
+                question. 0 leaves the commentary out.
+            commentary_index (Optional[CommentaryIndex]): Search for the
+                passages: a ``CommentaryIndex`` or a ``VectorStore`` (anything
+                with ``search`` and ``number_of``). Defaults to the
+                process-wide BM25 index of ``resources_path``, opened on first use.
+            commentary_cache_dir (Optional[Path]): Directory the BM25 index is
+                written to. Defaults to the directory of ``yijing.txt``.
         """
         self.resources_path = resources_path
+        self.lazy = lazy
+        self.commentary_passages = commentary_passages
+        self._commentary_index = commentary_index
+        self.commentary_cache_dir = commentary_cache_dir
+        if corpus is None:
+            corpus = HexagramCorpus.for_directory(Path(resources_path) / 'hexagram_json')
+        self.corpus = corpus
+        if preload:
+            self.corpus.preload()
         logger.debug(f"Initialized HexagramManager with resources path: {resources_path}")
 
+    @property
+    def commentary_text(self) -> CommentaryText:
+        """The memory-mapped commentary corpus, segmented on first use."""
+        return CommentaryText.for_resources(self.resources_path, self.commentary_cache_dir)
+
+    @property
+    def commentary_index(self) -> CommentaryIndex:
+        """The search for commentary passages; the shared BM25 index unless given."""
+        if self._commentary_index is not None:
+            return self._commentary_index
+        return CommentaryIndex.for_resources(self.resources_path, self.commentary_cache_dir)
+
+    @property
+    def cache_stats(self) -> CacheStats:
+        """Hit and miss counters of the shared corpus cache."""
+        return self.corpus.stats
+
     def get_hexagram_data(self, number: int) -> Dict[str, Any]:
         """
         Retrieve data for a specific hexagram.
@@ -49,6 +128,49 @@ class HexagramManager:
             
         Returns:
             Dict[str, Any]: The complete data associated with the hexagram.
+                The dictionary is shared through the corpus cache and must
+                not be modified.
+            
+        Raises:
+            ValueError: If the hexagram number is not between 1 and 64.
+        """
+        if not 1 <= number <= 64:
+            raise ValueError(f"Invalid hexagram number: {number}")
+            
+        return self.corpus.get(number)
+
+    async def aget_hexagram_data(self, number: int) -> Dict[str, Any]:
+        """
+        Retrieve data for a specific hexagram without blocking the event loop.
+        
+        Uses the same corpus cache as ``get_hexagram_data``.
+        
+        Args:
+            number (int): The hexagram number (must be between 1 and 64).
+            
+        Returns:
+            Dict[str, Any]: The complete, shared data associated with the hexagram.
+            
+        Raises:
+            ValueError: If the hexagram number is not between 1 and 64.
+        """
+        if not 1 <= number <= 64:
+            raise ValueError(f"Invalid hexagram number: {number}")
+            
+        return await self.corpus.aget(number)
+
+    def get_hexagram_view(self, number: int) -> LazyHexagram:
+        """
+        Get a lazy view of a hexagram.
+        
+        The view supports the same mapping access as the dictionary returned
+        by ``get_hexagram_data`` but only fetches the sections that are read.
+        
+        Args:
+            number (int): The hexagram number (must be between 1 and 64).
+            
+        Returns:
+            LazyHexagram: The lazy view of the hexagram data.
             
         Raises:
             ValueError: If the hexagram number is not between 1 and 64.
@@ -56,7 +178,50 @@ class HexagramManager:
         if not 1 <= number <= 64:
             raise ValueError(f"Invalid hexagram number: {number}")
             
-        return load_hexagram_data(number)
+        return LazyHexagram(self.corpus, number)
+
+    async def aget_hexagram_view(self, number: int) -> LazyHexagram:
+        """
+        Asynchronous counterpart of ``get_hexagram_view``.
+        
+        Prepares the corpus without blocking the event loop, so reading
+        the view does not touch the disk; see ``HexagramCorpus.aprepare``.
+        
+        Args:
+            number (int): The hexagram number (must be between 1 and 64).
+            
+        Returns:
+            LazyHexagram: The lazy view of the hexagram data.
+            
+        Raises:
+            ValueError: If the hexagram number is not between 1 and 64.
+        """
+        view = self.get_hexagram_view(number)
+        await self.corpus.aprepare(number)
+        return view
+
+    def get_hexagram_section(self, number: int, section: str) -> Any:
+        """
+        Retrieve a single section of a hexagram.
+        
+        If the compiled corpus artifact is available, only this section is
+        decoded from the memory-mapped file.
+        
+        Args:
+            number (int): The hexagram number (must be between 1 and 64).
+            section (str): ``hexagram``, ``judgment``, ``image`` or ``lines.<i>``
+                (0-based line index).
+            
+        Returns:
+            Any: The decoded section. Shared through the cache, must not be modified.
+            
+        Raises:
+            ValueError: If the hexagram number is not between 1 and 64.
+        """
+        if not 1 <= number <= 64:
+            raise ValueError(f"Invalid hexagram number: {number}")
+            
+        return self.corpus.get_section(number, section)
 
     def create_reading_context(
         self,
@@ -67,6 +232,39 @@ class HexagramManager:
         """
         Create a complete reading context.
         
+        Args:
+            original_hex_num (int): The number of the original hexagram.
+            changing_lines (List[int]): The lines that are changing in the reading.
+            resulting_hex_num (int): The number of the resulting hexagram.
+            
+        Returns:
+            HexagramContext: A complete context for the hexagram reading. With
+                ``lazy`` enabled the hexagrams are ``LazyHexagram`` views.
+        """
+        load = self.get_hexagram_view if self.lazy else self.get_hexagram_data
+        original_data = load(original_hex_num)
+        resulting_data = load(resulting_hex_num)
+        
+        return HexagramContext(
+            original_hexagram=original_data,
+            changing_lines=changing_lines,
+            resulting_hexagram=resulting_data
+        )
+
+    async def acreate_reading_context(
+        self,
+        original_hex_num: int,
+        changing_lines: List[int],
+        resulting_hex_num: int
+    ) -> HexagramContext:
+        """
+        Create a complete reading context without blocking the event loop.
+        
+        With ``lazy`` enabled the returned views decode their sections from
+        the corpus artifact on access, as in ``create_reading_context``; only
+        without an artifact are the JSON files loaded into the cache first,
+        asynchronously, so the views never touch the disk.
+        
         Args:
             original_hex_num (int): The number of the original hexagram.
             changing_lines (List[int]): The lines that are changing in the reading.
@@ -75,8 +273,12 @@ class HexagramManager:
         Returns:
             HexagramContext: A complete context for the hexagram reading.
         """
-        original_data = self.get_hexagram_data(original_hex_num)
-        resulting_data = self.get_hexagram_data(resulting_hex_num)
+        if self.lazy:
+            original_data = await self.aget_hexagram_view(original_hex_num)
+            resulting_data = await self.aget_hexagram_view(resulting_hex_num)
+        else:
+            original_data = await self.aget_hexagram_data(original_hex_num)
+            resulting_data = await self.aget_hexagram_data(resulting_hex_num)
         
         return HexagramContext(
             original_hexagram=original_data,
@@ -84,13 +286,89 @@ class HexagramManager:
             resulting_hexagram=resulting_data
         )
         
-    def get_consultation_prompt(self, context: HexagramContext, question: str) -> str:
+    def get_hexagram_commentary(self, number: int, section: Optional[str] = None) -> Any:
+        """
+        Retrieve the commentary of a hexagram from ``yijing.txt``.
+        
+        Only the requested bytes are read from the memory-mapped corpus.
+        
+        Args:
+            number (int): The hexagram number (must be between 1 and 64).
+            section (Optional[str]): ``hexagram``, ``judgment``, ``image`` or
+                ``lines.<i>`` (0-based line index). None returns all sections.
+            
+        Returns:
+            Any: The text of the section (None if the corpus lacks it), or a
+                dictionary of all sections keyed by section name.
+            
+        Raises:
+            ValueError: If the hexagram number or section is invalid.
+        """
+        if not 1 <= number <= 64:
+            raise ValueError(f"Invalid hexagram number: {number}")
+        if section is None:
+            return self.commentary_text.hexagram(number)
+        return self.commentary_text.section(number, section)
+
+    def _hexagram_number(self, data: Mapping[str, Any]) -> Optional[int]:
+        """Get the number of a hexagram from its data or lazy view."""
+        if isinstance(data, LazyHexagram):
+            return data.number
+        return self.commentary_index.number_of(data['hexagram']['name'])
+
+    def get_commentary(
+        self,
+        context: HexagramContext,
+        question: str,
+        deadline: Optional[Deadline] = None
+    ) -> List[CommentaryPassage]:
+        """
+        Select the commentary passages that match the question best.
+        
+        Only the passages of the original and the resulting hexagram are
+        searched. If a ``VectorStore`` cannot embed the question within the
+        deadline, the passages are taken from the BM25 index instead.
+        
+        Args:
+            context (HexagramContext): The hexagram reading context.
+            question (str): The user's question.
+            deadline (Optional[Deadline]): Deadline of the request, bounds
+                the embedding of the question.
+            
+        Returns:
+            List[CommentaryPassage]: Up to ``commentary_passages`` passages,
+                best first.
+        """
+        if self.commentary_passages <= 0:
+            return []
+        numbers = {
+            self._hexagram_number(context.original_hexagram),
+            self._hexagram_number(context.resulting_hexagram)
+        }
+        numbers.discard(None)
+        index = self.commentary_index
+        if isinstance(index, VectorStore):
+            try:
+                return index.search(question, numbers, k=self.commentary_passages, deadline=deadline)
+            except ModelError as e:
+                logger.warning(f"Embedding the question failed, using the BM25 index: {e}")
+                index = CommentaryIndex.for_resources(self.resources_path, self.commentary_cache_dir)
+        return index.search(question, numbers, k=self.commentary_passages)
+
+    def get_consultation_prompt(
+        self,
+        context: HexagramContext,
+        question: str,
+        deadline: Optional[Deadline] = None
+    ) -> str:
         """
         Generate a consultation prompt for the AI model.
         
         Args:
             context (HexagramContext): The hexagram reading context.
             question (str): The user's question.
+            deadline (Optional[Deadline]): Deadline of the request, see
+                ``get_commentary``.
             
         Returns:
             str: A formatted prompt incorporating the context and question.
@@ -101,8 +379,18 @@ class HexagramManager:
             "Hexagramm-Kontext:",
             f"- Ursprüngliches Hexagramm: {context.original_hexagram['hexagram']['name']}",
             f"- Wandelnde Linien: {', '.join(map(str, context.changing_lines))}",
-            f"- Resultierendes Hexagramm: {context.resulting_hexagram['hexagram']['name']}\n",
-            "Bitte interpretiere diese Konstellation im Kontext der Frage."
+            f"- Resultierendes Hexagramm: {context.resulting_hexagram['hexagram']['name']}\n"
         ]
         
+        # Passende Stellen aus dem Kommentar
+        passages = self.get_commentary(context, question, deadline)
+        if passages:
+            prompt.append("Kommentar:")
+            prompt.extend(
+                f"- {self.commentary_index.names[p.number]}, {_section_label(p.section)}: {p.text}"
+                for p in passages
+            )
+            prompt.append("")
+        
+        prompt.append("Bitte interpretiere diese Konstellation im Kontext der Frage.")
         return "\n".join(prompt)
\ No newline at end of file
@@ -3,23 +3,41 @@
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, List
-import google.generativeai as genai
+from typing import Optional, Dict, Any, List, Iterable, Iterator, AsyncIterator, Tuple
 import logging
 import os
+import time
 import json
-import ollama  # Importieren Sie Ollama
+import hashlib
+import threading
 
-from contextlib import AsyncExitStack
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
 from asyncio import TimeoutError
-import aiofiles
 
 from ..models import HypergramData, HexagramContext, HypergramLine, Hypergram
 from .generator import cast_hypergram
+from .rng import RngLike, new_seed
 from .manager import HexagramManager
-from ..enums import ConsultationMode
-from ..config import Settings, settings, ModelType
-from ..utils.resource_loader import load_system_prompt  # Nur load_system_prompt wird benötigt
+from .embeddings import VectorStore
+from .backends import Message, ModelBackend, create_backend
+from .response_cache import ResponseCache
+from .batch import BatchResult, arun_batch, run_batch
+from .sessions import DEFAULT_SESSION_ID, DialogueSession, DialogueSessionManager
+from .history import compact_history, estimate_tokens
+from .resilience import (
+    CircuitBreaker,
+    Deadline,
+    RetryPolicy,
+    acall_with_resilience,
+    astream_with_resilience,
+    call_with_resilience,
+    get_circuit_breaker,
+    stream_with_resilience
+)
+from ..enums import ConsultationMode, StreamEventType
+from ..config import Settings, settings, ModelType, PromptRegistry
+from ..utils.singleflight import SingleFlight, AsyncSingleFlight
 
 import json
 #from typing import Dict, Any, Optional
@@ -38,6 +56,35 @@ project_dir = Path.cwd() # Aktuelles Arbeitsverzeichnis
 resources_dir = project_dir / 'yijing' / 'resources' # Ressourcenverzeichnis
 
 
+class _StreamTimer:
+    """Sammelt die Textstücke eines Streams und misst die Zeiten."""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.first_token_at: Optional[float] = None
+        self.parts: List[str] = []
+
+    def token_event(self, token: str) -> Dict[str, Any]:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.parts.append(token)
+        return {'type': StreamEventType.TOKEN, 'text': token}
+
+    def text(self) -> str:
+        return ''.join(self.parts)
+
+    def timing(self) -> Dict[str, Any]:
+        """Zeit bis zum ersten Token und Gesamtdauer in Sekunden."""
+        return {
+            'time_to_first_token': (
+                self.first_token_at - self.started
+                if self.first_token_at is not None else None
+            ),
+            'elapsed': time.perf_counter() - self.started,
+            'token_count': len(self.parts)
+        }
+
+
 class YijingOracle:
     """
     The Yijing Oracle class for generating hexagram readings and responses.
@@ -53,8 +100,14 @@ class YijingOracle:
         api_key (str): The API key for the Generative AI model.
         resources_path (Path): The path to the resources directory.
         hexagram_manager (HexagramManager): The hexagram manager for generating hexagram readings.
-        model (GenerativeModel): The generative model used for generating responses.
-        chat_session (ChatSession): The chat session for dialogue
+        backend (ModelBackend): The model backend registered for ``settings.model_type``.
+        sessions (DialogueSessionManager): Dialogue histories by session ID.
+        history (List[Message]): Questions and answers of the default dialogue session.
+        response_cache (Optional[ResponseCache]): Cache of single-mode answers.
+        single_flight (SingleFlight): Shares one model call between concurrent
+            identical consultations (``async_single_flight`` for the async API).
+        circuit_breaker (CircuitBreaker): Breaker shared by all oracles using
+            the same backend and model.
 
     Raises:
         ValueError: If the API key is not provided for the GenAI model.
@@ -80,10 +133,6 @@ class YijingOracle:
                 "entweder über einen Parameter oder die Umgebungsvariable 'GEMINI_API_KEY'."
             )
         
-        # Configure GenAI if needed
-        if self.settings.model_type == ModelType.GENAI:
-            genai.configure(api_key=self.api_key)
-        
         # Resources setup
         if resources_path:
             self.resources_path = resources_path
@@ -96,30 +145,77 @@ class YijingOracle:
         # Verify resources exist
         self._verify_resource_structure()
         
-        # Initialize hexagram manager
-        self.hexagram_manager = HexagramManager(self.resources_path)
+        # Initialize hexagram manager and the shared prompt cache
+        self.hexagram_manager = HexagramManager(
+            self.resources_path,
+            commentary_passages=self.settings.commentary_passages,
+            commentary_index=self._commentary_search(),
+            commentary_cache_dir=self.settings.commentary_cache_dir
+        )
+        self.prompt_registry = PromptRegistry.for_directory(self.resources_path / 'prompts')
+        
+        # Cache of model answers for repeated single consultations
+        self.response_cache: Optional[ResponseCache] = ResponseCache.from_settings(self.settings)
+        self.single_flight = SingleFlight()
+        self.async_single_flight = AsyncSingleFlight()
+        
+        # Dialogue histories per session, one turn at a time per session
+        self.sessions = DialogueSessionManager.from_settings(self.settings)
+        self._prepared = False
         
-        # Set up model based on settings
+        # Set up the backend registered for the model type
         try:
-            if self.settings.model_type == ModelType.GENAI:
-                self.model = genai.GenerativeModel(
-                    model_name=self.settings.active_model,
-                    system_instruction=self._get_system_prompt()
-                )
-                
-                # Initialize chat session for dialogue mode
-                self.chat_session = None
-                if self.settings.consultation_mode == ConsultationMode.DIALOGUE:
-                    self.chat_session = self.model.start_chat()
-            elif self.settings.model_type == ModelType.OLLAMA:
-                # No specific initialization needed for Ollama
-                pass
-            else:
-                raise ValueError(f"Unbekannter Modelltyp: {self.settings.model_type}")
-                
+            self.backend: ModelBackend = create_backend(self.settings, self.api_key)
         except Exception as e:
             self.logger.error("Fehler bei der Initialisierung", exc_info=True)
             raise RuntimeError(f"Oracle-Initialisierungsfehler: {str(e)}")
+        
+        if self.settings.ollama_warmup:
+            self.warm_up()
+
+    def prepare(self) -> 'YijingOracle':
+        """
+        Erledigt die einmalige Vorbereitung, damit Anfragen nur noch das Nötigste tun.
+
+        Kompiliert den System-Prompt, lädt alle Hexagramme in den Korpus-Cache,
+        öffnet den Kommentar-Index (falls Kommentarstellen gewünscht sind) und
+        lässt das Backend Objekte für den System-Prompt anlegen (z.B. das
+        ``GenerativeModel`` von GenAI). Weitere Aufrufe kosten nichts.
+
+        Returns:
+            YijingOracle: Das vorbereitete Orakel
+        """
+        if self._prepared:
+            return self
+        system_prompt = self._get_system_prompt()
+        self.hexagram_manager.corpus.preload()
+        if self.hexagram_manager.commentary_passages:
+            self.hexagram_manager.commentary_index
+        prepare = getattr(self.backend, 'prepare', None)
+        if prepare is not None:
+            prepare(system_prompt)
+        self._prepared = True
+        return self
+
+    def warm_up(self) -> bool:
+        """
+        Lädt das Modell vorab, damit die erste Anfrage nicht auf das Laden wartet.
+
+        Backends ohne ``warm_up`` werden übersprungen; Fehler werden nur
+        protokolliert, da der Server beim Start des Orakels noch fehlen darf.
+
+        Returns:
+            bool: True, wenn das Modell geladen wurde
+        """
+        warm_up = getattr(self.backend, 'warm_up', None)
+        if warm_up is None:
+            return False
+        try:
+            warm_up()
+            return True
+        except Exception as e:
+            self.logger.warning(f"Aufwärmen des Modells fehlgeschlagen: {e}")
+            return False
 
     def _initialize_settings(self, custom_settings: Optional[Dict[str, Any]] = None) -> Settings:
         """
@@ -135,23 +231,39 @@ class YijingOracle:
             ConfigurationError: If settings validation fails
         """
         try:
-            # Start with default settings
-            base_settings = Settings()
-            
-            if custom_settings:
-                # Update with custom settings
-                for key, value in custom_settings.items():
-                    if hasattr(base_settings, key):
-                        setattr(base_settings, key, value)
-                    else:
-                        self.logger.warning(f"Ignoring unknown setting: {key}")
-            
-            return base_settings
+            overrides = {}
+            for key, value in (custom_settings or {}).items():
+                if key in Settings.model_fields:
+                    overrides[key] = value
+                else:
+                    self.logger.warning(f"Ignoring unknown setting: {key}")
+
+            # Validate defaults and overrides together, so strings become enums
+            return Settings.model_validate(overrides)
             
         except Exception as e:
             raise ConfigurationError(f"Failed to initialize settings: {str(e)}")
         
         
+    def _commentary_search(self) -> Optional[VectorStore]:
+        """
+        Wählt die Suche für Kommentarstellen im Prompt.
+
+        Returns:
+            Optional[VectorStore]: Der Vektorspeicher bei ``embedding``, None für
+                den BM25-Index, den der Manager bei Bedarf selbst öffnet
+
+        Raises:
+            ValueError: Bei unbekannter ``commentary_retrieval``
+            ResourceNotFoundError: Wenn der Vektorspeicher noch nicht gebaut wurde
+        """
+        retrieval = self.settings.commentary_retrieval
+        if retrieval not in ('bm25', 'embedding'):
+            raise ValueError(f"Unbekannte commentary_retrieval: {retrieval}")
+        if retrieval == 'embedding' and self.settings.commentary_passages:
+            return VectorStore.from_settings(self.settings, self.resources_path)
+        return None
+
     def _verify_resource_structure(self) -> None:
         """
         Verify that all required resource files exist in the prompts directory.
@@ -193,11 +305,11 @@ class YijingOracle:
 
     def _get_system_prompt(self) -> str:
         """
-        Load and combine the prompt templates for the oracle's system prompt.
+        Get the oracle's system prompt.
         
-        This method loads the base system prompt, consultation template, and 
-        mode-specific template from the prompts directory and combines them 
-        into a complete system prompt.
+        The base system prompt, the mode-specific template and the consultation
+        template are compiled once by the shared prompt registry and only read
+        again after one of them changed.
         
         Returns:
             str: The combined system prompt text
@@ -206,20 +318,32 @@ class YijingOracle:
             FileNotFoundError: If any required template file is missing
         """
         try:
-            # Get the prompts directory path
-            prompts_path = self.resources_path / 'prompts'
-            
-            # Load each template from the prompts directory
-            system_template = (prompts_path / 'system_prompt.txt').read_text(encoding='utf-8')
-            consultation_template = (prompts_path / 'consultation_template.txt').read_text(encoding='utf-8')
-            mode_template = (prompts_path / f"{self.settings.consultation_mode.value}_mode_prompt.txt").read_text(encoding='utf-8')
+            return self.prompt_registry.system_prompt(self.settings.consultation_mode).text
+        except Exception as e:
+            self.logger.error(f"Error loading prompt templates: {str(e)}")
+            raise
+
+    async def _aget_system_prompt(self) -> str:
+        """
+        Asynchronous counterpart of ``_get_system_prompt`` with the same cache.
+        
+        Returns:
+            str: The combined system prompt text
             
-            # Combine the templates
-            return f"{system_template}\n\n{mode_template}\n\n{consultation_template}"
-                    
+        Raises:
+            FileNotFoundError: If any required template file is missing
+        """
+        try:
+            prompt = await self.prompt_registry.asystem_prompt(self.settings.consultation_mode)
+            return prompt.text
         except Exception as e:
             self.logger.error(f"Error loading prompt templates: {str(e)}")
             raise
+
+    @property
+    def system_prompt_hash(self) -> str:
+        """SHA-256 digest of the current system prompt."""
+        return self.prompt_registry.system_prompt(self.settings.consultation_mode).digest
         
     def _setup_logging(self) -> logging.Logger:
         """Set up basic logging."""
@@ -235,9 +359,36 @@ class YijingOracle:
             )
         return logger
 
-    def get_response(self, question: str) -> Dict[str, Any]:
+    def get_response(
+        self,
+        question: str,
+        rng: RngLike = None,
+        seed: Optional[int] = None,
+        timeout: Optional[float] = None,
+        session_id: str = DEFAULT_SESSION_ID
+    ) -> Dict[str, Any]:
         """
         Generiert eine Weissagung basierend auf der Frage und dem gewählten Modell.
+
+        Args:
+            question (str): Die Frage an das Orakel
+            rng (RngLike): Expliziter Zufallsgenerator für den Wurf (z.B. ein
+                Stream aus ``spawn_rngs`` pro Worker)
+            seed (Optional[int]): Seed zum exakten Wiederholen eines Wurfs.
+                Ohne rng und seed wird ein neuer Seed aus dem Stream des
+                aktuellen Threads gezogen und in der Antwort unter 'seed'
+                zurückgegeben. Nicht zusammen mit rng verwendbar.
+            timeout (Optional[float]): Frist der Anfrage in Sekunden
+                einschließlich Wiederholungen, sonst ``settings.request_timeout``
+            session_id (str): Dialogsitzung, deren Verlauf im Dialogmodus
+                fortgesetzt wird
+
+        Raises:
+            ValueError: Wenn sowohl rng als auch seed angegeben sind
+            ModelTimeoutError: Wenn die Frist abläuft
+            CircuitOpenError: Wenn das Backend nach wiederholten Fehlern
+                vorübergehend gesperrt ist
+            ModelResponseError: Bei anderen Fehlern des Modells
         """
         try:
             self.logger.info(
@@ -248,54 +399,112 @@ class YijingOracle:
             # Validiere die Konfiguration
             self._validate_configuration()
             
-            # Generiere Hexagrammdaten
-            try:
-                hypergram_data = cast_hypergram()
-            except ValueError as e:
-                raise HexagramTransformationError(
-                    error_detail=str(e)
-                ) from e
-            
-            # Erstelle Hexagrammkontext
-            try:
-                context = self._create_hexagram_context(hypergram_data)
-            except FileNotFoundError as e:
-                raise ResourceNotFoundError(
-                    resource_path=str(e)
-                ) from e
-            
-            # Generiere Prompt
-            prompt = self.hexagram_manager.get_consultation_prompt(
-                context=context,
-                question=question
+            # Wurf, Hexagrammkontext und Prompt
+            deadline = self._deadline(timeout)
+            hypergram_data, context, prompt = self._prepare_consultation(
+                question, rng, seed, deadline
             )
             
-            # Hole Modellantwort
-            try:
-                if self.settings.model_type == ModelType.GENAI:
-                    response_text = self._get_model_response(prompt)
-                else:
-                    response_text = self._get_ollama_response(prompt)
-            except Exception as e:
-                raise ModelResponseError(
-                    model_name=self.settings.active_model,
-                    response=str(e)
-                ) from e
+            # Antwort aus dem Cache oder vom Modell
+            cache_key = self._response_cache_key(
+                question, hypergram_data, self._system_prompt_digest()
+            )
+            response_text = self.response_cache.get(cache_key) if self._use_cache(cache_key) else None
+            cached = response_text is not None
+            if not cached:
+                try:
+                    if cache_key:
+                        # Gleichzeitige identische Anfragen teilen sich einen Modellaufruf
+                        response_text, _ = self.single_flight.do(
+                            cache_key, self._complete_and_store, cache_key, prompt, deadline
+                        )
+                    else:
+                        response_text = self._complete(prompt, deadline, session_id)
+                except ModelConnectionError:
+                    raise
+                except Exception as e:
+                    raise ModelResponseError(
+                        model_name=self.settings.active_model,
+                        response=str(e)
+                    ) from e
                 
             # Erstelle und validiere die Antwort
-            response = {
-                'answer': response_text,
-                'hypergram_data': hypergram_data.dict(),
-                'hexagram_context': {
-                    'original': context.original_hexagram['hexagram']['name'],
-                    'resulting': context.resulting_hexagram['hexagram']['name'],
-                    'changing_lines': context.changing_lines
-                },
-                'model_used': self.settings.active_model,
-                'timestamp': datetime.now().isoformat(),
-                'consultation_mode': self.settings.consultation_mode
-            }
+            response = self._build_response(response_text, hypergram_data, context, cached)
+            self._validate_response(response)
+            return response
+                
+        except Exception as e:
+            self.logger.error(
+                "Unerwarteter Fehler bei der Generierung der Antwort",
+                exc_info=True
+            )
+            raise
+            
+    async def aget_response(
+        self,
+        question: str,
+        rng: RngLike = None,
+        seed: Optional[int] = None,
+        timeout: Optional[float] = None,
+        session_id: str = DEFAULT_SESSION_ID
+    ) -> Dict[str, Any]:
+        """
+        Asynchrone Variante von ``get_response``.
+
+        Ressourcen werden über ``aiofiles`` geladen und die Modelle über ihre
+        nativen asynchronen Clients (``ollama.AsyncClient``,
+        ``generate_content_async``) des Backends angefragt, sodass eine Event-Loop viele
+        Weissagungen gleichzeitig bearbeiten kann. Wird der aufrufende Task
+        abgebrochen, wird auch die laufende Modellanfrage abgebrochen.
+
+        Args:
+            question (str): Die Frage an das Orakel
+            rng (RngLike): Expliziter Zufallsgenerator für den Wurf
+            seed (Optional[int]): Seed zum exakten Wiederholen eines Wurfs
+            timeout (Optional[float]): Frist der Anfrage in Sekunden
+            session_id (str): Dialogsitzung im Dialogmodus
+
+        Returns:
+            Dict[str, Any]: Dieselbe Struktur wie ``get_response``
+        """
+        try:
+            self.logger.info(
+                f"Verarbeite Frage (async) im {self.settings.consultation_mode} Modus "
+                f"mit Modell {self.settings.model_type.value}"
+            )
             
+            self._validate_configuration()
+            deadline = self._deadline(timeout)
+            hypergram_data, context, prompt = await self._aprepare_consultation(
+                question, rng, seed, deadline
+            )
+            
+            prompt_digest = (await self.prompt_registry.asystem_prompt(
+                self.settings.consultation_mode
+            )).digest
+            cache_key = self._response_cache_key(question, hypergram_data, prompt_digest)
+            response_text = (
+                await self.response_cache.aget(cache_key)
+                if self._use_cache(cache_key) else None
+            )
+            cached = response_text is not None
+            if not cached:
+                try:
+                    if cache_key:
+                        response_text, _ = await self.async_single_flight.do(
+                            cache_key, self._acomplete_and_store, cache_key, prompt, deadline
+                        )
+                    else:
+                        response_text = await self._acomplete(prompt, deadline, session_id)
+                except ModelConnectionError:
+                    raise
+                except Exception as e:
+                    raise ModelResponseError(
+                        model_name=self.settings.active_model,
+                        response=str(e)
+                    ) from e
+                
+            response = self._build_response(response_text, hypergram_data, context, cached)
             self._validate_response(response)
             return response
                 
@@ -305,6 +514,564 @@ class YijingOracle:
                 exc_info=True
             )
             raise
+
+    def stream_response(
+        self,
+        question: str,
+        rng: RngLike = None,
+        seed: Optional[int] = None,
+        timeout: Optional[float] = None,
+        session_id: str = DEFAULT_SESSION_ID
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Generiert eine Weissagung und liefert die Modellantwort Stück für Stück.
+
+        Die Ereignisse haben den Schlüssel 'type' (siehe ``StreamEventType``):
+        zuerst 'reading' mit Wurf und Hexagrammkontext, dann ein 'token' je
+        Textstück des Modells und zuletzt 'summary' mit der vollständigen
+        Antwort (wie ``get_response``) und den Zeitmessungen.
+
+        Args:
+            question (str): Die Frage an das Orakel
+            rng (RngLike): Expliziter Zufallsgenerator für den Wurf
+            seed (Optional[int]): Seed zum exakten Wiederholen eines Wurfs
+            timeout (Optional[float]): Frist bis zum Ende des Streams in Sekunden
+            session_id (str): Dialogsitzung im Dialogmodus
+
+        Yields:
+            Dict[str, Any]: Die Ereignisse der Weissagung
+        """
+        started = time.perf_counter()
+        self._validate_configuration()
+        deadline = self._deadline(timeout)
+        hypergram_data, context, prompt = self._prepare_consultation(question, rng, seed, deadline)
+        yield self._reading_event(hypergram_data, context)
+
+        timer = _StreamTimer(started)
+        try:
+            for token in self._stream_model_tokens(prompt, deadline, session_id):
+                if token:
+                    yield timer.token_event(token)
+        except ModelConnectionError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Fehler beim Streamen der Antwort: {e}")
+            raise ModelResponseError(
+                model_name=self.settings.active_model,
+                response=str(e)
+            ) from e
+
+        yield self._summary_event(timer, hypergram_data, context)
+
+    async def astream_response(
+        self,
+        question: str,
+        rng: RngLike = None,
+        seed: Optional[int] = None,
+        timeout: Optional[float] = None,
+        session_id: str = DEFAULT_SESSION_ID
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Asynchrone Variante von ``stream_response`` mit denselben Ereignissen.
+
+        Args:
+            question (str): Die Frage an das Orakel
+            rng (RngLike): Expliziter Zufallsgenerator für den Wurf
+            seed (Optional[int]): Seed zum exakten Wiederholen eines Wurfs
+            timeout (Optional[float]): Frist bis zum Ende des Streams in Sekunden
+            session_id (str): Dialogsitzung im Dialogmodus
+
+        Yields:
+            Dict[str, Any]: Die Ereignisse der Weissagung
+        """
+        started = time.perf_counter()
+        self._validate_configuration()
+        deadline = self._deadline(timeout)
+        hypergram_data, context, prompt = await self._aprepare_consultation(
+            question, rng, seed, deadline
+        )
+        yield self._reading_event(hypergram_data, context)
+
+        timer = _StreamTimer(started)
+        try:
+            async for token in self._astream_model_tokens(prompt, deadline, session_id):
+                if token:
+                    yield timer.token_event(token)
+        except ModelConnectionError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Fehler beim Streamen der Antwort: {e}")
+            raise ModelResponseError(
+                model_name=self.settings.active_model,
+                response=str(e)
+            ) from e
+
+        yield self._summary_event(timer, hypergram_data, context)
+
+    def get_responses(
+        self,
+        questions: Iterable[str],
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Iterator[BatchResult[str]]:
+        """
+        Beantwortet viele Fragen mit begrenzter Parallelität.
+
+        Alle Weissagungen teilen sich dieses Orakel und damit Korpus-Cache,
+        Antwort-Cache und Client-Pool. Die Fragen werden erst bei Bedarf aus
+        ``questions`` gelesen. Im Dialogmodus laufen die Runden nacheinander.
+
+        Args:
+            questions (Iterable[str]): Die Fragen an das Orakel
+            concurrency (Optional[int]): Höchstzahl gleichzeitiger
+                Weissagungen, sonst ``settings.batch_concurrency``
+            timeout (Optional[float]): Frist je Weissagung in Sekunden
+
+        Yields:
+            BatchResult[str]: Ein Ergebnis je Frage in der Reihenfolge der
+                Fertigstellung; fehlgeschlagene Weissagungen mit ``error``
+        """
+        return run_batch(
+            lambda question: self.get_response(question, timeout=timeout),
+            questions,
+            self._batch_concurrency(concurrency)
+        )
+
+    def aget_responses(
+        self,
+        questions: Iterable[str],
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[BatchResult[str]]:
+        """
+        Asynchrone Variante von ``get_responses`` in der laufenden Event-Loop.
+
+        Wird die Iteration vorzeitig beendet, werden die laufenden
+        Weissagungen abgebrochen.
+        """
+        return arun_batch(
+            lambda question: self.aget_response(question, timeout=timeout),
+            questions,
+            self._batch_concurrency(concurrency)
+        )
+
+    def _batch_concurrency(self, concurrency: Optional[int]) -> int:
+        if self.settings.consultation_mode == ConsultationMode.DIALOGUE:
+            return 1
+        return concurrency if concurrency is not None else self.settings.batch_concurrency
+
+    def _prepare_consultation(
+        self,
+        question: str,
+        rng: RngLike,
+        seed: Optional[int],
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[HypergramData, HexagramContext, str]:
+        """
+        Wirft das Hypergramm und erstellt Hexagrammkontext und Prompt.
+
+        Die Frist begrenzt auch das Einbetten der Frage für die Kommentarsuche.
+
+        Raises:
+            HexagramTransformationError: Wenn der Wurf fehlschlägt
+            ResourceNotFoundError: Wenn Hexagrammdaten fehlen
+        """
+        hypergram_data = self._cast_reading(rng, seed)
+        try:
+            context = self._create_hexagram_context(hypergram_data)
+        except FileNotFoundError as e:
+            raise ResourceNotFoundError(
+                resource_path=str(e)
+            ) from e
+        prompt = self.hexagram_manager.get_consultation_prompt(
+            context=context,
+            question=question,
+            deadline=deadline
+        )
+        return hypergram_data, context, prompt
+
+    async def _aprepare_consultation(
+        self,
+        question: str,
+        rng: RngLike,
+        seed: Optional[int],
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[HypergramData, HexagramContext, str]:
+        """Asynchrone Variante von ``_prepare_consultation``."""
+        hypergram_data = self._cast_reading(rng, seed)
+        try:
+            context = await self._acreate_hexagram_context(hypergram_data)
+        except FileNotFoundError as e:
+            raise ResourceNotFoundError(
+                resource_path=str(e)
+            ) from e
+        if self.hexagram_manager.commentary_passages:
+            # Die Suche nach Kommentarstellen kann das Embedding-Modell aufrufen
+            prompt = await asyncio.to_thread(
+                self.hexagram_manager.get_consultation_prompt, context, question, deadline
+            )
+        else:
+            prompt = self.hexagram_manager.get_consultation_prompt(
+                context=context,
+                question=question
+            )
+        return hypergram_data, context, prompt
+
+    def _reading_event(
+        self,
+        hypergram_data: HypergramData,
+        context: HexagramContext
+    ) -> Dict[str, Any]:
+        """Erstes Ereignis eines Streams: Wurf und Hexagrammkontext."""
+        return {
+            'type': StreamEventType.READING,
+            'hypergram_data': hypergram_data.dict(),
+            'hexagram_context': self._summarize_context(context),
+            'seed': hypergram_data.seed
+        }
+
+    def _summary_event(
+        self,
+        timer: '_StreamTimer',
+        hypergram_data: HypergramData,
+        context: HexagramContext
+    ) -> Dict[str, Any]:
+        """Letztes Ereignis eines Streams: vollständige Antwort und Zeiten."""
+        response = self._build_response(timer.text(), hypergram_data, context)
+        self._validate_response(response)
+        return {
+            'type': StreamEventType.SUMMARY,
+            'response': response,
+            **timer.timing()
+        }
+
+    def _messages(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        session: Optional[DialogueSession] = None
+    ) -> List[Message]:
+        """
+        Erstellt die Nachrichten an das Backend: System-Prompt, Dialogverlauf, Frage.
+
+        Übersteigt der Dialog ``settings.dialogue_token_budget``, werden die
+        ältesten Runden außer der ersten aus dem Verlauf der Sitzung entfernt.
+        """
+        if system_prompt is None:
+            system_prompt = self._get_system_prompt()
+        messages = [{"role": "system", "content": system_prompt}]
+        if session is not None:
+            history, dropped = compact_history(
+                session.history,
+                self.settings.dialogue_token_budget,
+                estimate_tokens(system_prompt) + estimate_tokens(prompt)
+            )
+            if dropped:
+                session.history[:] = history
+                session.omitted_turns += dropped
+                # The backend state still contains the dropped turns
+                session.model_state = None
+            messages.extend(session.history)
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    @staticmethod
+    def _remember(
+        session: Optional[DialogueSession],
+        prompt: str,
+        answer: str,
+        model_state: Optional[List[int]] = None
+    ) -> None:
+        """Hängt eine Dialogrunde an den Verlauf der Sitzung an (nur im Dialogmodus)."""
+        if session is not None:
+            session.append_turn(prompt, answer, model_state)
+
+    def _model_state(self, session: Optional[DialogueSession], prompt: str) -> Optional[List[int]]:
+        """Der Backend-Zustand der Sitzung, sofern er noch ins Token-Budget passt."""
+        if session is None or session.model_state is None:
+            return None
+        budget = self.settings.dialogue_token_budget
+        if budget is not None and len(session.model_state) + estimate_tokens(prompt) > budget:
+            return None
+        return session.model_state
+
+    def _continues_dialogue(self, session: Optional[DialogueSession]) -> bool:
+        return (
+            session is not None
+            and self.settings.dialogue_reuse_state
+            and hasattr(self.backend, 'continue_dialogue')
+        )
+
+    def _backend_turn(
+        self,
+        messages: List[Message],
+        session: Optional[DialogueSession],
+        state: Optional[List[int]],
+        timeout: Optional[float]
+    ) -> Tuple[str, Optional[List[int]]]:
+        """Eine Anfrage an das Backend; im Dialog mit dessen Zustand, wenn möglich."""
+        if self._continues_dialogue(session):
+            return self.backend.continue_dialogue(messages, state, timeout)
+        return self.backend.complete(messages, timeout), None
+
+    async def _abackend_turn(
+        self,
+        messages: List[Message],
+        session: Optional[DialogueSession],
+        state: Optional[List[int]],
+        timeout: Optional[float]
+    ) -> Tuple[str, Optional[List[int]]]:
+        """Asynchrone Variante von ``_backend_turn``."""
+        if self._continues_dialogue(session):
+            return await self.backend.acontinue_dialogue(messages, state, timeout)
+        return await self.backend.acomplete(messages, timeout), None
+
+    @contextmanager
+    def _dialogue_turn(self, session_id: str) -> Iterator[Optional[DialogueSession]]:
+        """Im Dialogmodus die Sitzung für eine Runde, sonst None."""
+        if self.settings.consultation_mode != ConsultationMode.DIALOGUE:
+            yield None
+            return
+        with self.sessions.checkout(session_id) as session:
+            yield session
+
+    @asynccontextmanager
+    async def _adialogue_turn(self, session_id: str) -> AsyncIterator[Optional[DialogueSession]]:
+        """Asynchrone Variante von ``_dialogue_turn``."""
+        if self.settings.consultation_mode != ConsultationMode.DIALOGUE:
+            yield None
+            return
+        async with self.sessions.acheckout(session_id) as session:
+            yield session
+
+    @property
+    def history(self) -> List[Message]:
+        """Kopie des Verlaufs der Standard-Dialogsitzung."""
+        return self.sessions.history(DEFAULT_SESSION_ID)
+
+    @staticmethod
+    def _check_prompt(prompt: Optional[str]) -> None:
+        if not prompt or not prompt.strip():
+            raise ValueError("Empty prompt")
+
+    def _deadline(self, timeout: Optional[float] = None) -> Deadline:
+        """Frist einer Anfrage, standardmäßig ``settings.request_timeout``."""
+        return Deadline(timeout if timeout is not None else self.settings.request_timeout)
+
+    def _retry_policy(self) -> RetryPolicy:
+        return RetryPolicy(
+            attempts=self.settings.retry_attempts,
+            base_delay=self.settings.retry_base_delay,
+            max_delay=self.settings.retry_max_delay
+        )
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """Der prozessweite Circuit Breaker von Backend und Modell."""
+        return get_circuit_breaker(
+            f"{self.settings.model_type.value}:{self.settings.active_model}",
+            failure_threshold=self.settings.circuit_failure_threshold,
+            reset_timeout=self.settings.circuit_reset_timeout
+        )
+
+    def _complete(
+        self,
+        prompt: str,
+        deadline: Optional[Deadline] = None,
+        session_id: str = DEFAULT_SESSION_ID
+    ) -> str:
+        """
+        Holt die vollständige Antwort des Backends.
+
+        Vorübergehende Fehler werden innerhalb der Frist mit exponentiellem
+        Backoff wiederholt.
+
+        Raises:
+            ValueError: Wenn der Prompt leer ist
+            ModelTimeoutError: Wenn die Frist abläuft
+            CircuitOpenError: Wenn der Circuit Breaker offen ist
+        """
+        self._check_prompt(prompt)
+        system_prompt = self._get_system_prompt()
+        with self._dialogue_turn(session_id) as session:
+            messages = self._messages(prompt, system_prompt, session)
+            state = self._model_state(session, prompt)
+            answer, state = call_with_resilience(
+                lambda timeout: self._backend_turn(messages, session, state, timeout),
+                self.settings.active_model,
+                deadline or self._deadline(),
+                self._retry_policy(),
+                self.circuit_breaker
+            )
+            self._remember(session, prompt, answer, state)
+        return answer
+
+    async def _acomplete(
+        self,
+        prompt: str,
+        deadline: Optional[Deadline] = None,
+        session_id: str = DEFAULT_SESSION_ID
+    ) -> str:
+        """
+        Asynchrone Variante von ``_complete``.
+
+        Raises:
+            ValueError: Wenn der Prompt leer ist
+            ModelTimeoutError: Wenn die Frist abläuft
+            CircuitOpenError: Wenn der Circuit Breaker offen ist
+        """
+        self._check_prompt(prompt)
+        system_prompt = await self._aget_system_prompt()
+        async with self._adialogue_turn(session_id) as session:
+            messages = self._messages(prompt, system_prompt, session)
+            state = self._model_state(session, prompt)
+            answer, state = await acall_with_resilience(
+                lambda timeout: self._abackend_turn(messages, session, state, timeout),
+                self.settings.active_model,
+                deadline or self._deadline(),
+                self._retry_policy(),
+                self.circuit_breaker
+            )
+            self._remember(session, prompt, answer, state)
+        return answer
+
+    def _stream_model_tokens(
+        self,
+        prompt: str,
+        deadline: Optional[Deadline] = None,
+        session_id: str = DEFAULT_SESSION_ID
+    ) -> Iterator[str]:
+        """Liefert die Textstücke der Modellantwort, sobald sie eintreffen."""
+        system_prompt = self._get_system_prompt()
+        with self._dialogue_turn(session_id) as session:
+            messages = self._messages(prompt, system_prompt, session)
+            parts = []
+            for token in stream_with_resilience(
+                lambda timeout: self.backend.stream(messages, timeout),
+                self.settings.active_model,
+                deadline or self._deadline(),
+                self.circuit_breaker
+            ):
+                parts.append(token)
+                yield token
+            self._remember(session, prompt, ''.join(parts))
+
+    async def _astream_model_tokens(
+        self,
+        prompt: str,
+        deadline: Optional[Deadline] = None,
+        session_id: str = DEFAULT_SESSION_ID
+    ) -> AsyncIterator[str]:
+        """Asynchrone Variante von ``_stream_model_tokens``."""
+        system_prompt = await self._aget_system_prompt()
+        async with self._adialogue_turn(session_id) as session:
+            messages = self._messages(prompt, system_prompt, session)
+            parts = []
+            async for token in astream_with_resilience(
+                lambda timeout: self.backend.astream(messages, timeout),
+                self.settings.active_model,
+                deadline or self._deadline(),
+                self.circuit_breaker
+            ):
+                parts.append(token)
+                yield token
+            self._remember(session, prompt, ''.join(parts))
+
+    def _cast_reading(self, rng: RngLike, seed: Optional[int]) -> HypergramData:
+        """
+        Wirft ein Hypergramm mit der konfigurierten Methode.
+
+        Raises:
+            ValueError: Wenn sowohl ``rng`` als auch ``seed`` angegeben sind
+            HexagramTransformationError: Wenn der Wurf fehlschlägt
+        """
+        if rng is not None and seed is not None:
+            raise ValueError("Pass either rng or seed, not both")
+        if rng is None:
+            rng = int(seed) if seed is not None else new_seed()
+        try:
+            return cast_hypergram(
+                method=self.settings.casting_method,
+                rng=rng
+            )
+        except ValueError as e:
+            raise HexagramTransformationError(
+                error_detail=str(e)
+            ) from e
+
+    def _build_response(
+        self,
+        response_text: str,
+        hypergram_data: HypergramData,
+        context: HexagramContext,
+        cached: bool = False
+    ) -> Dict[str, Any]:
+        """Stellt das Antwort-Dictionary einer Weissagung zusammen."""
+        return {
+            'answer': response_text,
+            'cached': cached,
+            'hypergram_data': hypergram_data.dict(),
+            'hexagram_context': self._summarize_context(context),
+            'model_used': self.settings.active_model,
+            'seed': hypergram_data.seed,
+            'timestamp': datetime.now().isoformat(),
+            'consultation_mode': self.settings.consultation_mode
+        }
+            
+    def _use_cache(self, cache_key: Optional[str]) -> bool:
+        return cache_key is not None and self.response_cache is not None
+
+    def _complete_and_store(self, cache_key: str, prompt: str, deadline: Optional[Deadline] = None) -> str:
+        """Holt die Antwort vom Modell und legt sie im Cache ab."""
+        answer = self._complete(prompt, deadline)
+        if self.response_cache is not None:
+            self.response_cache.set(cache_key, answer)
+        return answer
+
+    async def _acomplete_and_store(self, cache_key: str, prompt: str, deadline: Optional[Deadline] = None) -> str:
+        """Asynchrone Variante von ``_complete_and_store``."""
+        answer = await self._acomplete(prompt, deadline)
+        if self.response_cache is not None:
+            await self.response_cache.aset(cache_key, answer)
+        return answer
+
+    def _system_prompt_digest(self) -> str:
+        return self.prompt_registry.system_prompt(self.settings.consultation_mode).digest
+
+    def _response_cache_key(
+        self,
+        question: str,
+        hypergram_data: HypergramData,
+        prompt_digest: str
+    ) -> Optional[str]:
+        """
+        Schlüssel einer Weissagung für Cache und Single-Flight.
+
+        Im Dialogmodus hängt die Antwort vom Verlauf ab, daher gibt es dort
+        keinen Schlüssel (None).
+        """
+        if self.settings.consultation_mode != ConsultationMode.SINGLE:
+            return None
+        transition = hypergram_data.hypergram.transition()
+        return ResponseCache.make_key(
+            question=question,
+            original_number=transition.original_number,
+            changing_lines=hypergram_data.changing_lines,
+            resulting_number=transition.resulting_number,
+            model_type=self.settings.model_type,
+            model=self.settings.active_model,
+            mode=self.settings.consultation_mode,
+            prompt_digest=prompt_digest
+        )
+
+    @staticmethod
+    def _summarize_context(context: HexagramContext) -> Dict[str, Any]:
+        """Namen der Hexagramme und wandelnde Linien für die Antwort."""
+        return {
+            'original': context.original_hexagram['hexagram']['name'],
+            'resulting': context.resulting_hexagram['hexagram']['name'],
+            'changing_lines': context.changing_lines
+        }
             
     def _validate_configuration(self) -> None:
         """
@@ -357,147 +1124,133 @@ class YijingOracle:
             HexagramContext: The context for the hexagram reading, including the original hexagram number, 
                              the changing lines, and the resulting hexagram number.
         """
-        original_number = hypergram_data.old_hexagram.to_binary_number() + 1
-        resulting_number = hypergram_data.new_hexagram.to_binary_number() + 1
+        transition = hypergram_data.hypergram.transition()
         
         return self.hexagram_manager.create_reading_context(
-            original_hex_num=original_number,
+            original_hex_num=transition.original_number,
             changing_lines=hypergram_data.changing_lines,
-            resulting_hex_num=resulting_number
+            resulting_hex_num=transition.resulting_number
         )
 
-    def _get_single_response(self, prompt: str) -> str:
-        """
-        Generate a single response based on the provided prompt.
-        Args:
-            prompt (str): The input prompt to generate a response for.
-        Returns:
-            str: The generated response text.
-        Raises:
-            ValueError: If no valid response is received or the response does not have a 'text' attribute.
-        """
-        self.logger.debug("Generating single response")
-        response = self.model.generate_content(prompt)
-        
-        if not response or not hasattr(response, 'text'):
-            raise ValueError("No valid response received in single mode")
-        
-        return response.text
-
-    def _get_dialogue_response(self, prompt: str) -> str:
-        """
-        Generate a response using the chat session.
-        This method sends a prompt to the chat session and retrieves the response.
-        If the chat session is not already started, it initializes a new session.
-        Args:
-            prompt (str): The input prompt to send to the chat session.
-        Returns:
-            str: The text of the first part of the response from the chat session.
-        Raises:
-            ValueError: If no valid response is received from the chat session.
-        """
-        self.logger.debug("Generating dialogue response")
-        if not self.chat_session:
-            self.chat_session = self.model.start_chat()
-            
-        response = self.chat_session.send_message(prompt)
+    async def _acreate_hexagram_context(self, hypergram_data: HypergramData) -> HexagramContext:
+        """Asynchronous counterpart of ``_create_hexagram_context``."""
+        transition = hypergram_data.hypergram.transition()
         
-        if not response or not hasattr(response, 'parts'):
-            raise ValueError("No valid response received in dialogue mode")
-            
-        return response.parts[0].text
+        return await self.hexagram_manager.acreate_reading_context(
+            original_hex_num=transition.original_number,
+            changing_lines=hypergram_data.changing_lines,
+            resulting_hex_num=transition.resulting_number
+        )
 
-    def start_new_consultation(self):
+    def start_new_consultation(self, session_id: str = DEFAULT_SESSION_ID):
         """
         Start a new consultation session.
 
         This method initiates a new consultation session based on the current
         consultation mode specified in the settings. If the consultation mode
-        is set to DIALOGUE, it logs the start of a new session and initiates
-        a chat session using the model.
+        is set to DIALOGUE, it logs the start of a new session and clears
+        the dialogue history of the session, in memory and on disk.
+
+        Args:
+            session_id (str): The dialogue session to restart.
 
         Returns:
             None
         """
         if self.settings.consultation_mode == ConsultationMode.DIALOGUE:
-            self.logger.info("Starting new consultation session")
-            self.chat_session = self.model.start_chat()
+            self.logger.info(f"Starting new consultation session {session_id}")
+            self.sessions.reset(session_id)
 
-    def _get_ollama_response(self, prompt: str) -> str:
-        """
-        Kommuniziert mit Ollama, um eine Antwort zu erhalten.
+_ORACLES: Dict[Tuple[str, ...], YijingOracle] = {}
+_ORACLES_LOCK = threading.Lock()
+_ORACLE_CREATIONS = SingleFlight()
 
-        Args:
-            prompt (str): Der zu verarbeitende Prompt
+def _secret_digest(api_key: Optional[str]) -> str:
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest() if api_key else ''
 
-        Returns:
-            str: Die Antwort von Ollama
-        """
-        try:
-            # Formatiere die Nachrichten im korrekten Format für Ollama
-            messages = [
-                {
-                    "role": "system",
-                    "content": self._get_system_prompt()
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-
-            response = ollama.chat(
-                model=self.settings.active_model,
-                messages=messages
-            )
-            
-            if not isinstance(response, dict) or 'message' not in response:
-                raise ModelResponseError(
-                    model_name=self.settings.active_model,
-                    response="Ungültiges Antwortformat von Ollama"
-                )
-                
-            return response['message']['content']
-            
-        except Exception as e:
-            self.logger.error(f"Fehler bei der Kommunikation mit Ollama: {e}")
-            raise ModelResponseError(
-                model_name=self.settings.active_model,
-                response=str(e)
-            )
-   
-    def _get_ollama_response(self, prompt: str) -> str:
-        """Kommuniziert mit Ollama."""
-        try:
-            messages = [
-                {
-                    "role": "system",
-                    "content": self._get_system_prompt()
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-
-            response = ollama.chat(
-                model=self.settings.active_model,
-                messages=messages
-            )
-            
-            return response['message']['content']
-                
-        except Exception as e:
-            self.logger.error(f"Fehler bei der Kommunikation mit Ollama: {e}")
-            raise ModelResponseError(
-                model_name=self.settings.active_model,
-                response=str(e)
-            )
+def _effective_settings(custom_settings: Optional[Dict[str, Any]]) -> Settings:
+    """Settings wie in ``YijingOracle._initialize_settings``, ohne Orakel."""
+    return Settings.model_validate({
+        key: value for key, value in (custom_settings or {}).items()
+        if key in Settings.model_fields
+    })
+
+def _create_oracle(
+    settings_key: Tuple[str, ...],
+    api_key: Optional[str],
+    resources_path: Optional[Path],
+    custom_settings: Optional[Dict[str, Any]]
+) -> YijingOracle:
+    """Erzeugt und bereitet das Orakel eines Schlüssels vor, außerhalb von ``_ORACLES_LOCK``."""
+    with _ORACLES_LOCK:
+        oracle = _ORACLES.get(settings_key)
+    if oracle is None:
+        oracle = YijingOracle(
+            api_key=api_key,
+            resources_path=resources_path,
+            custom_settings=custom_settings
+        ).prepare()
+        with _ORACLES_LOCK:
+            oracle = _ORACLES.setdefault(settings_key, oracle)
+    return oracle
+
+def get_oracle(
+    api_key: Optional[str] = None,
+    resources_path: Optional[Path] = None,
+    custom_settings: Optional[Dict[str, Any]] = None
+) -> YijingOracle:
+    """
+    Get the process-wide, prepared oracle of a configuration.
+
+    Oracles are cached by their effective settings, API key and resources
+    path, so different dictionaries resulting in the same settings share one
+    oracle. The first call constructs and prepares the oracle (see
+    ``YijingOracle.prepare``); concurrent first calls for the same settings
+    wait for that one construction, while other configurations are not
+    held up by it. Later calls are a dictionary lookup. The oracle is shared by all threads; in dialogue mode, pass a
+    ``session_id`` per user so that their histories stay apart.
+
+    Args:
+        api_key (Optional[str]): The API key for the GenAI model.
+        resources_path (Optional[Path]): The path to the resources directory.
+        custom_settings (Optional[Dict[str, Any]]): Settings overriding the defaults.
+
+    Returns:
+        YijingOracle: The shared oracle.
+    """
+    location = str(resources_path or '')
+    request_key = (
+        'request', _secret_digest(api_key), location,
+        repr(sorted((custom_settings or {}).items()))
+    )
+    oracle = _ORACLES.get(request_key)
+    if oracle is not None:
+        return oracle
+
+    effective = _effective_settings(custom_settings).model_dump_json()
+    settings_key = ('settings', _secret_digest(api_key), location, effective)
+    with _ORACLES_LOCK:
+        oracle = _ORACLES.get(settings_key)
+    if oracle is None:
+        oracle, _ = _ORACLE_CREATIONS.do(
+            settings_key, _create_oracle, settings_key, api_key, resources_path, custom_settings
+        )
+    with _ORACLES_LOCK:
+        _ORACLES[request_key] = oracle
+    return oracle
+
+def clear_oracles() -> None:
+    """Forget all oracles created by ``get_oracle``."""
+    with _ORACLES_LOCK:
+        _ORACLES.clear()
 
 def ask_oracle(question: str, api_key: str = os.getenv("GENAI_API_KEY")) -> Dict[str, Any]:
     """
     Convenience function to get oracle response.
 
+    The oracle is created once per process (see ``get_oracle``) and reused
+    by every call.
+
     Args:
         question (str): The question to ask the oracle.
         api_key (str, optional): The API key for authentication. Defaults to the value of the environment variable 'GENAI_API_KEY'.
@@ -505,8 +1258,7 @@ def ask_oracle(question: str, api_key: str = os.getenv("GENAI_API_KEY")) -> Dict
     Returns:
         Dict[str, Any]: The response from the oracle.
     """
-    oracle = YijingOracle(api_key=api_key)
-    return oracle.get_response(question)
+    return get_oracle(api_key=api_key).get_response(question)
 
 def formatiere_weissagung_markdown(weissagung: Dict[str, Any]) -> str:
     """
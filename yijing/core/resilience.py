@@ -0,0 +1,415 @@
+# yijing/core/resilience.py
+
+"""
+Resilience Module
+================
+Deadlines, retries and circuit breakers for model calls.
+
+Every consultation gets a ``Deadline``. The remaining time is handed to the
+backend call as its timeout, and no retry is started that could not finish
+in time. Transient failures (connection problems, timeouts, HTTP 408/429/5xx)
+are retried with exponential backoff and full jitter. A ``CircuitBreaker``
+per backend and model counts consecutive transient failures; once open, calls
+fail immediately with ``CircuitOpenError`` until a single probe call after
+``reset_timeout`` succeeds. Streams are guarded by the deadline and the
+circuit breaker as well, but never retried, since tokens were already
+handed to the caller.
+"""
+
+import asyncio
+import random
+import threading
+import time
+import logging
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+import httpx
+
+from ..exceptions import CircuitOpenError, ModelConnectionError, ModelTimeoutError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+TRANSIENT_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+class Deadline:
+    """
+    Point in time by which a request must be finished.
+
+    Args:
+        timeout (Optional[float]): Seconds from now, None for no deadline.
+        clock (Callable[[], float]): Time source, ``time.monotonic`` by default.
+    """
+    __slots__ = ('timeout', 'clock', '_expires_at')
+
+    def __init__(self, timeout: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.timeout = timeout
+        self.clock = clock
+        self._expires_at = None if timeout is None else clock() + timeout
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), None without deadline."""
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - self.clock())
+
+    def expired(self) -> bool:
+        return self._expires_at is not None and self.clock() >= self._expires_at
+
+    def check(self, model_name: str) -> None:
+        """
+        Raises:
+            ModelTimeoutError: If the deadline has passed.
+        """
+        if self.expired():
+            raise ModelTimeoutError(model_name, self.timeout)
+
+    def __repr__(self) -> str:
+        return f"Deadline(timeout={self.timeout}, remaining={self.remaining()})"
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    Attributes:
+        attempts (int): Maximum number of attempts including the first one.
+        base_delay (float): Upper bound of the first delay in seconds.
+        max_delay (float): Upper bound of any delay in seconds.
+    """
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    def delay(self, retry: int, rng: random.Random = random) -> float:
+        """Delay before retry number ``retry`` (0-based)."""
+        return rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+def _status_code(error: BaseException) -> Optional[int]:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code
+    for attribute in ('status_code', 'code'):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Check whether a failed model call is worth retrying.
+
+    Connection errors, timeouts and HTTP 408, 429 and 5xx responses are
+    transient; an open circuit and invalid answers are not.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (ModelConnectionError, ConnectionError, TimeoutError,
+                          asyncio.TimeoutError, httpx.TransportError)):
+        return True
+    return _status_code(error) in TRANSIENT_STATUS_CODES
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker of one backend and model.
+
+    States:
+        closed:    calls pass, consecutive transient failures are counted
+        open:      calls fail immediately with ``CircuitOpenError``
+        half_open: after ``reset_timeout`` one probe call passes; its result
+                   closes or reopens the circuit
+
+    Args:
+        name (str): Name used in errors and logs, usually ``<type>:<model>``.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open.
+        clock (Callable[[], float]): Time source, ``time.monotonic`` by default.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> None:
+        """
+        Reserve a call.
+
+        Raises:
+            CircuitOpenError: While the circuit is open, or while another
+                caller runs the probe call.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            elapsed = self.clock() - self._opened_at
+            if self._state == self.OPEN and elapsed >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            raise CircuitOpenError(self.name, max(0.0, self.reset_timeout - elapsed))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self._state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Circuit {self.name} opened after {self.failures} failures")
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+
+    def release(self) -> None:
+        """Give back a reserved call that ended without a verdict on the backend."""
+        with self._lock:
+            self._probing = False
+
+    def __repr__(self) -> str:
+        return f"CircuitBreaker({self.name!r}, state={self.state}, failures={self.failures})"
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+def get_circuit_breaker(
+    name: str,
+    failure_threshold: int = 5,
+    reset_timeout: float = 30.0
+) -> CircuitBreaker:
+    """
+    Get the process-wide circuit breaker of a backend and model.
+
+    The thresholds only apply when the breaker is created.
+    """
+    breaker = _BREAKERS.get(name)
+    if breaker is None:
+        with _BREAKERS_LOCK:
+            breaker = _BREAKERS.setdefault(
+                name, CircuitBreaker(name, failure_threshold, reset_timeout)
+            )
+    return breaker
+
+def reset_circuit_breakers() -> None:
+    """Forget all circuit breakers (mainly for tests)."""
+    with _BREAKERS_LOCK:
+        _BREAKERS.clear()
+
+_TIMEOUT_ERRORS = (TimeoutError, asyncio.TimeoutError, httpx.TimeoutException)
+
+def _record(breaker: Optional[CircuitBreaker], error: BaseException) -> None:
+    """Count a transient failure, give back the call otherwise."""
+    if breaker is None:
+        return
+    if is_transient(error):
+        breaker.record_failure()
+    else:
+        breaker.release()
+
+def _final_error(error: Exception, name: str, deadline: Deadline) -> Exception:
+    """Translate a failure that is not retried into the oracle's exceptions."""
+    if isinstance(error, _TIMEOUT_ERRORS):
+        return ModelTimeoutError(name, deadline.timeout)
+    if is_transient(error) and not isinstance(error, ModelConnectionError):
+        return ModelConnectionError(name, str(error) or type(error).__name__)
+    return error
+
+def _retry_delay(
+    error: Exception,
+    retry: int,
+    policy: RetryPolicy,
+    deadline: Deadline,
+    name: str
+) -> Optional[float]:
+    """Delay before the next attempt, None if the error must be raised."""
+    if not is_transient(error) or retry + 1 >= policy.attempts:
+        return None
+    delay = policy.delay(retry)
+    remaining = deadline.remaining()
+    if remaining is not None and delay >= remaining:
+        return None
+    logger.warning(f"Model call {name} failed ({error!r}), retry {retry + 1} in {delay:.2f}s")
+    return delay
+
+def call_with_resilience(
+    fn: Callable[[Optional[float]], T],
+    name: str,
+    deadline: Deadline,
+    policy: RetryPolicy,
+    breaker: Optional[CircuitBreaker] = None,
+    sleep: Callable[[float], None] = time.sleep
+) -> T:
+    """
+    Call ``fn(timeout)`` within the deadline, retrying transient failures.
+
+    Args:
+        fn (Callable[[Optional[float]], T]): The model call; receives the
+            remaining seconds of the deadline (or None) as timeout.
+        name (str): Model name for errors and logs.
+        deadline (Deadline): Deadline of the whole request.
+        policy (RetryPolicy): Retry policy.
+        breaker (Optional[CircuitBreaker]): Circuit breaker of the backend.
+
+    Raises:
+        ModelTimeoutError: If the deadline passes.
+        ModelConnectionError: If transient failures persist.
+        CircuitOpenError: If the circuit breaker is open.
+    """
+    retry = 0
+    while True:
+        deadline.check(name)
+        if breaker is not None:
+            breaker.allow()
+        try:
+            result = fn(deadline.remaining())
+        except Exception as e:
+            _record(breaker, e)
+            delay = _retry_delay(e, retry, policy, deadline, name)
+            if delay is None:
+                final = _final_error(e, name, deadline)
+                if final is e:
+                    raise
+                raise final from e
+            sleep(delay)
+            retry += 1
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+async def acall_with_resilience(
+    fn: Callable[[Optional[float]], Awaitable[T]],
+    name: str,
+    deadline: Deadline,
+    policy: RetryPolicy,
+    breaker: Optional[CircuitBreaker] = None
+) -> T:
+    """
+    Asynchronous counterpart of ``call_with_resilience``.
+
+    Each attempt is additionally bounded by ``asyncio.wait_for``, so the
+    backend request is cancelled when the deadline passes.
+    """
+    retry = 0
+    while True:
+        deadline.check(name)
+        if breaker is not None:
+            breaker.allow()
+        try:
+            remaining = deadline.remaining()
+            result = await asyncio.wait_for(fn(remaining), remaining)
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.release()
+            raise
+        except Exception as e:
+            _record(breaker, e)
+            delay = _retry_delay(e, retry, policy, deadline, name)
+            if delay is None:
+                final = _final_error(e, name, deadline)
+                if final is e:
+                    raise
+                raise final from e
+            await asyncio.sleep(delay)
+            retry += 1
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+def stream_with_resilience(
+    fn: Callable[[Optional[float]], Iterator[T]],
+    name: str,
+    deadline: Deadline,
+    breaker: Optional[CircuitBreaker] = None
+) -> Iterator[T]:
+    """
+    Yield the items of ``fn(timeout)`` within the deadline, without retries.
+
+    Raises:
+        ModelTimeoutError: If the deadline passes before the stream ends.
+        CircuitOpenError: If the circuit breaker is open.
+    """
+    deadline.check(name)
+    if breaker is not None:
+        breaker.allow()
+    settled = False
+    try:
+        for item in fn(deadline.remaining()):
+            deadline.check(name)
+            yield item
+    except Exception as e:
+        settled = True
+        _record(breaker, e)
+        final = _final_error(e, name, deadline)
+        if final is e:
+            raise
+        raise final from e
+    else:
+        settled = True
+        if breaker is not None:
+            breaker.record_success()
+    finally:
+        # Closed early by the consumer: no verdict on the backend
+        if not settled and breaker is not None:
+            breaker.release()
+
+async def astream_with_resilience(
+    fn: Callable[[Optional[float]], AsyncIterator[T]],
+    name: str,
+    deadline: Deadline,
+    breaker: Optional[CircuitBreaker] = None
+) -> AsyncIterator[T]:
+    """Asynchronous counterpart of ``stream_with_resilience``."""
+    deadline.check(name)
+    if breaker is not None:
+        breaker.allow()
+    settled = False
+    try:
+        async for item in fn(deadline.remaining()):
+            deadline.check(name)
+            yield item
+    except Exception as e:
+        settled = True
+        _record(breaker, e)
+        final = _final_error(e, name, deadline)
+        if final is e:
+            raise
+        raise final from e
+    else:
+        settled = True
+        if breaker is not None:
+            breaker.record_success()
+    finally:
+        if not settled and breaker is not None:
+            breaker.release()
@@ -0,0 +1,155 @@
+# yijing/core/response_cache.py
+
+"""
+Response Cache Module
+====================
+Caches model answers of single consultations.
+
+An answer depends only on the question, the reading (original hexagram,
+changing lines, resulting hexagram), the model, the consultation mode and
+the system prompt. These form the cache key, so a repeated question with
+the same reading is answered without querying the model, and editing a
+prompt template makes all older entries unreachable.
+
+Two tiers are used: an in-memory LRU cache and an optional SQLite database
+that survives restarts and is shared between worker processes. Both honour
+the same TTL.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from ..config import Settings
+from ..utils.cache import CacheStats, LRUCache, SQLiteCache
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """
+    Two-tier cache of model answers.
+
+    Args:
+        maxsize (int): Maximum number of answers kept in memory.
+        ttl (Optional[float]): Lifetime of an answer in seconds, None for no limit.
+        path (Optional[Path]): SQLite database of the persistent tier, None
+            to keep answers in memory only.
+        persistent_maxsize (int): Maximum number of answers in the database.
+
+    Attributes:
+        stats (CacheStats): Hits and misses over both tiers, updated under
+            the cache's lock; read them through ``metrics``.
+        memory (LRUCache): The in-memory tier.
+        persistent (Optional[SQLiteCache]): The persistent tier, if configured.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        path: Optional[Path] = None,
+        persistent_maxsize: int = 100_000
+    ):
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.persistent: Optional[SQLiteCache] = None
+        if path is not None:
+            self.persistent = SQLiteCache(path, maxsize=persistent_maxsize, ttl=ttl)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> Optional['ResponseCache']:
+        """Create the cache configured in the settings, None if disabled."""
+        if settings.response_cache_size <= 0:
+            return None
+        return cls(
+            maxsize=settings.response_cache_size,
+            ttl=settings.response_cache_ttl,
+            path=settings.response_cache_path
+        )
+
+    @staticmethod
+    def make_key(
+        question: str,
+        original_number: int,
+        changing_lines: Sequence[int],
+        resulting_number: int,
+        model_type: str,
+        model: str,
+        mode: str,
+        prompt_digest: str
+    ) -> str:
+        """
+        Build the cache key of a consultation.
+
+        Returns:
+            str: SHA-256 hex digest over all parts of the key.
+        """
+        parts = [
+            question.strip(),
+            original_number,
+            sorted(changing_lines),
+            resulting_number,
+            str(getattr(model_type, 'value', model_type)),
+            model,
+            str(getattr(mode, 'value', mode)),
+            prompt_digest
+        ]
+        encoded = json.dumps(parts, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached answer, promoting persistent hits into memory."""
+        answer = self.memory.get(key)
+        if answer is None and self.persistent is not None:
+            answer = self.persistent.get(key)
+            if answer is not None:
+                self.memory.set(key, answer)
+        with self._lock:
+            if answer is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+        return answer
+
+    def set(self, key: str, answer: str) -> None:
+        """Store an answer in all tiers."""
+        self.memory.set(key, answer)
+        if self.persistent is not None:
+            self.persistent.set(key, answer)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Like ``get``, with database access off the event loop."""
+        if self.persistent is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, answer: str) -> None:
+        """Like ``set``, with database access off the event loop."""
+        if self.persistent is None:
+            self.set(key, answer)
+        else:
+            await asyncio.to_thread(self.set, key, answer)
+
+    def invalidate(self) -> None:
+        """Drop all cached answers."""
+        self.memory.invalidate()
+        if self.persistent is not None:
+            self.persistent.invalidate()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get the counters of the cache and of each tier."""
+        with self._lock:
+            metrics: Dict[str, Any] = self.stats.as_dict()
+        metrics['memory'] = self.memory.metrics()
+        if self.persistent is not None:
+            metrics['persistent'] = self.persistent.metrics()
+        return metrics
+
+    def close(self) -> None:
+        if self.persistent is not None:
+            self.persistent.close()
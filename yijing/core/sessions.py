@@ -0,0 +1,373 @@
+# yijing/core/sessions.py
+
+"""
+Sessions Module
+==============
+Dialogue histories of many concurrent users.
+
+Every dialogue belongs to a session ID. At most ``max_sessions`` histories
+are kept in memory; when a new session would exceed the limit, the least
+recently used idle session is written to a JSON file and dropped from
+memory. Its next turn reads the file again, so memory stays bounded no
+matter how many users are in a dialogue.
+
+Sessions are checked out for the duration of a turn. A checked-out session
+is never evicted, and each session has its own lock, taken by synchronous
+and asynchronous turns alike, so the turns of one user run in order while
+different users are served in parallel. Session files are read and written
+outside the manager's lock, and asynchronous turns do so in a worker thread.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from ..config import Settings
+from ..utils.cache import CacheStats
+from .backends import Message
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_ID = 'default'
+
+async def _acquire_lock(lock: threading.Lock) -> None:
+    """Acquire a thread lock without blocking the event loop."""
+    if lock.acquire(blocking=False):
+        return
+    acquiring = asyncio.ensure_future(asyncio.to_thread(lock.acquire))
+    try:
+        await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        # The worker thread still gets the lock; hand it back once it does
+        def release(future: 'asyncio.Future[bool]') -> None:
+            if not future.cancelled() and future.exception() is None:
+                lock.release()
+        acquiring.add_done_callback(release)
+        raise
+
+class DialogueSession:
+    """
+    History and lock of one dialogue.
+
+    Attributes:
+        session_id (str): ID of the session.
+        history (List[Message]): Questions and answers so far.
+        updated_at (float): Unix time of the last turn.
+        model_state (Optional[List[int]]): Conversation state returned by the
+            backend (Ollama's ``context``) to continue without resending the
+            history; None when the history has to be sent as text.
+        omitted_turns (int): Turns dropped to keep within the token budget.
+        lock (threading.Lock): Held for the duration of a turn, and while
+            the session is written to disk.
+        alock (asyncio.Lock): Queues the asynchronous turns of the session,
+            so at most one of them waits for ``lock`` in a worker thread.
+    """
+    __slots__ = (
+        'session_id', 'history', 'updated_at', 'model_state', 'omitted_turns',
+        'lock', 'alock', 'active'
+    )
+
+    def __init__(
+        self,
+        session_id: str,
+        history: Optional[List[Message]] = None,
+        updated_at: Optional[float] = None,
+        model_state: Optional[List[int]] = None,
+        omitted_turns: int = 0
+    ):
+        self.session_id = session_id
+        self.history: List[Message] = history or []
+        self.updated_at = updated_at if updated_at is not None else time.time()
+        self.model_state = model_state
+        self.omitted_turns = omitted_turns
+        self.lock = threading.Lock()
+        self.alock = asyncio.Lock()
+        self.active = 0
+
+    def append_turn(
+        self,
+        prompt: str,
+        answer: str,
+        model_state: Optional[List[int]] = None
+    ) -> None:
+        """Add a question and its answer to the history."""
+        self.history.append({"role": "user", "content": prompt})
+        self.history.append({"role": "assistant", "content": answer})
+        self.model_state = model_state
+        self.updated_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'session_id': self.session_id,
+            'history': self.history,
+            'updated_at': self.updated_at,
+            'model_state': self.model_state,
+            'omitted_turns': self.omitted_turns
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DialogueSession':
+        return cls(
+            data['session_id'],
+            data.get('history', []),
+            data.get('updated_at'),
+            data.get('model_state'),
+            data.get('omitted_turns', 0)
+        )
+
+    def __repr__(self) -> str:
+        return f"DialogueSession({self.session_id!r}, turns={len(self.history) // 2})"
+
+class DialogueSessionManager:
+    """
+    LRU-bounded store of dialogue sessions with spill-to-disk.
+
+    Args:
+        directory (Optional[Path]): Directory of the spilled sessions. None
+            creates a temporary directory on first eviction.
+        max_sessions (int): Maximum number of sessions kept in memory.
+
+    Attributes:
+        stats (CacheStats): ``hits`` counts turns of sessions in memory,
+            ``misses`` sessions created or read back from disk, ``evictions``
+            sessions written to disk.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_sessions: int = 1000):
+        if max_sessions < 1:
+            raise ValueError(f"max_sessions must be at least 1, got {max_sessions}")
+        self.directory = Path(directory) if directory is not None else None
+        self.max_sessions = max_sessions
+        self.stats = CacheStats()
+        self._sessions: 'OrderedDict[str, DialogueSession]' = OrderedDict()
+        self._spilling: Dict[str, DialogueSession] = {}
+        self._loading: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> 'DialogueSessionManager':
+        """Create the manager configured in the settings."""
+        return cls(
+            directory=settings.dialogue_session_dir,
+            max_sessions=settings.dialogue_max_sessions
+        )
+
+    @staticmethod
+    def _file_name(session_id: str) -> str:
+        return hashlib.sha256(session_id.encode('utf-8')).hexdigest()[:32] + '.json'
+
+    def _spill_directory(self) -> Path:
+        """Directory of the spilled sessions, created on first use."""
+        if self.directory is None:
+            self.directory = Path(tempfile.mkdtemp(prefix='yijing-sessions-'))
+            logger.debug(f"Spilling dialogue sessions to {self.directory}")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return self.directory
+
+    def _read(self, session_id: str) -> DialogueSession:
+        """Read a spilled session, or start a new one."""
+        if self.directory is not None:
+            path = self.directory / self._file_name(session_id)
+            try:
+                data = json.loads(path.read_text(encoding='utf-8'))
+            except FileNotFoundError:
+                pass
+            else:
+                path.unlink()
+                return DialogueSession.from_dict(data)
+        return DialogueSession(session_id)
+
+    def _write(self, session: DialogueSession) -> None:
+        path = self._spill_directory() / self._file_name(session.session_id)
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(session.to_dict(), ensure_ascii=False), encoding='utf-8')
+        os.replace(temporary, path)
+
+    def _drop(self, session: DialogueSession) -> Optional[DialogueSession]:
+        """Drop an idle session from memory, returning it if it must be spilled (lock held)."""
+        del self._sessions[session.session_id]
+        if not session.history:
+            return None
+        self._spilling[session.session_id] = session
+        return session
+
+    def _evict(self) -> List[DialogueSession]:
+        """Drop idle sessions until the limit is met and return those to spill (lock held)."""
+        spill = []
+        for session_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            session = self._sessions[session_id]
+            if session.active:
+                continue
+            if self._drop(session) is not None:
+                spill.append(session)
+            self.stats.evictions += 1
+        return spill
+
+    def _lock_dropped(self, session: DialogueSession) -> bool:
+        """Take the lock of a dropped session, unless it is checked out again meanwhile."""
+        while not session.lock.acquire(timeout=0.01):
+            with self._lock:
+                if self._spilling.get(session.session_id) is not session:
+                    return False
+        return True
+
+    def _spill(self, sessions: List[DialogueSession]) -> None:
+        """
+        Write dropped sessions to disk, without holding the manager's lock.
+
+        A session that is checked out again before it is written stays in
+        memory and is not written.
+        """
+        for session in sessions:
+            if not self._lock_dropped(session):
+                continue
+            try:
+                with self._lock:
+                    if self._spilling.get(session.session_id) is not session:
+                        continue
+                self._write(session)
+            finally:
+                session.lock.release()
+            with self._lock:
+                if self._spilling.get(session.session_id) is session:
+                    del self._spilling[session.session_id]
+                elif (
+                    session.session_id not in self._sessions
+                    and session.session_id not in self._spilling
+                ):
+                    # Reset while it was written
+                    (self.directory / self._file_name(session.session_id)).unlink(missing_ok=True)
+
+    def _checkin(self, session: DialogueSession) -> List[DialogueSession]:
+        """Count a turn of a session in memory (lock held)."""
+        session.active += 1
+        return self._evict()
+
+    def _take(self, session_id: str) -> Optional[Tuple[DialogueSession, List[DialogueSession]]]:
+        """Like ``_acquire`` for a session in memory, None otherwise; caller holds ``_lock``."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._spilling.pop(session_id, None)
+            if session is None:
+                return None
+            self._sessions[session_id] = session
+        self.stats.hits += 1
+        self._sessions.move_to_end(session_id)
+        return session, self._checkin(session)
+
+    def _acquire(self, session_id: str) -> Tuple[DialogueSession, List[DialogueSession]]:
+        """Get a session for a turn, together with the sessions to spill."""
+        while True:
+            with self._lock:
+                acquired = self._take(session_id)
+                if acquired is not None:
+                    return acquired
+                loading = self._loading.get(session_id)
+                if loading is None:
+                    loading = self._loading[session_id] = threading.Event()
+                    break
+            # Another thread is reading the session's file
+            loading.wait()
+
+        try:
+            session = self._read(session_id)
+            with self._lock:
+                self.stats.misses += 1
+                self._sessions[session_id] = session
+                return session, self._checkin(session)
+        finally:
+            with self._lock:
+                del self._loading[session_id]
+            loading.set()
+
+    def _release(self, session: DialogueSession) -> List[DialogueSession]:
+        with self._lock:
+            session.active -= 1
+            return self._evict()
+
+    @contextmanager
+    def checkout(self, session_id: str = DEFAULT_SESSION_ID) -> Iterator[DialogueSession]:
+        """
+        Use a session for one turn, holding its lock.
+
+        Args:
+            session_id (str): ID of the session; unknown IDs start a new dialogue.
+
+        Yields:
+            DialogueSession: The session, read back from disk if it was spilled.
+        """
+        session, spill = self._acquire(session_id)
+        try:
+            self._spill(spill)
+            with session.lock:
+                yield session
+        finally:
+            self._spill(self._release(session))
+
+    @asynccontextmanager
+    async def acheckout(self, session_id: str = DEFAULT_SESSION_ID) -> AsyncIterator[DialogueSession]:
+        """
+        Asynchronous counterpart of ``checkout``.
+
+        Shares the session lock with ``checkout``; waiting for it and disk
+        access run in a worker thread.
+        """
+        with self._lock:
+            acquired = self._take(session_id)
+        if acquired is None:
+            acquired = await asyncio.to_thread(self._acquire, session_id)
+        session, spill = acquired
+        try:
+            if spill:
+                await asyncio.to_thread(self._spill, spill)
+            async with session.alock:
+                await _acquire_lock(session.lock)
+                try:
+                    yield session
+                finally:
+                    session.lock.release()
+        finally:
+            spill = self._release(session)
+            if spill:
+                await asyncio.to_thread(self._spill, spill)
+
+    def history(self, session_id: str = DEFAULT_SESSION_ID) -> List[Message]:
+        """Get a copy of a session's history without checking it out."""
+        with self.checkout(session_id) as session:
+            return list(session.history)
+
+    def reset(self, session_id: str = DEFAULT_SESSION_ID) -> None:
+        """Forget a session's history, in memory and on disk."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None) or self._spilling.pop(session_id, None)
+            if session is not None:
+                session.history.clear()
+                session.model_state = None
+            if self.directory is not None:
+                (self.directory / self._file_name(session_id)).unlink(missing_ok=True)
+
+    def spill_all(self) -> None:
+        """Write all idle sessions with history to disk and drop them from memory."""
+        with self._lock:
+            spill = [
+                session for session in list(self._sessions.values())
+                if not session.active and self._drop(session) is not None
+            ]
+        self._spill(spill)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,491 @@
+# yijing/core/text_index.py
+
+"""
+Text Index Module
+================
+BM25 full-text index over the passages of the commentary corpus ``yijing.txt``.
+
+Passages are the sections found by ``segment_commentary``, long sections
+split at sentence ends. The index is built once and stored next to the
+corpus as a single file that is read through ``mmap``:
+
+    header   magic ``YJBM``, format version (u16), metadata length (u32)
+    meta     UTF-8 JSON: SHA-256 digest of the sources, BM25 parameters,
+             hexagram names, vocabulary and the layout of the arrays
+    arrays   8-byte aligned NumPy arrays
+
+The arrays hold the passages (hexagram, section, byte range) and the
+postings of every term in CSR layout with precomputed BM25 weights, so a
+query only adds up a few slices of a memory-mapped array.
+
+The shared index of a resources directory is rebuilt when ``yijing.txt``
+changes; the file and the index are statted at most once per
+``CHECK_INTERVAL`` seconds. It is written to the directory configured as
+``commentary_cache_dir`` (default: next to ``yijing.txt``). If that
+directory is not writable, e.g. on a read-only install, the index is built
+in memory instead. Build it explicitly after editing ``yijing.txt`` or the
+hexagram JSON files:
+
+    python -m yijing.core.text_index [resources_dir]
+"""
+
+import io
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from ..exceptions import ResourceValidationError
+from .artifact import SECTIONS
+from .commentary import (
+    CommentarySegment,
+    CommentaryText,
+    default_commentary_path,
+    default_map_path,
+    ensure_commentary_map,
+    load_hexagram_names,
+    segment_commentary,
+    source_digest,
+    split_segment
+)
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'YJBM'
+FORMAT_VERSION = 1
+INDEX_SUFFIX = '.bm25'
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PASSAGE_CHARS = 1200
+CHECK_INTERVAL = 1.0
+
+_HEADER = struct.Struct('<4sHI')
+_ALIGNMENT = 8
+_SECTION_IDS = {name: i for i, name in enumerate(SECTIONS)}
+_TOKEN = re.compile(r'\w+')
+_SUFFIXES = ('ungen', 'ung', 'keit', 'heit', 'lich', 'ern', 'em', 'en', 'er', 'es', 'e', 'n', 's')
+_STOPWORDS = frozenset(
+    'aber alle als also auch auf aus bei bin bis bist dann das dass daß dem den der des die '
+    'dies diese diesem diesen dieser doch dort durch ein eine einem einen einer eines '
+    'für hat hatte hier ich ihm ihn ihr ihre im in ist jede jeder kann man mein meine '
+    'mich mir mit nach nicht noch nun nur oder ohne sein seine sich sie sind so soll '
+    'über um und uns unter vom von vor war was wenn wer wie wir wird wo zu zum zur'.split()
+)
+
+class CommentaryPassage(NamedTuple):
+    """
+    A passage of the commentary corpus found by a search.
+
+    Attributes:
+        number (int): Hexagram number as in ``hexagram_json``.
+        section (str): Section name (``hexagram``, ``judgment``, ``image``,
+            ``lines.<i>``).
+        score (float): BM25 score for the query.
+        text (str): The passage.
+    """
+    number: int
+    section: str
+    score: float
+    text: str
+
+def _stem(token: str) -> str:
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            return token[:-len(suffix)]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split German text into index terms.
+
+    Lower-cases the text, drops stop words, numbers and words shorter than
+    three letters, and strips common inflection suffixes.
+    """
+    return [
+        _stem(token) for token in _TOKEN.findall(text.lower())
+        if len(token) > 2 and token not in _STOPWORDS and not token.isdigit()
+    ]
+
+def default_index_path(source_path: Path, directory: Optional[Path] = None) -> Path:
+    """Get the index location in ``directory``, by default next to the commentary corpus."""
+    source_path = Path(source_path)
+    return Path(directory or source_path.parent) / (source_path.stem + INDEX_SUFFIX)
+
+def _passages(
+    data: bytes,
+    segments: Iterable[CommentarySegment]
+) -> Iterator[Tuple[int, int, int, int]]:
+    """Yield number, section ID and byte range of every passage."""
+    for segment in segments:
+        for part in split_segment(data, segment, MAX_PASSAGE_CHARS):
+            yield part.number, _SECTION_IDS[part.section], part.start, part.end
+
+def _pack_index(
+    source_path: Path,
+    names: Dict[int, str],
+    segments: Optional[List[CommentarySegment]] = None
+) -> bytes:
+    """Build the BM25 index of the commentary corpus in the file format."""
+    data = Path(source_path).read_bytes()
+
+    if segments is None:
+        segments = segment_commentary(data, names)
+    passages = np.array(list(_passages(data, segments)), dtype=np.int64).reshape(-1, 4)
+    counts = [
+        Counter(tokenize(data[start:end].decode('utf-8')))
+        for _, _, start, end in passages
+    ]
+    lengths = np.array([sum(c.values()) for c in counts], dtype=np.float32)
+    norms = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(lengths.mean(), 1.0))
+
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    for doc, terms in enumerate(counts):
+        for term, frequency in terms.items():
+            postings.setdefault(term, []).append((doc, frequency))
+    vocabulary = sorted(postings)
+
+    offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    docs: List[int] = []
+    weights: List[float] = []
+    for term_id, term in enumerate(vocabulary):
+        entries = postings[term]
+        idf = np.log1p((len(counts) - len(entries) + 0.5) / (len(entries) + 0.5))
+        for doc, frequency in entries:
+            docs.append(doc)
+            weights.append(idf * frequency * (BM25_K1 + 1) / (frequency + norms[doc]))
+        offsets[term_id + 1] = len(docs)
+
+    arrays = {
+        'passages': passages,
+        'offsets': offsets,
+        'docs': np.array(docs, dtype=np.int32),
+        'weights': np.array(weights, dtype=np.float32)
+    }
+    logger.info(f"Indexed {len(passages)} passages and {len(vocabulary)} terms of {source_path}")
+    return _serialize_index(arrays, {
+        'digest': source_digest(source_path, names),
+        'k1': BM25_K1,
+        'b': BM25_B,
+        'names': {str(number): name for number, name in names.items()},
+        'vocabulary': vocabulary
+    })
+
+def build_commentary_index(
+    source_path: Path,
+    names: Dict[int, str],
+    index_path: Optional[Path] = None,
+    segments: Optional[List[CommentarySegment]] = None
+) -> Path:
+    """
+    Build the BM25 index of the commentary corpus.
+
+    The file is written to a temporary name and moved into place atomically,
+    so processes that have the previous index mapped keep a valid view.
+
+    Args:
+        source_path (Path): The commentary corpus (``yijing.txt``).
+        names (Dict[int, str]): Hexagram names by number, see ``load_hexagram_names``.
+        index_path (Optional[Path]): Target file. Defaults to
+            ``default_index_path(source_path)``.
+        segments (Optional[List[CommentarySegment]]): Sections of the
+            corpus, e.g. from ``CommentaryText.segments``. Segmented anew
+            if None.
+
+    Returns:
+        Path: The path of the written index.
+    """
+    source_path = Path(source_path)
+    index_path = Path(index_path or default_index_path(source_path))
+    contents = _pack_index(source_path, names, segments)
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = index_path.with_name(f'{index_path.name}.{os.getpid()}.tmp')
+    temp_path.write_bytes(contents)
+    os.replace(temp_path, index_path)
+    return index_path
+
+def _serialize_index(arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> bytes:
+    layout = {}
+    position = 0
+    for name, array in arrays.items():
+        layout[name] = {'offset': position, 'dtype': array.dtype.str, 'shape': array.shape}
+        position += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+    meta_bytes = json.dumps({**meta, 'arrays': layout}, ensure_ascii=False).encode('utf-8')
+    data_start = -(-(_HEADER.size + len(meta_bytes)) // _ALIGNMENT) * _ALIGNMENT
+
+    f = io.BytesIO()
+    f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(meta_bytes)))
+    f.write(meta_bytes)
+    for name, array in arrays.items():
+        f.seek(data_start + layout[name]['offset'])
+        f.write(array.tobytes())
+    f.truncate(data_start + position)
+    return f.getvalue()
+
+def _signature(path: Optional[Path]) -> Optional[Tuple[int, int]]:
+    if path is None:
+        return None
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+class CommentaryIndex:
+    """
+    Read-only, memory-mapped BM25 index of the commentary corpus.
+
+    Use ``CommentaryIndex.for_resources`` to get the instance shared by the
+    whole process, built on first use and replaced when the corpus changes.
+
+    Args:
+        path (Optional[Path]): Path of the index file, None for an index
+            read from ``contents``.
+        source_path (Path): The commentary corpus the passages are read from.
+        contents (Optional[bytes]): Index file contents to read instead of
+            mapping ``path``, see ``CommentaryIndex.in_memory``.
+
+    Raises:
+        FileNotFoundError: If the index or the corpus does not exist.
+        ResourceValidationError: If the file is not a valid index.
+    """
+
+    _instances: Dict[Tuple[Path, Optional[Path]], 'CommentaryIndex'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        path: Optional[Path],
+        source_path: Path,
+        contents: Optional[bytes] = None
+    ):
+        self.path = None if path is None else Path(path)
+        self.source_path = Path(source_path)
+        self._sources = (_signature(self.source_path), _signature(self.path))
+        self._checked_at = time.monotonic()
+        if contents is not None:
+            if len(contents) < _HEADER.size:
+                raise ResourceValidationError(str(self.source_path), ["index too short"])
+            self._mmap = contents
+        else:
+            with open(self.path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < _HEADER.size:
+                    raise ResourceValidationError(str(self.path), ["file too short"])
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, meta_size = _HEADER.unpack_from(self._mmap, 0)
+        errors = []
+        if magic != MAGIC:
+            errors.append("wrong magic number")
+        elif version != FORMAT_VERSION:
+            errors.append(f"unsupported format version {version}")
+        if errors:
+            if isinstance(self._mmap, mmap.mmap):
+                self._mmap.close()
+            raise ResourceValidationError(str(self.path), errors)
+
+        meta = json.loads(self._mmap[_HEADER.size:_HEADER.size + meta_size])
+        data_start = -(-(_HEADER.size + meta_size) // _ALIGNMENT) * _ALIGNMENT
+        self._arrays = {
+            name: np.frombuffer(
+                self._mmap,
+                dtype=np.dtype(spec['dtype']),
+                count=int(np.prod(spec['shape'])),
+                offset=data_start + spec['offset']
+            ).reshape(spec['shape'])
+            for name, spec in meta['arrays'].items()
+        }
+        self.digest: str = meta['digest']
+        self.names: Dict[int, str] = {int(number): name for number, name in meta['names'].items()}
+        self._numbers = {name: number for number, name in self.names.items()}
+        self._terms = {term: term_id for term_id, term in enumerate(meta['vocabulary'])}
+
+        with open(self.source_path, 'rb') as f:
+            self._text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    def in_memory(
+        cls,
+        source_path: Path,
+        names: Dict[int, str],
+        segments: Optional[List[CommentarySegment]] = None
+    ) -> 'CommentaryIndex':
+        """Build an index of the commentary corpus without writing it to disk."""
+        return cls(None, source_path, _pack_index(source_path, names, segments))
+
+    @classmethod
+    def for_resources(
+        cls,
+        resources_path: Path,
+        cache_dir: Optional[Path] = None
+    ) -> 'CommentaryIndex':
+        """
+        Get the process-wide index of a resources directory, building it if needed.
+
+        The corpus and the index file are statted at most once per
+        ``CHECK_INTERVAL`` seconds. If either changed, the index is reopened,
+        and rebuilt if its digest no longer matches. The replaced index is
+        not closed, since other threads may still read from it; it is
+        unmapped once the last of them drops it.
+
+        Args:
+            resources_path (Path): Directory containing ``yijing.txt`` and
+                ``hexagram_json``.
+            cache_dir (Optional[Path]): Directory the index is written to.
+                Defaults to the directory of ``yijing.txt``.
+
+        Returns:
+            CommentaryIndex: The shared index instance.
+        """
+        key = (Path(resources_path).resolve(), None if cache_dir is None else Path(cache_dir).resolve())
+        index = cls._instances.get(key)
+        if index is not None and time.monotonic() - index._checked_at < CHECK_INTERVAL:
+            return index
+        with cls._instances_lock:
+            index = cls._instances.get(key)
+            if index is None or not index._revalidate():
+                index = cls._instances[key] = open_commentary_index(*key)
+        return index
+
+    def _revalidate(self) -> bool:
+        """Check whether corpus and index file are unchanged since they were opened."""
+        if (_signature(self.source_path), _signature(self.path)) != self._sources:
+            logger.debug(f"Commentary corpus {self.source_path} changed, reopening its index")
+            return False
+        self._checked_at = time.monotonic()
+        return True
+
+    def __enter__(self) -> 'CommentaryIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._arrays.clear()
+        self._text.close()
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+
+    def __len__(self) -> int:
+        return len(self._arrays['passages'])
+
+    def is_current(self, names: Dict[int, str]) -> bool:
+        """Check whether the index was built from the current corpus and names."""
+        return self.digest == source_digest(self.source_path, names)
+
+    def number_of(self, name: str) -> Optional[int]:
+        """Get the number of a hexagram by its name (``NAME / TITLE``)."""
+        return self._numbers.get(name)
+
+    def passage(self, position: int, score: float = 0.0) -> CommentaryPassage:
+        """Read a passage by its position in the index."""
+        number, section_id, start, end = (int(v) for v in self._arrays['passages'][position])
+        text = self._text[start:end].decode('utf-8')
+        return CommentaryPassage(number, SECTIONS[section_id], score, text)
+
+    def scores(self, query: str) -> np.ndarray:
+        """Compute the BM25 score of every passage for a query."""
+        scores = np.zeros(len(self), dtype=np.float32)
+        offsets = self._arrays['offsets']
+        docs = self._arrays['docs']
+        weights = self._arrays['weights']
+        for term in set(tokenize(query)):
+            term_id = self._terms.get(term)
+            if term_id is not None:
+                start, end = offsets[term_id], offsets[term_id + 1]
+                scores[docs[start:end]] += weights[start:end]
+        return scores
+
+    def search(
+        self,
+        query: str,
+        numbers: Optional[Iterable[int]] = None,
+        k: int = 3
+    ) -> List[CommentaryPassage]:
+        """
+        Find the passages that match a query best.
+
+        Args:
+            query (str): The question or other free text.
+            numbers (Optional[Iterable[int]]): Only search the passages of
+                these hexagrams.
+            k (int): Maximum number of passages.
+
+        Returns:
+            List[CommentaryPassage]: Up to ``k`` passages with a positive
+                score, best first.
+        """
+        scores = self.scores(query)
+        if numbers is not None:
+            scores[~np.isin(self._arrays['passages'][:, 0], list(numbers))] = 0
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [self.passage(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+def ensure_commentary_index(resources_path: Path, index_path: Optional[Path] = None) -> Path:
+    """
+    Build the index of a resources directory unless an up-to-date one exists.
+
+    Returns:
+        Path: The path of the current index.
+    """
+    resources_path = Path(resources_path)
+    source_path = default_commentary_path(resources_path)
+    index_path = Path(index_path or default_index_path(source_path))
+    names = load_hexagram_names(resources_path / 'hexagram_json')
+    if index_path.exists():
+        try:
+            with CommentaryIndex(index_path, source_path) as index:
+                if index.is_current(names):
+                    return index_path
+        except ResourceValidationError:
+            logger.warning(f"Invalid commentary index {index_path}, rebuilding")
+    map_path = default_map_path(source_path, index_path.parent)
+    with CommentaryText(source_path, ensure_commentary_map(resources_path, map_path)) as text:
+        segments = text.segments()
+    return build_commentary_index(source_path, names, index_path, segments)
+
+def open_commentary_index(
+    resources_path: Path,
+    cache_dir: Optional[Path] = None
+) -> CommentaryIndex:
+    """
+    Open the current index of a resources directory, building it if needed.
+
+    Falls back to an index in memory if it cannot be written to ``cache_dir``
+    (by default the directory of ``yijing.txt``).
+
+    Raises:
+        FileNotFoundError: If ``yijing.txt`` or a hexagram file is missing.
+    """
+    resources_path = Path(resources_path)
+    source_path = default_commentary_path(resources_path)
+    index_path = default_index_path(source_path, cache_dir)
+    try:
+        return CommentaryIndex(ensure_commentary_index(resources_path, index_path), source_path)
+    except OSError as e:
+        if not source_path.is_file():
+            raise
+        logger.warning(f"Cannot write commentary index {index_path} ({e}), keeping it in memory")
+    names = load_hexagram_names(resources_path / 'hexagram_json')
+    return CommentaryIndex.in_memory(source_path, names)
+
+if __name__ == '__main__':
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    resources = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent.parent / 'resources'
+    print(ensure_commentary_index(resources))
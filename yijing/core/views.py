@@ -0,0 +1,116 @@
+# yijing/core/views.py
+
+"""
+Views Module
+===========
+Lazy, read-only views of hexagram data.
+
+A ``LazyHexagram`` behaves like the dictionary loaded from a hexagram JSON file
+but only fetches a section (``hexagram``, ``judgment``, ``image``, a single
+line) from the corpus when it is accessed. With the compiled corpus artifact,
+untouched sections are never decoded.
+"""
+
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List, Union
+
+from ..constants import HEXAGRAM_LINE_COUNT
+from .corpus import HexagramCorpus
+
+HEXAGRAM_KEYS = ('hexagram', 'judgment', 'image', 'lines')
+
+class LazyLines(Sequence):
+    """
+    Read-only sequence of the six lines of a hexagram, fetched on access.
+
+    Args:
+        corpus (HexagramCorpus): Corpus the lines are read from.
+        number (int): Hexagram number (1-64).
+    """
+    __slots__ = ('_corpus', '_number', '_cache')
+
+    def __init__(self, corpus: HexagramCorpus, number: int):
+        self._corpus = corpus
+        self._number = number
+        self._cache: Dict[int, Any] = {}
+
+    def __len__(self) -> int:
+        return HEXAGRAM_LINE_COUNT
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+        try:
+            return self._cache[index]
+        except KeyError:
+            line = self._corpus.get_section(self._number, f'lines.{index}')
+            self._cache[index] = line
+            return line
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, (str, bytes)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"LazyLines(hexagram={self._number}, loaded={sorted(self._cache)})"
+
+class LazyHexagram(Mapping):
+    """
+    Read-only mapping with the same keys as a hexagram JSON file.
+
+    Sections are fetched from the corpus on first access and kept for the
+    lifetime of the view. Values are shared with the corpus cache and must
+    not be modified.
+
+    Args:
+        corpus (HexagramCorpus): Corpus the sections are read from.
+        number (int): Hexagram number (1-64).
+
+    Attributes:
+        number (int): The hexagram number.
+    """
+    __slots__ = ('_corpus', 'number', '_cache')
+
+    def __init__(self, corpus: HexagramCorpus, number: int):
+        self._corpus = corpus
+        self.number = number
+        self._cache: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        if key == 'lines':
+            value = LazyLines(self._corpus, self.number)
+        elif key in HEXAGRAM_KEYS:
+            value = self._corpus.get_section(self.number, key)
+        else:
+            raise KeyError(key)
+        self._cache[key] = value
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(HEXAGRAM_KEYS)
+
+    def __len__(self) -> int:
+        return len(HEXAGRAM_KEYS)
+
+    def loaded_sections(self) -> List[str]:
+        """Get the names of the sections fetched so far."""
+        return [key for key in HEXAGRAM_KEYS if key in self._cache]
+
+    def materialize(self) -> Dict[str, Any]:
+        """Fetch all sections and return a plain dictionary."""
+        return {
+            key: list(value) if key == 'lines' else value
+            for key, value in self.items()
+        }
+
+    def __repr__(self) -> str:
+        return f"LazyHexagram(number={self.number}, loaded={self.loaded_sections()})"
@@ -82,15 +82,45 @@ class ModelType(str, Enum):
     Attributes:
         GENAI (str): Use Google's Generative AI model
         OLLAMA (str): Use Ollama model
+        STUB (str): Use the deterministic in-process stub (tests, benchmarks)
     """
     GENAI = "genai"
     OLLAMA = "ollama"
+    STUB = "stub"
+
+class CastingMethod(str, Enum):
+    """
+    Defines the built-in methods for casting line values.
+
+    Attributes:
+        UNIFORM (str): All four line values are equally likely
+        THREE_COIN (str): Three-coin method (1/8, 3/8, 3/8, 1/8)
+        YARROW (str): Yarrow-stalk method (1/16, 5/16, 7/16, 3/16)
+    """
+    UNIFORM = "uniform"
+    THREE_COIN = "three_coin"
+    YARROW = "yarrow"
+
+class StreamEventType(str, Enum):
+    """
+    Types of the events yielded by a streamed consultation, in order.
+
+    Attributes:
+        READING (str): The cast hypergram and hexagram context, sent first
+        TOKEN (str): A piece of the model answer as it arrives
+        SUMMARY (str): The complete response with timing, sent last
+    """
+    READING = "reading"
+    TOKEN = "token"
+    SUMMARY = "summary"
 
 __all__ = [
     'ConsultationMode',
     'LineType',
     'HexagramComponent',
     'ResourceType',
-    'LogLevel'
-    'ModelType'
+    'LogLevel',
+    'ModelType',
+    'CastingMethod',
+    'StreamEventType'
 ]
\ No newline at end of file
@@ -15,6 +15,8 @@ Exception Hierarchy:
   │   └── ResourceValidationError
   ├── ModelError
   │   ├── ModelConnectionError
+  │   │   ├── ModelTimeoutError
+  │   │   └── CircuitOpenError
   │   └── ModelResponseError
   ├── HexagramError
   │   ├── InvalidHexagramError
@@ -70,6 +72,24 @@ class ModelConnectionError(ModelError):
         self.model_name = model_name
         self.details = details
 
+class ModelTimeoutError(ModelConnectionError):
+    """Raised when a model request exceeds its deadline."""
+    def __init__(self, model_name: str, timeout: float = None, *args, **kwargs):
+        details = "Zeitüberschreitung"
+        if timeout is not None:
+            details += f" nach {timeout:.1f}s"
+        super().__init__(model_name, details, *args)
+        self.timeout = timeout
+
+class CircuitOpenError(ModelConnectionError):
+    """Raised without contacting the model while its circuit breaker is open."""
+    def __init__(self, model_name: str, retry_after: float = None, *args, **kwargs):
+        details = "Modell vorübergehend nicht verfügbar"
+        if retry_after is not None:
+            details += f", neuer Versuch in {retry_after:.1f}s"
+        super().__init__(model_name, details, *args)
+        self.retry_after = retry_after
+
 class ModelResponseError(ModelError):
     """Raised when the AI model returns an invalid or unexpected response."""
     def __init__(self, model_name: str, response: str = None, *args, **kwargs):
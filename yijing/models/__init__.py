@@ -7,14 +7,31 @@ Contains data models for the I Ching oracle system.
 """
 
 from .contexts import HypergramData, HexagramContext
-from .hexagrams import Hypergram, Hexagram
+from .hexagrams import Hypergram, Hexagram, Trigram, get_hexagram
 from .lines import HexagramLine, HypergramLine
+from .compact import CompactHexagram, CompactHypergram
+from .batch import HypergramBatch
+from .transitions import (
+    HypergramTransition,
+    get_transition,
+    pack_hypergram,
+    unpack_hypergram
+)
 
 __all__ = [
     'HypergramData',
     'HexagramContext',
     'Hypergram',
     'Hexagram',
+    'Trigram',
+    'get_hexagram',
     'HexagramLine',
-    'HypergramLine'
+    'HypergramLine',
+    'HypergramBatch',
+    'CompactHexagram',
+    'CompactHypergram',
+    'HypergramTransition',
+    'get_transition',
+    'pack_hypergram',
+    'unpack_hypergram'
 ]
\ No newline at end of file
@@ -0,0 +1,76 @@
+# yijing/models/batch.py
+
+"""
+Batch Module
+===========
+Contains the array-backed container returned by batch casting. Pydantic models
+are only built for individual readings when they are explicitly requested.
+"""
+
+from dataclasses import dataclass
+from typing import Iterator, List
+import numpy as np
+
+from .compact import CompactHypergram
+from .contexts import HypergramData
+from .hexagrams import Hypergram
+from .lines import HypergramLine
+from .transitions import CHANGING_LINES_BY_MASK
+
+@dataclass(frozen=True)
+class HypergramBatch:
+    """
+    A batch of hypergram readings stored as NumPy arrays.
+
+    The changing-line masks use the bit order of ``Hexagram.to_binary_number``
+    (bit ``5 - i`` belongs to line ``i``), so for every reading
+    ``new_numbers - 1 == (old_numbers - 1) ^ changing_masks``.
+
+    Attributes:
+        lines (np.ndarray): Line values (6-9) as ``uint8`` array of shape (n, 6).
+        codes (np.ndarray): Packed 12-bit hypergram codes, ``uint16`` shape (n,).
+        old_numbers (np.ndarray): Original hexagram numbers (1-64), shape (n,).
+        new_numbers (np.ndarray): Resulting hexagram numbers (1-64), shape (n,).
+        changing_masks (np.ndarray): Changing-line bitmasks, shape (n,).
+    """
+    lines: np.ndarray
+    codes: np.ndarray
+    old_numbers: np.ndarray
+    new_numbers: np.ndarray
+    changing_masks: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.lines.shape[0])
+
+    def changing_lines(self, index: int) -> List[int]:
+        """Get the indices of the changing lines of a single reading."""
+        return list(CHANGING_LINES_BY_MASK[int(self.changing_masks[index])])
+
+    def to_compact(self, index: int) -> CompactHypergram:
+        """Get a single reading of the batch as compact hypergram."""
+        return CompactHypergram(int(self.codes[index]))
+
+    def to_hypergram_data(self, index: int) -> HypergramData:
+        """
+        Build the pydantic models for a single reading of the batch.
+
+        Args:
+            index (int): Position of the reading within the batch.
+
+        Returns:
+            HypergramData: The same structure ``cast_hypergram`` returns.
+        """
+        hypergram = Hypergram(lines=[
+            HypergramLine(value=int(value)) for value in self.lines[index]
+        ])
+        return HypergramData(
+            hypergram=hypergram,
+            old_hexagram=hypergram.old_hexagram(),
+            new_hexagram=hypergram.new_hexagram(),
+            changing_lines=hypergram.changing_lines()
+        )
+
+    def iter_hypergram_data(self) -> Iterator[HypergramData]:
+        """Lazily build the pydantic models for every reading of the batch."""
+        for index in range(len(self)):
+            yield self.to_hypergram_data(index)
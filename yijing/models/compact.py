@@ -0,0 +1,207 @@
+# yijing/models/compact.py
+
+"""
+Compact Models Module
+====================
+Immutable, slot-based counterparts of Hexagram and Hypergram.
+
+Each instance wraps a single integer: the 6-bit value of a hexagram or the
+12-bit packed code of a hypergram (see ``transitions``). All derived values
+come from the precomputed transition table, so construction is a single
+attribute assignment without validation. Convert to the pydantic models with
+``to_model`` only at API boundaries.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from ..constants import HEXAGRAM_LINE_COUNT
+from .contexts import HypergramData
+from .hexagrams import Hexagram, Hypergram
+from .lines import HypergramLine
+from .transitions import (
+    CHANGING_LINES_BY_MASK,
+    HEXAGRAM_COUNT,
+    HEXAGRAM_GLYPHS,
+    HYPERGRAM_CODE_COUNT,
+    HypergramTransition,
+    TRANSITIONS,
+    pack_hypergram,
+    unpack_hypergram
+)
+
+class CompactHexagram:
+    """
+    A hexagram stored as its 6-bit value (first line is the most significant bit).
+
+    Args:
+        bits (int): The binary value of the hexagram (0-63).
+
+    Raises:
+        ValueError: If bits is outside 0-63.
+    """
+    __slots__ = ('_bits',)
+
+    def __init__(self, bits: int):
+        if not 0 <= bits < HEXAGRAM_COUNT:
+            raise ValueError(f"Invalid hexagram value: {bits}")
+        object.__setattr__(self, '_bits', bits)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return (type(self), (self._bits,))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CompactHexagram):
+            return self._bits == other._bits
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((CompactHexagram, self._bits))
+
+    def __repr__(self) -> str:
+        return f"CompactHexagram({self.to_unicode_representation()}, number={self.number})"
+
+    @property
+    def number(self) -> int:
+        """Hexagram number (1-64) as used for the hexagram data files."""
+        return self._bits + 1
+
+    def to_binary_number(self) -> int:
+        return self._bits
+
+    def to_unicode_representation(self) -> str:
+        return HEXAGRAM_GLYPHS[self._bits]
+
+    def line_values(self) -> Tuple[int, ...]:
+        """Get the line values (0: Yin, 1: Yang), first line first."""
+        return tuple(
+            (self._bits >> (HEXAGRAM_LINE_COUNT - 1 - i)) & 1
+            for i in range(HEXAGRAM_LINE_COUNT)
+        )
+
+    @classmethod
+    def from_model(cls, hexagram: Hexagram) -> 'CompactHexagram':
+        """Get the canonical compact hexagram of a pydantic model."""
+        return COMPACT_HEXAGRAMS[hexagram.to_binary_number()]
+
+    @classmethod
+    def from_binary_number(cls, bits: int) -> 'CompactHexagram':
+        """Get the shared canonical compact hexagram of a 6-bit value."""
+        if not 0 <= bits < HEXAGRAM_COUNT:
+            raise ValueError(f"Invalid hexagram value: {bits}")
+        return COMPACT_HEXAGRAMS[bits]
+
+    def to_model(self) -> Hexagram:
+        """Convert to the shared canonical pydantic model."""
+        return Hexagram.from_binary_number(self._bits)
+
+# Canonical compact hexagrams, indexed by binary value
+COMPACT_HEXAGRAMS: Tuple[CompactHexagram, ...] = tuple(
+    CompactHexagram(bits) for bits in range(HEXAGRAM_COUNT)
+)
+
+class CompactHypergram:
+    """
+    A hypergram stored as its packed 12-bit code.
+
+    Args:
+        code (int): The packed hypergram code (0-4095).
+
+    Raises:
+        ValueError: If code is outside 0-4095.
+    """
+    __slots__ = ('_code',)
+
+    def __init__(self, code: int):
+        if not 0 <= code < HYPERGRAM_CODE_COUNT:
+            raise ValueError(f"Invalid hypergram code: {code}")
+        object.__setattr__(self, '_code', code)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return (type(self), (self._code,))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CompactHypergram):
+            return self._code == other._code
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((CompactHypergram, self._code))
+
+    def __repr__(self) -> str:
+        return f"CompactHypergram({''.join(map(str, self.line_values()))})"
+
+    @property
+    def code(self) -> int:
+        return self._code
+
+    def transition(self) -> HypergramTransition:
+        """Look up the precomputed transformation data of the hypergram."""
+        return TRANSITIONS[self._code]
+
+    def line_values(self) -> Tuple[int, ...]:
+        """Get the line values (6-9), first line first."""
+        return unpack_hypergram(self._code)
+
+    def old_hexagram(self) -> CompactHexagram:
+        """Get the initial hexagram before any transformations."""
+        return COMPACT_HEXAGRAMS[TRANSITIONS[self._code].original_number - 1]
+
+    def new_hexagram(self) -> CompactHexagram:
+        """Get the resulting hexagram after all transformations."""
+        return COMPACT_HEXAGRAMS[TRANSITIONS[self._code].resulting_number - 1]
+
+    def changing_mask(self) -> int:
+        """Get the changing-line mask (bit ``5 - i`` belongs to line ``i``)."""
+        return TRANSITIONS[self._code].changing_mask
+
+    def changing_lines(self) -> List[int]:
+        """Get the indices of changing lines in the hypergram."""
+        return list(CHANGING_LINES_BY_MASK[TRANSITIONS[self._code].changing_mask])
+
+    @classmethod
+    def from_values(cls, values: Sequence[int]) -> 'CompactHypergram':
+        """Create a compact hypergram from six line values (6-9)."""
+        return cls(pack_hypergram(values))
+
+    @classmethod
+    def from_model(cls, hypergram: Hypergram) -> 'CompactHypergram':
+        """Create a compact hypergram from the pydantic model."""
+        return cls(hypergram.code())
+
+    def to_model(self) -> Hypergram:
+        """Convert to the pydantic model."""
+        return Hypergram(lines=[
+            HypergramLine(value=value) for value in self.line_values()
+        ])
+
+    @classmethod
+    def from_hypergram_data(cls, data: HypergramData) -> 'CompactHypergram':
+        """Create a compact hypergram from complete pydantic reading data."""
+        return cls.from_model(data.hypergram)
+
+    def to_hypergram_data(self, seed: Optional[int] = None) -> HypergramData:
+        """
+        Build the complete pydantic reading data.
+
+        Args:
+            seed (Optional[int]): Seed the reading was cast from, if known.
+        """
+        return HypergramData(
+            hypergram=self.to_model(),
+            old_hexagram=self.old_hexagram().to_model(),
+            new_hexagram=self.new_hexagram().to_model(),
+            changing_lines=self.changing_lines(),
+            seed=seed
+        )
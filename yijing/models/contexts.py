@@ -8,16 +8,21 @@ of I Ching readings.
 """
 
 from dataclasses import dataclass
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Mapping, Optional
 from pydantic import BaseModel
 from .hexagrams import Hexagram, Hypergram
 
 @dataclass
 class HexagramContext:
-    """Represents the complete context for a hexagram reading."""
-    original_hexagram: Dict[str, Any]
+    """
+    Represents the complete context for a hexagram reading.
+
+    The hexagram data is either a plain dictionary or a lazy view with the
+    same mapping interface.
+    """
+    original_hexagram: Mapping[str, Any]
     changing_lines: List[int]
-    resulting_hexagram: Dict[str, Any]
+    resulting_hexagram: Mapping[str, Any]
     
     def get_relevant_line_interpretations(self) -> List[Dict[str, str]]:
         return [
@@ -35,4 +40,5 @@ class HypergramData(BaseModel):
     hypergram: Hypergram
     old_hexagram: Hexagram
     new_hexagram: Hexagram
-    changing_lines: List[int]
\ No newline at end of file
+    changing_lines: List[int]
+    seed: Optional[int] = None
\ No newline at end of file
@@ -6,32 +6,118 @@ Hexagrams Module
 Contains the Hexagram and Hypergram classes that represent complete I Ching figures.
 """
 
-from pydantic import BaseModel, Field, field_validator
-from typing import List, Dict
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import List, Dict, Sequence, Tuple
 import logging
-from .lines import HexagramLine, HypergramLine
-from ..constants import HEXAGRAM_LINE_COUNT
+from .lines import HexagramLine, HypergramLine, YIN_LINE, YANG_LINE
+from .transitions import (
+    HEXAGRAM_GLYPHS,
+    HypergramTransition,
+    TRANSITIONS,
+    pack_hypergram
+)
+from ..constants import HEXAGRAM_LINE_COUNT, TRIGRAM_LINE_COUNT
 
 logger = logging.getLogger(__name__)
 
+def _fixed_lines(number: int, count: int) -> Tuple[HexagramLine, ...]:
+    """Build the canonical lines of a value, first line as most significant bit."""
+    return tuple(
+        YANG_LINE if (number >> (count - 1 - i)) & 1 else YIN_LINE
+        for i in range(count)
+    )
+
+def _lines_to_number(lines: Sequence[HexagramLine]) -> int:
+    number = 0
+    for line in lines:
+        number = (number << 1) | line.value
+    return number
+
+class Trigram(BaseModel):
+    """A collection of three fixed lines, the lower or upper half of a hexagram."""
+    model_config = ConfigDict(frozen=True)
+
+    lines: Tuple[HexagramLine, ...] = Field(
+        ...,
+        description="Exactly three lines forming the trigram"
+    )
+
+    @field_validator('lines')
+    def validate_lines(cls, v: Tuple[HexagramLine, ...]) -> Tuple[HexagramLine, ...]:
+        if len(v) != TRIGRAM_LINE_COUNT:
+            raise ValueError("A trigram must contain exactly 3 lines")
+        return v
+
+    def __hash__(self) -> int:
+        return hash((Trigram, self.to_binary_number()))
+
+    def to_binary_number(self) -> int:
+        """Get the 3-bit value of the trigram, first line as most significant bit."""
+        return _lines_to_number(self.lines)
+
+    def to_unicode_representation(self) -> str:
+        return ''.join(line.to_unicode_symbol() for line in self.lines)
+
+    @classmethod
+    def from_binary_number(cls, number: int) -> 'Trigram':
+        """Get the shared canonical trigram of a 3-bit value."""
+        if not 0 <= number < len(TRIGRAMS):
+            raise ValueError(f"Invalid trigram value: {number}")
+        return TRIGRAMS[number]
+
+    def intern(self) -> 'Trigram':
+        """Get the shared canonical instance equal to this trigram."""
+        return TRIGRAMS[self.to_binary_number()]
+
 class Hexagram(BaseModel):
-    """A collection of six fixed lines representing a hexagram."""
-    lines: List[HexagramLine] = Field(
-        ..., 
-        description="List of exactly six lines forming the hexagram"
+    """
+    A collection of six fixed lines representing a hexagram.
+
+    Hexagrams are immutable. All 64 of them exist as shared canonical
+    instances (``HEXAGRAMS``), which every producer in the package returns,
+    so canonical hexagrams can be compared by identity and used as dict keys.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    lines: Tuple[HexagramLine, ...] = Field(
+        ...,
+        description="Exactly six lines forming the hexagram"
     )
 
     @field_validator('lines')
-    def validate_lines(cls, v: List[HexagramLine]) -> List[HexagramLine]:
+    def validate_lines(cls, v: Tuple[HexagramLine, ...]) -> Tuple[HexagramLine, ...]:
         if len(v) != HEXAGRAM_LINE_COUNT:
             raise ValueError("A hexagram must contain exactly 6 lines")
         return v
 
+    def __hash__(self) -> int:
+        return hash((Hexagram, self.to_binary_number()))
+
     def to_binary_number(self) -> int:
-        return int(''.join(str(line.value) for line in self.lines), 2)
+        """Get the 6-bit value of the hexagram, first line as most significant bit."""
+        return _lines_to_number(self.lines)
 
     def to_unicode_representation(self) -> str:
-        return ''.join(line.to_unicode_symbol() for line in self.lines)
+        return HEXAGRAM_GLYPHS[self.to_binary_number()]
+
+    @classmethod
+    def from_binary_number(cls, number: int) -> 'Hexagram':
+        """Get the shared canonical hexagram of a 6-bit value."""
+        if not 0 <= number < len(HEXAGRAMS):
+            raise ValueError(f"Invalid hexagram value: {number}")
+        return HEXAGRAMS[number]
+
+    def intern(self) -> 'Hexagram':
+        """Get the shared canonical instance equal to this hexagram."""
+        return HEXAGRAMS[self.to_binary_number()]
+
+    def lower_trigram(self) -> Trigram:
+        """Get the trigram formed by the first three lines."""
+        return TRIGRAMS[self.to_binary_number() >> TRIGRAM_LINE_COUNT]
+
+    def upper_trigram(self) -> Trigram:
+        """Get the trigram formed by the last three lines."""
+        return TRIGRAMS[self.to_binary_number() & ((1 << TRIGRAM_LINE_COUNT) - 1)]
 
 class Hypergram(BaseModel):
     """A collection of six potentially changing lines."""
@@ -44,29 +130,50 @@ class Hypergram(BaseModel):
     @field_validator('lines')
     def validate_lines(cls, v: List[HypergramLine]) -> List[HypergramLine]:
         """Validate that the hypergram has exactly six lines."""
-        logger.debug("Validating hypergram lines")
         if len(v) != HEXAGRAM_LINE_COUNT:
             raise ValueError("A hypergram must contain exactly 6 lines")
         return v
 
+    def code(self) -> int:
+        """Get the packed 12-bit code of the hypergram."""
+        return pack_hypergram([line.value for line in self.lines])
+
+    def transition(self) -> HypergramTransition:
+        """Look up the precomputed transformation data of the hypergram."""
+        return TRANSITIONS[self.code()]
+
     def old_hexagram(self) -> Hexagram:
         """Get the initial hexagram before any transformations."""
-        logger.debug("Creating old hexagram")
-        return Hexagram(lines=[
-            HexagramLine(value=0 if line.is_yin() else 1)
-            for line in self.lines
-        ])
+        return Hexagram.from_binary_number(self.transition().original_number - 1)
 
     def new_hexagram(self) -> Hexagram:
         """Get the resulting hexagram after all transformations."""
-        logger.debug("Creating new hexagram")
-        return Hexagram(lines=[
-            HexagramLine(value=line.transforms_to() if line.is_changing() 
-                        else (0 if line.is_yin() else 1))
-            for line in self.lines
-        ])
+        return Hexagram.from_binary_number(self.transition().resulting_number - 1)
 
     def changing_lines(self) -> List[int]:
         """Get the indices of changing lines in the hypergram."""
-        logger.debug("Finding changing lines")
-        return [i for i, line in enumerate(self.lines) if line.is_changing()]
\ No newline at end of file
+        return list(self.transition().changing_lines)
+
+# Canonical instances, indexed by binary value
+TRIGRAMS: Tuple[Trigram, ...] = tuple(
+    Trigram(lines=_fixed_lines(number, TRIGRAM_LINE_COUNT))
+    for number in range(2 ** TRIGRAM_LINE_COUNT)
+)
+HEXAGRAMS: Tuple[Hexagram, ...] = tuple(
+    Hexagram(lines=_fixed_lines(number, HEXAGRAM_LINE_COUNT))
+    for number in range(2 ** HEXAGRAM_LINE_COUNT)
+)
+
+def get_hexagram(number: int) -> Hexagram:
+    """
+    Get the shared canonical hexagram by its number.
+
+    Args:
+        number (int): Hexagram number (1-64) as used for the hexagram data files.
+
+    Raises:
+        ValueError: If the number is not between 1 and 64.
+    """
+    if not 1 <= number <= len(HEXAGRAMS):
+        raise ValueError(f"Invalid hexagram number: {number}")
+    return HEXAGRAMS[number - 1]
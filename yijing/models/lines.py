@@ -7,7 +7,7 @@ Contains the basic line classes for the I Ching system: HypergramLine and Hexagr
 These represent the fundamental building blocks of hexagrams.
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Literal, Optional
 import logging
 from ..enums import LineType
@@ -37,6 +37,8 @@ class HypergramLine(BaseModel):
     
 class HexagramLine(BaseModel):
     """A single fixed line in a hexagram."""
+    model_config = ConfigDict(frozen=True)
+
     value: Literal[0, 1] = Field(
         ...,
         description="Value of the hexagram line (0: Yin, 1: Yang)"
@@ -44,4 +46,8 @@ class HexagramLine(BaseModel):
 
     def to_unicode_symbol(self) -> str:
         """Get the Unicode symbol representation of the line."""
-        return YANG_SYMBOL if self.value == 1 else YIN_SYMBOL
\ No newline at end of file
+        return YANG_SYMBOL if self.value == 1 else YIN_SYMBOL
+
+# Canonical shared instances of the two fixed lines
+YIN_LINE = HexagramLine(value=0)
+YANG_LINE = HexagramLine(value=1)
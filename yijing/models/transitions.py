@@ -0,0 +1,142 @@
+# yijing/models/transitions.py
+
+"""
+Transitions Module
+=================
+Precomputed lookup tables for all 4^6 = 4096 possible hypergrams.
+
+A hypergram is packed into a 12-bit code with two bits per line
+(``value - 6``), line ``i`` occupying bits ``2i`` and ``2i + 1``. The table
+holds the original and resulting hexagram numbers (1-64), the changing-line
+mask and the Unicode glyphs of both hexagrams for every code. It is built
+once at import time.
+
+Changing-line masks use the bit order of ``Hexagram.to_binary_number`` (bit
+``5 - i`` belongs to line ``i``), so ``resulting - 1 == (original - 1) ^ mask``.
+"""
+
+from typing import NamedTuple, Sequence, Tuple
+import numpy as np
+
+from ..constants import (
+    CHANGING_YIN,
+    CHANGING_YANG,
+    HEXAGRAM_LINE_COUNT,
+    YIN_SYMBOL,
+    YANG_SYMBOL
+)
+
+HYPERGRAM_CODE_COUNT = 4 ** HEXAGRAM_LINE_COUNT
+HEXAGRAM_COUNT = 2 ** HEXAGRAM_LINE_COUNT
+
+class HypergramTransition(NamedTuple):
+    """Precomputed transformation data of a single hypergram."""
+    code: int
+    original_number: int
+    resulting_number: int
+    changing_mask: int
+    changing_lines: Tuple[int, ...]
+    original_glyphs: str
+    resulting_glyphs: str
+
+def pack_hypergram(values: Sequence[int]) -> int:
+    """
+    Pack six line values (6-9) into a 12-bit hypergram code.
+
+    Args:
+        values (Sequence[int]): Line values from the first to the sixth line.
+
+    Returns:
+        int: The packed code (0-4095).
+    """
+    code = 0
+    for i, value in enumerate(values):
+        code |= (value - CHANGING_YIN) << (2 * i)
+    return code
+
+def unpack_hypergram(code: int) -> Tuple[int, ...]:
+    """Unpack a 12-bit hypergram code into six line values (6-9)."""
+    return tuple(
+        ((code >> (2 * i)) & 3) + CHANGING_YIN
+        for i in range(HEXAGRAM_LINE_COUNT)
+    )
+
+_CODE_SHIFTS = np.array(
+    [2 * i for i in range(HEXAGRAM_LINE_COUNT)], dtype=np.uint16
+)
+
+def pack_hypergram_array(lines: np.ndarray) -> np.ndarray:
+    """
+    Pack an array of line values of shape (n, 6) into hypergram codes.
+
+    Returns:
+        np.ndarray: ``uint16`` array of codes with shape (n,).
+    """
+    offsets = lines.astype(np.uint16) - CHANGING_YIN
+    return (offsets << _CODE_SHIFTS).sum(axis=1, dtype=np.uint16)
+
+def _glyphs(binary: int) -> str:
+    """Unicode line symbols of a hexagram, first line first."""
+    return ''.join(
+        YANG_SYMBOL if binary & (1 << (HEXAGRAM_LINE_COUNT - 1 - i)) else YIN_SYMBOL
+        for i in range(HEXAGRAM_LINE_COUNT)
+    )
+
+def _mask_to_lines(mask: int) -> Tuple[int, ...]:
+    """Indices of the lines set in a changing-line mask."""
+    return tuple(
+        i for i in range(HEXAGRAM_LINE_COUNT)
+        if mask & (1 << (HEXAGRAM_LINE_COUNT - 1 - i))
+    )
+
+# Glyphs and changing-line indices per 6-bit value
+HEXAGRAM_GLYPHS: Tuple[str, ...] = tuple(_glyphs(b) for b in range(HEXAGRAM_COUNT))
+CHANGING_LINES_BY_MASK: Tuple[Tuple[int, ...], ...] = tuple(
+    _mask_to_lines(m) for m in range(HEXAGRAM_COUNT)
+)
+
+def _build_transitions() -> Tuple[HypergramTransition, ...]:
+    """Compute the transition of every possible hypergram."""
+    table = []
+    for code in range(HYPERGRAM_CODE_COUNT):
+        original = 0
+        mask = 0
+        for i, value in enumerate(unpack_hypergram(code)):
+            bit = 1 << (HEXAGRAM_LINE_COUNT - 1 - i)
+            # Odd values (7, 9) are yang
+            if value & 1:
+                original |= bit
+            if value in (CHANGING_YIN, CHANGING_YANG):
+                mask |= bit
+        resulting = original ^ mask
+        table.append(HypergramTransition(
+            code=code,
+            original_number=original + 1,
+            resulting_number=resulting + 1,
+            changing_mask=mask,
+            changing_lines=CHANGING_LINES_BY_MASK[mask],
+            original_glyphs=HEXAGRAM_GLYPHS[original],
+            resulting_glyphs=HEXAGRAM_GLYPHS[resulting]
+        ))
+    return tuple(table)
+
+TRANSITIONS: Tuple[HypergramTransition, ...] = _build_transitions()
+
+# Column arrays of the table for vectorized lookups
+ORIGINAL_NUMBERS = np.array([t.original_number for t in TRANSITIONS], dtype=np.uint8)
+RESULTING_NUMBERS = np.array([t.resulting_number for t in TRANSITIONS], dtype=np.uint8)
+CHANGING_MASKS = np.array([t.changing_mask for t in TRANSITIONS], dtype=np.uint8)
+for _column in (ORIGINAL_NUMBERS, RESULTING_NUMBERS, CHANGING_MASKS):
+    _column.flags.writeable = False
+del _column
+
+def get_transition(code: int) -> HypergramTransition:
+    """
+    Look up the precomputed transition of a hypergram code.
+
+    Raises:
+        ValueError: If the code is outside 0-4095.
+    """
+    if not 0 <= code < HYPERGRAM_CODE_COUNT:
+        raise ValueError(f"Invalid hypergram code: {code}")
+    return TRANSITIONS[code]
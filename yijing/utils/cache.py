@@ -0,0 +1,226 @@
+# yijing/utils/cache.py
+
+"""
+Cache Utilities Module
+=====================
+Shared building blocks for the in-process caches of the package.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+@dataclass
+class CacheStats:
+    """
+    Counters describing the effectiveness of a cache.
+
+    Attributes:
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that had to load the value.
+        invalidations (int): Entries dropped because their source changed.
+        evictions (int): Entries dropped to respect a size or age limit.
+    """
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    evictions: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups answered from the cache (0.0 if unused)."""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        """Get the counters and the hit rate as a plain dictionary."""
+        return {**asdict(self), 'hit_rate': self.hit_rate}
+
+    def reset(self) -> None:
+        """Set all counters back to zero."""
+        self.hits = self.misses = self.invalidations = self.evictions = 0
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded least-recently-used cache with optional TTL.
+
+    Entries older than ``ttl`` seconds and entries pushed out by ``maxsize``
+    are both counted as evictions.
+
+    Args:
+        maxsize (int): Maximum number of entries.
+        ttl (Optional[float]): Lifetime of an entry in seconds, None for no limit.
+        clock (Callable[[], float]): Time source, ``time.monotonic`` by default.
+
+    Attributes:
+        stats (CacheStats): Hit, miss and eviction counters.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if maxsize < 1:
+            raise ValueError(f"Cache size must be positive: {maxsize}")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a value and mark it as recently used, None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or self.clock() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return value
+                del self._entries[key]
+                self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        with self._lock:
+            self._entries[key] = (value, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop a single entry, or all entries if no key is given."""
+        with self._lock:
+            if key is None:
+                self.stats.invalidations += len(self._entries)
+                self._entries.clear()
+            elif self._entries.pop(key, None) is not None:
+                self.stats.invalidations += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get the counters and the size, read together under the lock."""
+        with self._lock:
+            return {**self.stats.as_dict(), 'size': len(self._entries)}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteCache:
+    """
+    Persistent string cache in a SQLite database, shared between processes.
+
+    Args:
+        path (Path): Database file, created if missing.
+        maxsize (int): Maximum number of entries; the least recently used
+            entries are deleted beyond it.
+        ttl (Optional[float]): Lifetime of an entry in seconds, None for no limit.
+        clock (Callable[[], float]): Time source, ``time.time`` by default
+            (wall clock, since entries outlive the process).
+
+    Attributes:
+        stats (CacheStats): Hit, miss and eviction counters of this process.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        maxsize: int = 100_000,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        if maxsize < 1:
+            raise ValueError(f"Cache size must be positive: {maxsize}")
+        self.path = Path(path)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._db:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'stored_at REAL NOT NULL, used_at REAL NOT NULL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS cache_used_at ON cache (used_at)')
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a value and mark it as recently used, None if missing or expired."""
+        now = self.clock()
+        with self._lock, self._db:
+            row = self._db.execute(
+                'SELECT value, stored_at FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None:
+                value, stored_at = row
+                if self.ttl is None or now - stored_at < self.ttl:
+                    self._db.execute('UPDATE cache SET used_at = ? WHERE key = ?', (now, key))
+                    self.stats.hits += 1
+                    return value
+                self._db.execute('DELETE FROM cache WHERE key = ?', (key,))
+                self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """Store a value, deleting the least recently used entries if full."""
+        now = self.clock()
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO cache (key, value, stored_at, used_at) '
+                'VALUES (?, ?, ?, ?)',
+                (key, value, now, now)
+            )
+            (count,) = self._db.execute('SELECT COUNT(*) FROM cache').fetchone()
+            if count > self.maxsize:
+                self._db.execute(
+                    'DELETE FROM cache WHERE key IN '
+                    '(SELECT key FROM cache ORDER BY used_at LIMIT ?)',
+                    (count - self.maxsize,)
+                )
+                self.stats.evictions += count - self.maxsize
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop a single entry, or all entries if no key is given."""
+        with self._lock, self._db:
+            if key is None:
+                cursor = self._db.execute('DELETE FROM cache')
+            else:
+                cursor = self._db.execute('DELETE FROM cache WHERE key = ?', (key,))
+            self.stats.invalidations += cursor.rowcount
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get the counters and the size, read together under the lock."""
+        with self._lock:
+            (count,) = self._db.execute('SELECT COUNT(*) FROM cache').fetchone()
+            return {**self.stats.as_dict(), 'size': count}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._db.execute('SELECT COUNT(*) FROM cache').fetchone()
+        return count
@@ -15,7 +15,9 @@ from pathlib import Path
 from typing import Dict, Optional
 import json
 import logging
+import aiofiles
 from ..enums import ConsultationMode
+from ..config.prompts import get_prompt_registry
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +25,9 @@ def load_system_prompt(mode: ConsultationMode) -> str:
     """
     Load system prompt based on consultation mode.
     
+    The prompt is served from the shared prompt registry, so the file is
+    only read again after it changed.
+    
     Args:
         mode (ConsultationMode): The consultation mode to load the prompt for
 
@@ -32,13 +37,39 @@ def load_system_prompt(mode: ConsultationMode) -> str:
     Raises:
         FileNotFoundError: If the prompt file cannot be found
     """
-    resources_dir = Path(__file__).parent.parent / 'resources/prompts'
-    prompt_file = resources_dir / f'{mode.value}_mode_prompt.txt'
+    return get_prompt_registry().template(f'{mode.value}_mode_prompt')
+
+async def aread_text(path: Path) -> str:
+    """
+    Read a UTF-8 text file without blocking the event loop.
     
-    if not prompt_file.exists():
-        raise FileNotFoundError(f"System prompt file not found: {prompt_file}")
-        
-    return prompt_file.read_text(encoding='utf-8')
+    Args:
+        path (Path): The file to read
+
+    Returns:
+        str: The file content
+
+    Raises:
+        FileNotFoundError: If the file cannot be found
+    """
+    async with aiofiles.open(path, 'r', encoding='utf-8') as f:
+        return await f.read()
+
+async def aload_system_prompt(mode: ConsultationMode) -> str:
+    """
+    Load system prompt based on consultation mode without blocking the event loop.
+    
+    Args:
+        mode (ConsultationMode): The consultation mode to load the prompt for
+
+    Returns:
+        str: The system prompt text for the specified mode
+
+    Raises:
+        FileNotFoundError: If the prompt file cannot be found
+    """
+    prompt = await get_prompt_registry().acompile((f'{mode.value}_mode_prompt',))
+    return prompt.text
 
 def load_hexagram_data(number: int) -> Dict:
     """
@@ -0,0 +1,163 @@
+# yijing/utils/singleflight.py
+
+"""
+Single-Flight Module
+===================
+Deduplication of concurrent identical calls.
+
+While a call for a key is in flight, further callers with the same key do
+not start their own call but wait for the running one and receive its result
+(or its exception). Once the call finished, the key is free again, so results
+are never kept beyond the call itself; combine with a cache for that.
+
+``SingleFlight`` serves threads, ``AsyncSingleFlight`` coroutines.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from .cache import CacheStats
+
+T = TypeVar('T')
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """
+    Thread-safe single-flight group.
+
+    Attributes:
+        stats (CacheStats): ``hits`` counts callers that joined a running
+            call, ``misses`` the calls actually executed.
+    """
+
+    def __init__(self):
+        self.stats = CacheStats()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[..., T], *args, **kwargs) -> Tuple[T, bool]:
+        """
+        Run ``fn(*args, **kwargs)`` unless a call for ``key`` is already running.
+
+        Args:
+            key (Hashable): Identity of the call.
+            fn (Callable[..., T]): The function to run.
+
+        Returns:
+            Tuple[T, bool]: The result and whether it was shared with another caller.
+
+        Raises:
+            Exception: Whatever the shared call raised.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """Number of calls currently running."""
+        return len(self._calls)
+
+class _AsyncCall:
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class AsyncSingleFlight:
+    """
+    Single-flight group for coroutines.
+
+    The shared call runs as its own task. A caller that is cancelled stops
+    waiting; the call itself is only cancelled when no caller waits for it
+    anymore, so cancellation still reaches the backend request; that last
+    caller returns only once the call has been cancelled.
+
+    Attributes:
+        stats (CacheStats): ``hits`` counts callers that joined a running
+            call, ``misses`` the calls actually executed.
+    """
+
+    def __init__(self):
+        self.stats = CacheStats()
+        self._calls: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], _AsyncCall] = {}
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[..., Awaitable[T]],
+        *args,
+        **kwargs
+    ) -> Tuple[T, bool]:
+        """
+        Await ``fn(*args, **kwargs)`` unless a call for ``key`` is already running.
+
+        Args:
+            key (Hashable): Identity of the call.
+            fn (Callable[..., Awaitable[T]]): The coroutine function to run.
+
+        Returns:
+            Tuple[T, bool]: The result and whether it was shared with another caller.
+
+        Raises:
+            Exception: Whatever the shared call raised.
+        """
+        call_key = (asyncio.get_running_loop(), key)
+        call = self._calls.get(call_key)
+        leader = call is None
+        if leader:
+            call = self._calls[call_key] = _AsyncCall(asyncio.ensure_future(fn(*args, **kwargs)))
+            call.task.add_done_callback(lambda _: self._forget(call_key, call))
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task), not leader
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # Let the cancellation unwind the call before giving up
+                call.task.cancel()
+                await asyncio.wait([call.task])
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, call_key: Tuple[asyncio.AbstractEventLoop, Hashable], call: _AsyncCall) -> None:
+        if self._calls.get(call_key) is call:
+            del self._calls[call_key]
+
+    def in_flight(self) -> int:
+        """Number of calls currently running."""
+        return len(self._calls)